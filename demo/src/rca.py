@@ -16,20 +16,27 @@ import sys
 
 from luminol import utils, exceptions
 from luminol.anomaly_detector import AnomalyDetector
-from luminol.correlator import Correlator
+from luminol.constants import DEFAULT_CORRELATION_PRUNE_FACTOR
 from luminol.modules.correlation_result import CorrelationResult
 from luminol.modules.time_series import TimeSeries
+from luminol.score_cache import default_score_cache
+from luminol.windowed_correlator import WindowedCorrelator
 
 
 class RCA(object):
-  def __init__(self, metrix, related_metrices):
+  def __init__(self, metrix, related_metrices, top_k=None, prune_factor=DEFAULT_CORRELATION_PRUNE_FACTOR):
     """
     Initializer
     :param metrix: a TimeSeries, a dictionary or a path to a csv file(str)
     :param list related_metrixes: a list of time series.
+    :param int top_k: if passed, only the top_k most correlated metrics are kept for each anomaly.
+    :param int prune_factor: with top_k, only the top_k * prune_factor metrics with the highest coefficients
+      without shift are fully correlated. 0 or None disables pruning.
     """
+    self.top_k = top_k
+    self.prune_factor = prune_factor
     self.metrix = self._load(metrix)
-    self.anomaly_detector = AnomalyDetector(metrix)
+    self.anomaly_detector = AnomalyDetector(metrix, score_cache=default_score_cache)
     self.related_metrices = related_metrices
     self.anomalies = self.anomaly_detector.get_anomalies()
     self._analyze()
@@ -44,7 +51,27 @@ class RCA(object):
       return metrix
     if isinstance(metrix, dict):
       return TimeSeries(metrix)
-    return TimeSeries(utils.read_csv(metrix))
+    return TimeSeries.from_arrays(*utils.read_csv_arrays(metrix))
+
+  def _prune(self, entries, correlators, time_period):
+    """
+    Keep the related metrics worth a full correlation within a time period.
+    They are ranked by their coefficient without shift, which costs O(1) per metric.
+    :param list entries: the related metrics.
+    :param dict correlators: related metric -> WindowedCorrelator with the metric.
+    :param tuple time_period: the time period to correlate within.
+    :return list: the top_k * prune_factor best ranked related metrics.
+    """
+    if not self.prune_factor or len(entries) <= self.top_k * self.prune_factor:
+      return entries
+    coefficients = []
+    for entry in entries:
+      try:
+        coefficients.append((correlators[entry].get_unshifted_coefficient(time_period), entry))
+      except exceptions.NotEnoughDataPoints:
+        continue
+    coefficients.sort(key=lambda item: item[0], reverse=True)
+    return [entry for _, entry in coefficients[:self.top_k * self.prune_factor]]
 
   def _analyze(self):
     """
@@ -57,6 +84,15 @@ class RCA(object):
     scores = self.anomaly_detector.get_all_scores()
 
     if self.anomalies:
+      # Score the related metrics once instead of once per anomaly, and once across analyses through the score cache.
+      # Each pair is aligned once, then correlated within every anomaly window from prefix sums.
+      correlators = {}
+      for entry in self.related_metrices:
+        entry_scores = AnomalyDetector(entry, score_only=True, score_cache=default_score_cache).get_all_scores()
+        try:
+          correlators[entry] = WindowedCorrelator(scores, entry_scores)
+        except exceptions.NotEnoughDataPoints:
+          continue
       for anomaly in self.anomalies:
         metrix_scores = scores
         start_t, end_t = anomaly.get_time_window()
@@ -77,16 +113,23 @@ class RCA(object):
           metrix_scores_cropped = metrix_scores.crop(extended_start_t, extended_end_t)
 
         # Correlate with other metrics
-        for entry in self.related_metrices:
+        time_period = extended_start_t, extended_end_t
+        entries = [entry for entry in self.related_metrices if entry in correlators]
+        if self.top_k is not None:
+          entries = self._prune(entries, correlators, time_period)
+        results = []
+        for entry in entries:
           try:
-            entry_correlation_result = Correlator(self.metrix, entry, time_period=(extended_start_t, extended_end_t),
-                                                  use_anomaly_score=True).get_correlation_result()
-            record = extended_start_t, extended_end_t, entry_correlation_result.__dict__, entry
-            record_by_name = extended_start_t, extended_end_t, entry_correlation_result.__dict__
-            output[t].append(record)
-            output_by_name[entry].append(record_by_name)
+            results.append((entry, correlators[entry].get_correlation_result(time_period)))
           except exceptions.NotEnoughDataPoints:
-            pass
+            continue
+        if self.top_k is not None:
+          results = sorted(results, key=lambda item: item[1].coefficient, reverse=True)[:self.top_k]
+        for entry, entry_correlation_result in results:
+          record = extended_start_t, extended_end_t, entry_correlation_result.__dict__, entry
+          record_by_name = extended_start_t, extended_end_t, entry_correlation_result.__dict__
+          output[t].append(record)
+          output_by_name[entry].append(record_by_name)
 
     self.output = output
     self.output_by_name = output_by_name
@@ -15,7 +15,7 @@ setup(name="luminol",
       author_email='naarad-dev@googlegroups.com',
       version=luminol_version,
       packages=['luminol', 'luminol.algorithms', 'luminol.modules', 'luminol.algorithms.anomaly_detector_algorithms',
-                'luminol.algorithms.correlator_algorithms'],
+                'luminol.algorithms.correlator_algorithms', 'luminol.algorithms.streaming_anomaly_detector_algorithms'],
       package_dir={'': 'src'},
       install_requires=required,
       license='Apache 2.0',
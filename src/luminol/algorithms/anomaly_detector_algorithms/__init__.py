@@ -9,7 +9,10 @@ Unless required by applicable law or agreed to in writing, software
 distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
+import numpy
+
 from luminol.constants import DEFAULT_NOISE_PCT_THRESHOLD
+from luminol.modules.time_series import TimeSeries
 
 __all__ = ['bitmap_detector', 'derivative_detector', 'exp_avg_detector',
            'default_detector', 'absolute_threshold', 'diff_percent_threshold',
@@ -48,20 +51,38 @@ class AnomalyDetectorAlgorithm(object):
         [0.08, 4.6, 4.6, 4.6, 1.0, 1.0]
         [0.0010, 0.0012, 0.0012, 0.0008, 0.0008]
         while the second series is pretty flat(suppose it has a max score of 100).
-        param dict scores: the scores to be denoised.
+        A numpy array is denoised in place with one masked assignment.
+        param scores: the scores to be denoised, either a numpy array, or a dict or a list aligned with the time series timestamps.
         """
+        if isinstance(scores, numpy.ndarray):
+            if len(scores):
+                maximal = scores.max()
+                if maximal:
+                    scores[scores < DEFAULT_NOISE_PCT_THRESHOLD * maximal] = 0
+            return scores
         if scores:
-            maximal = max(scores.values())
+            keys = scores.keys() if isinstance(scores, dict) else range(len(scores))
+            maximal = max(scores[key] for key in keys)
             if maximal:
-                for key in scores:
+                for key in keys:
                     if scores[key] < DEFAULT_NOISE_PCT_THRESHOLD * maximal:
                         scores[key] = 0
         return scores
 
-    # Need to be extended.
     def _set_scores(self):
         """
         Compute anomaly scores for the time series.
+        The scores from _compute_anom_scores are denoised in place, then used as the values of a TimeSeries
+        which shares the timestamps of the time series.
+        """
+        anom_scores = numpy.asarray(self._compute_anom_scores(), dtype=numpy.float64)
+        self.anom_scores = TimeSeries.from_arrays(self.time_series.timestamps_array, self._denoise_scores(anom_scores))
+
+    # Need to be extended, unless _set_scores is.
+    def _compute_anom_scores(self):
+        """
+        Compute anomaly scores before denoising.
+        :return numpy.ndarray: float64 anomaly scores aligned with the time series timestamps.
         """
         raise NotImplementedError
 
@@ -10,9 +10,10 @@ distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
 
+import numpy
+
 from luminol import exceptions
 from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
-from luminol.modules.time_series import TimeSeries
 
 
 class AbsoluteThreshold(AnomalyDetectorAlgorithm):
@@ -39,16 +40,17 @@ class AbsoluteThreshold(AnomalyDetectorAlgorithm):
                                                          'Either absolute_threshold_value_upper or '
                                                          'absolute_threshold_value_lower needed')
 
-    def _set_scores(self):
+    def _compute_anom_scores(self):
         """
         Compute anomaly scores for the time series
         This algorithm just takes the diff of threshold with current value as anomaly score
         """
-        anom_scores = {}
-        for timestamp, value in self.time_series.items():
-            anom_scores[timestamp] = 0.0
-            if self.absolute_threshold_value_upper and value > self.absolute_threshold_value_upper:
-                anom_scores[timestamp] = value - self.absolute_threshold_value_upper
-            if self.absolute_threshold_value_lower and value < self.absolute_threshold_value_lower:
-                anom_scores[timestamp] = self.absolute_threshold_value_lower - value
-        self.anom_scores = TimeSeries(self._denoise_scores(anom_scores))
+        values = self.time_series.values_array
+        anom_scores = numpy.zeros(len(values))
+        if self.absolute_threshold_value_upper:
+            upper = values > self.absolute_threshold_value_upper
+            anom_scores[upper] = values[upper] - self.absolute_threshold_value_upper
+        if self.absolute_threshold_value_lower:
+            lower = values < self.absolute_threshold_value_lower
+            anom_scores[lower] = self.absolute_threshold_value_lower - values[lower]
+        return anom_scores
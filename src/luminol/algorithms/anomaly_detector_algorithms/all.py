@@ -9,20 +9,14 @@ Unless required by applicable law or agreed to in writing, software
 distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
-from luminol.algorithms.anomaly_detector_algorithms import (bitmap_detector,
-                                                            default_detector,
-                                                            derivative_detector,
-                                                            exp_avg_detector,
-                                                            absolute_threshold,
-                                                            diff_percent_threshold,
-                                                            sign_test)
+from luminol.algorithms.registry import AlgorithmRegistry
 
-anomaly_detector_algorithms = {
-    'bitmap_detector': bitmap_detector.BitmapDetector,
-    'default_detector': default_detector.DefaultDetector,
-    'derivative_detector': derivative_detector.DerivativeDetector,
-    'exp_avg_detector': exp_avg_detector.ExpAvgDetector,
-    'absolute_threshold': absolute_threshold.AbsoluteThreshold,
-    'diff_percent_threshold': diff_percent_threshold.DiffPercentThreshold,
-    'sign_test': sign_test.SignTest
-}
+anomaly_detector_algorithms = AlgorithmRegistry('luminol.anomaly_detector_algorithms', {
+    'bitmap_detector': 'luminol.algorithms.anomaly_detector_algorithms.bitmap_detector:BitmapDetector',
+    'default_detector': 'luminol.algorithms.anomaly_detector_algorithms.default_detector:DefaultDetector',
+    'derivative_detector': 'luminol.algorithms.anomaly_detector_algorithms.derivative_detector:DerivativeDetector',
+    'exp_avg_detector': 'luminol.algorithms.anomaly_detector_algorithms.exp_avg_detector:ExpAvgDetector',
+    'absolute_threshold': 'luminol.algorithms.anomaly_detector_algorithms.absolute_threshold:AbsoluteThreshold',
+    'diff_percent_threshold': 'luminol.algorithms.anomaly_detector_algorithms.diff_percent_threshold:DiffPercentThreshold',
+    'sign_test': 'luminol.algorithms.anomaly_detector_algorithms.sign_test:SignTest'
+})
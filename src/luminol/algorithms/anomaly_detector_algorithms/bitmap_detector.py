@@ -9,13 +9,10 @@ Unless required by applicable law or agreed to in writing, software
 distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
-from collections import defaultdict
-from copy import copy
-import math
+import numpy
 
-from luminol import exceptions
+from luminol import exceptions, utils
 from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
-from luminol.modules.time_series import TimeSeries
 from luminol.constants import (DEFAULT_BITMAP_PRECISION,
                                DEFAULT_BITMAP_CHUNK_SIZE,
                                DEFAULT_BITMAP_LAGGING_WINDOW_SIZE_PCT,
@@ -72,141 +69,64 @@ class BitmapDetector(AnomalyDetectorAlgorithm):
         if self.future_window_size > DEFAULT_BITMAP_MAXIMAL_POINTS_IN_WINDOWS:
             self.future_window_size = DEFAULT_BITMAP_MAXIMAL_POINTS_IN_WINDOWS
 
-    def _generate_SAX_single(self, sections, value):
-        """
-        Generate SAX representation(Symbolic Aggregate approXimation) for a single data point.
-        Read more about it here: Assumption-Free Anomaly Detection in Time Series(http://alumni.cs.ucr.edu/~ratana/SSDBM05.pdf).
-        :param dict sections: value sections.
-        :param float value: value to be categorized.
-        :return str: a SAX representation.
-        """
-        sax = 0
-        for section_number in sections.keys():
-            section_lower_bound = sections[section_number]
-            if value >= section_lower_bound:
-                sax = section_number
-            else:
-                break
-        return str(sax)
-
     def _generate_SAX(self):
         """
-        Generate SAX representation for all values of the time series.
+        Generate SAX representation(Symbolic Aggregate approXimation) for all values of the time series.
+        Read more about it here: Assumption-Free Anomaly Detection in Time Series(http://alumni.cs.ucr.edu/~ratana/SSDBM05.pdf).
         """
-        sections = {}
         self.value_min = self.time_series.min()
         self.value_max = self.time_series.max()
-        # Break the whole value range into different sections.
-        section_height = (self.value_max - self.value_min) / self.precision
-        for section_number in range(self.precision):
-            sections[section_number] = self.value_min + section_number * section_height
-        # Generate SAX representation.
-        self.sax = ''.join(self._generate_SAX_single(sections, value) for value in self.time_series.values)
+        self.sax = utils.compute_sax(self.time_series.values_array, self.precision, self.value_min, self.value_max)
 
-    def _construct_SAX_chunk_dict(self, sax):
+    def _encode_SAX_chunks(self):
         """
-        Form a chunk frequency dictionary from a SAX representation.
-        :param str sax: a SAX representation.
-        :return dict: frequency dictionary for chunks in the SAX representation.
+        Encode every chunk of the SAX representation as an integer.
+        The chunk starting at each index is read as a base-precision number, and these numbers are
+        then mapped to consecutive ids so that chunk frequencies can be kept in a count array.
+        :return list: chunk id for every index where a whole chunk starts.
         """
-        frequency = defaultdict(int)
-        chunk_size = self.chunk_size
-        length = len(sax)
-        for i in range(length):
-            if i + chunk_size <= length:
-                chunk = sax[i: i + chunk_size]
-                frequency[chunk] += 1
-        return frequency
+        codes = utils.compute_sax_chunk_codes(self.sax, self.precision, self.chunk_size)
+        return numpy.unique(codes, return_inverse=True)[1].ravel().tolist()
 
-    def _construct_all_SAX_chunk_dict(self):
+    def _compute_anom_scores(self):
         """
-        Construct the chunk dicts for lagging window and future window at each index.
+        Compute the distance between the lagging window and the future window chunk frequencies at each index,
+        which is then marked as the anomaly score of the data point on the window boundary in the middle.
          e.g: Suppose we have a SAX sequence as '1234567890', both window sizes are 3, and the chunk size is 2.
          The first index that has a lagging window is 3. For index equals 3, the lagging window has sequence '123',
-         the chunk to leave lagging window(lw_leave_chunk) is '12', and the chunk to enter lagging window(lw_enter_chunk) is '34'.
-         Therefore, given chunk dicts at i, to compute chunk dicts at i+1, simply decrement the count for lw_leave_chunk,
-         and increment the count for lw_enter_chunk from chunk dicts at i. Same method applies to future window as well.
+         the chunk to leave lagging window is '12', and the chunk to enter lagging window is '34'.
+         Moving to the next index therefore only changes the counts of four chunks, and the squared distance
+         is updated for those four chunks instead of being computed again over all chunks.
+        :return numpy.ndarray: anomaly scores aligned with the time series.
         """
-        lag_dicts = {}
-        fut_dicts = {}
-        length = self.time_series_length
-        lws = self.lag_window_size
-        fws = self.future_window_size
-        chunk_size = self.chunk_size
-
-        for i in range(length):
-            # If i is too small or too big, there will be no chunk dicts.
-            if i < lws or i > length - fws:
-                lag_dicts[i] = None
-
-            else:
-                # Just enter valid range.
-                if lag_dicts[i - 1] is None:
-                    lag_dict = self._construct_SAX_chunk_dict(self.sax[i - lws: i])
-                    lag_dicts[i] = lag_dict
-                    lw_leave_chunk = self.sax[0:chunk_size]
-                    lw_enter_chunk = self.sax[i - chunk_size + 1: i + 1]
-
-                    fut_dict = self._construct_SAX_chunk_dict(self.sax[i: i + fws])
-                    fut_dicts[i] = fut_dict
-                    fw_leave_chunk = self.sax[i: i + chunk_size]
-                    fw_enter_chunk = self.sax[i + fws + 1 - chunk_size: i + fws + 1]
-
-                else:
-                    # Update dicts according to leave_chunks and enter_chunks.
-                    lag_dict = copy(lag_dicts[i - 1])
-                    lag_dict[lw_leave_chunk] -= 1
-                    lag_dict[lw_enter_chunk] += 1
-                    lag_dicts[i] = lag_dict
-
-                    fut_dict = copy(fut_dicts[i - 1])
-                    fut_dict[fw_leave_chunk] -= 1
-                    fut_dict[fw_enter_chunk] += 1
-                    fut_dicts[i] = fut_dict
-
-                    # Updata leave_chunks and enter_chunks.
-                    lw_leave_chunk = self.sax[i - lws: i - lws + chunk_size]
-                    lw_enter_chunk = self.sax[i - chunk_size + 1: i + 1]
-                    fw_leave_chunk = self.sax[i: i + chunk_size]
-                    fw_enter_chunk = self.sax[i + fws + 1 - chunk_size: i + fws + 1]
-
-        self.lag_dicts = lag_dicts
-        self.fut_dicts = fut_dicts
-
-    def _compute_anom_score_between_two_windows(self, i):
-        """
-        Compute distance difference between two windows' chunk frequencies,
-        which is then marked as the anomaly score of the data point on the window boundary in the middle.
-        :param int i: index of the data point between two windows.
-        :return float: the anomaly score.
-        """
-        lag_window_chunk_dict = self.lag_dicts[i]
-        future_window_chunk_dict = self.fut_dicts[i]
-        score = 0
-        for chunk in lag_window_chunk_dict:
-            if chunk in future_window_chunk_dict:
-                score += math.pow(future_window_chunk_dict[chunk] - lag_window_chunk_dict[chunk], 2)
-            else:
-                score += math.pow(lag_window_chunk_dict[chunk], 2)
-        for chunk in future_window_chunk_dict:
-            if chunk not in lag_window_chunk_dict:
-                score += math.pow(future_window_chunk_dict[chunk], 2)
-        return score
-
-    def _set_scores(self):
-        """
-        Compute anomaly scores for the time series by sliding both lagging window and future window.
-        """
-        anom_scores = {}
         self._generate_SAX()
-        self._construct_all_SAX_chunk_dict()
+        chunk_ids = self._encode_SAX_chunks()
         length = self.time_series_length
         lws = self.lag_window_size
         fws = self.future_window_size
-
-        for i, timestamp in enumerate(self.time_series.timestamps):
-            if i < lws or i > length - fws:
-                anom_scores[timestamp] = 0
-            else:
-                anom_scores[timestamp] = self._compute_anom_score_between_two_windows(i)
-        self.anom_scores = TimeSeries(self._denoise_scores(anom_scores))
+        chunk_size = self.chunk_size
+        anom_scores = [0] * length
+
+        # Frequency of each chunk in the future window minus its frequency in the lagging window.
+        count_diffs = [0] * (max(chunk_ids) + 1 if chunk_ids else 0)
+        for chunk_id in chunk_ids[0: max(lws - chunk_size + 1, 0)]:
+            count_diffs[chunk_id] -= 1
+        for chunk_id in chunk_ids[lws: lws + max(fws - chunk_size + 1, 0)]:
+            count_diffs[chunk_id] += 1
+        score = sum(count_diff * count_diff for count_diff in count_diffs)
+        anom_scores[lws] = score
+
+        for i in range(lws, length - fws):
+            # Slide both windows by one index, each window has one chunk leaving and one chunk entering.
+            if lws >= chunk_size:
+                for chunk_id, delta in ((chunk_ids[i - lws], 1), (chunk_ids[i + 1 - chunk_size], -1)):
+                    count_diff = count_diffs[chunk_id]
+                    score += 2 * delta * count_diff + 1
+                    count_diffs[chunk_id] = count_diff + delta
+            if fws >= chunk_size:
+                for chunk_id, delta in ((chunk_ids[i], -1), (chunk_ids[i + fws + 1 - chunk_size], 1)):
+                    count_diff = count_diffs[chunk_id]
+                    score += 2 * delta * count_diff + 1
+                    count_diffs[chunk_id] = count_diff + delta
+            anom_scores[i + 1] = score
+        return numpy.array(anom_scores, dtype=numpy.float64)
@@ -9,10 +9,11 @@ Unless required by applicable law or agreed to in writing, software
 distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
+import numpy
+
 from luminol.algorithms.anomaly_detector_algorithms.exp_avg_detector import ExpAvgDetector
 from luminol.algorithms.anomaly_detector_algorithms.derivative_detector import DerivativeDetector
 from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
-from luminol.modules.time_series import TimeSeries
 from luminol.constants import (DEFAULT_DETECTOR_EMA_WEIGHT,
                                DEFAULT_DETECTOR_EMA_SIGNIFICANT)
 
@@ -29,21 +30,21 @@ class DefaultDetector(AnomalyDetectorAlgorithm):
         :param TimeSeries time_series: a TimeSeries object.
         :param TimeSeries baseline_time_series: baseline TimeSeries.
         """
+        super(DefaultDetector, self).__init__(self.__class__.__name__, time_series, baseline_time_series)
         self.exp_avg_detector = ExpAvgDetector(time_series, baseline_time_series)
         self.derivative_detector = DerivativeDetector(time_series, baseline_time_series)
 
-    def _set_scores(self):
+    def _compute_anom_scores(self):
         """
-        Set anomaly scores using a weighted sum.
+        Compute anomaly scores using a weighted sum.
+        The scores of both detectors are computed on the same values and combined as arrays.
+        :return numpy.ndarray: the anomaly scores aligned with the time series timestamps.
         """
-        anom_scores_ema = self.exp_avg_detector.run()
-        anom_scores_deri = self.derivative_detector.run()
-        anom_scores = {}
-        for timestamp in anom_scores_ema.timestamps:
-            # Compute a weighted anomaly score.
-            anom_scores[timestamp] = max(anom_scores_ema[timestamp],
-                                         anom_scores_ema[timestamp] * DEFAULT_DETECTOR_EMA_WEIGHT + anom_scores_deri[timestamp] * (1 - DEFAULT_DETECTOR_EMA_WEIGHT))
-            # If ema score is significant enough, take the bigger one of the weighted score and deri score.
-            if anom_scores_ema[timestamp] > DEFAULT_DETECTOR_EMA_SIGNIFICANT:
-                anom_scores[timestamp] = max(anom_scores[timestamp], anom_scores_deri[timestamp])
-        self.anom_scores = TimeSeries(self._denoise_scores(anom_scores))
+        ema_scores = self._denoise_scores(self.exp_avg_detector._compute_anom_scores_decay_all())
+        deri_scores = self._denoise_scores(self.derivative_detector._compute_anom_scores())
+        # Compute a weighted anomaly score.
+        anom_scores = numpy.maximum(ema_scores, ema_scores * DEFAULT_DETECTOR_EMA_WEIGHT + deri_scores * (1 - DEFAULT_DETECTOR_EMA_WEIGHT))
+        # If ema score is significant enough, take the bigger one of the weighted score and deri score.
+        significant = ema_scores > DEFAULT_DETECTOR_EMA_SIGNIFICANT
+        anom_scores[significant] = numpy.maximum(anom_scores[significant], deri_scores[significant])
+        return anom_scores
@@ -14,7 +14,6 @@ import numpy
 from luminol import utils
 from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
 from luminol.constants import DEFAULT_DERI_SMOOTHING_FACTOR
-from luminol.modules.time_series import TimeSeries
 
 
 class DerivativeDetector(AnomalyDetectorAlgorithm):
@@ -33,38 +32,48 @@ class DerivativeDetector(AnomalyDetectorAlgorithm):
         """
         super(DerivativeDetector, self).__init__(self.__class__.__name__, time_series, baseline_time_series)
         self.smoothing_factor = (smoothing_factor or DEFAULT_DERI_SMOOTHING_FACTOR)
-        self.time_series_items = self.time_series.items()
 
     def _compute_derivatives(self):
         """
         Compute derivatives of the time series.
         """
-        derivatives = []
-        for i, (timestamp, value) in enumerate(self.time_series_items):
-            if i > 0:
-                pre_item = self.time_series_items[i - 1]
-                pre_timestamp = pre_item[0]
-                pre_value = pre_item[1]
-                td = timestamp - pre_timestamp
-                derivative = (value - pre_value) / td if td != 0 else value - pre_value
-                derivative = abs(derivative)
-                derivatives.append(derivative)
-        # First timestamp is assigned the same derivative as the second timestamp.
-        if derivatives:
-            derivatives.insert(0, derivatives[0])
-        self.derivatives = derivatives
+        self.derivatives = compute_derivatives(self.time_series.timestamps_array, self.time_series.values_array)
 
-    def _set_scores(self):
+    def _compute_anom_scores(self):
         """
-        Compute anomaly scores for the time series.
+        Compute anomaly scores before denoising.
+        :return numpy.ndarray: the anomaly scores aligned with the time series timestamps.
         """
-        anom_scores = {}
         self._compute_derivatives()
-        derivatives_ema = utils.compute_ema(self.smoothing_factor, self.derivatives)
-        for i, (timestamp, value) in enumerate(self.time_series_items):
-            anom_scores[timestamp] = abs(self.derivatives[i] - derivatives_ema[i])
-        stdev = numpy.std(list(anom_scores.values()))
-        if stdev:
-                for timestamp in anom_scores.keys():
-                    anom_scores[timestamp] /= stdev
-        self.anom_scores = TimeSeries(self._denoise_scores(anom_scores))
+        return compute_derivative_scores(self.derivatives, self.smoothing_factor)
+
+
+def compute_derivatives(timestamps, values):
+    """
+    Compute absolute derivatives of time series.
+    The derivative of a point is computed from the point before, the first point is assigned
+    the same derivative as the second point. Points with the same timestamp use the difference of values.
+    :param numpy.ndarray timestamps: the timestamps.
+    :param numpy.ndarray values: values aligned with the timestamps, or a 2-D array with the values of one time series per row.
+    :return numpy.ndarray: the derivatives, of the same shape as values.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    time_deltas = numpy.diff(timestamps)
+    derivatives = numpy.abs(numpy.diff(values, axis=-1) / numpy.where(time_deltas != 0, time_deltas, 1))
+    if derivatives.shape[-1] == 0:
+        return numpy.zeros_like(values)
+    return numpy.concatenate([derivatives[..., :1], derivatives], axis=-1)
+
+
+def compute_derivative_scores(derivatives, smoothing_factor=DEFAULT_DERI_SMOOTHING_FACTOR):
+    """
+    Compute anomaly scores from derivatives, before denoising.
+    The anomaly score of a point is its derivative's deviation from the ema of derivatives,
+    normalized by the standard deviation of all the deviations.
+    :param numpy.ndarray derivatives: the derivatives, or a 2-D array with the derivatives of one time series per row.
+    :param float smoothing_factor: smoothing factor.
+    :return numpy.ndarray: the anomaly scores, of the same shape as derivatives.
+    """
+    anom_scores = numpy.abs(derivatives - utils._compute_ema(smoothing_factor, derivatives))
+    stdev = numpy.std(anom_scores, axis=-1, keepdims=True)
+    return anom_scores / numpy.where(stdev != 0, stdev, 1)
@@ -10,9 +10,10 @@ distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
 
+import numpy
+
 from luminol import exceptions
 from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
-from luminol.modules.time_series import TimeSeries
 
 
 class DiffPercentThreshold(AnomalyDetectorAlgorithm):
@@ -38,27 +39,29 @@ class DiffPercentThreshold(AnomalyDetectorAlgorithm):
             raise exceptions.RequiredParametersNotPassed('luminol.algorithms.anomaly_detector_algorithms.diff_percent_threshold: \
                     Either percent_threshold_upper or percent_threshold_lower needed')
 
-    def _set_scores(self):
+    def _compute_anom_scores(self):
         """
         Compute anomaly scores for the time series
         This algorithm just takes the diff of threshold with current value as anomaly score
         """
-        anom_scores = {}
-        for i, (timestamp, value) in enumerate(self.time_series.items()):
-
-            baseline_value = self.baseline_time_series[i]
-
-            if baseline_value > 0:
-                diff_percent = 100 * (value - baseline_value) / baseline_value
-            elif value > 0:
-                diff_percent = 100.0
-            else:
-                diff_percent = 0.0
+        values = self.time_series.values_array
+        # The i-th value is compared with the baseline value at timestamp i.
+        baseline_timestamps = self.baseline_time_series.timestamps_array
+        timestamps = numpy.arange(len(values))
+        positions = numpy.minimum(numpy.searchsorted(baseline_timestamps, timestamps), len(baseline_timestamps) - 1)
+        if len(values) and (not len(baseline_timestamps) or not numpy.array_equal(baseline_timestamps[positions], timestamps)):
+            raise ValueError('Timestamp does not exist in TimeSeries object')
+        baseline_values = self.baseline_time_series.values_array[positions]
 
-            anom_scores[timestamp] = 0.0
-            if self.percent_threshold_upper and diff_percent > 0 and diff_percent > self.percent_threshold_upper:
-                anom_scores[timestamp] = diff_percent
-            if self.percent_threshold_lower and diff_percent < 0 and diff_percent < self.percent_threshold_lower:
-                anom_scores[timestamp] = -1 * diff_percent
+        diff_percents = numpy.where(values > 0, 100.0, 0.0)
+        positive = baseline_values > 0
+        diff_percents[positive] = 100 * (values[positive] - baseline_values[positive]) / baseline_values[positive]
 
-        self.anom_scores = TimeSeries(self._denoise_scores(anom_scores))
+        anom_scores = numpy.zeros(len(values))
+        if self.percent_threshold_upper:
+            upper = (diff_percents > 0) & (diff_percents > self.percent_threshold_upper)
+            anom_scores[upper] = diff_percents[upper]
+        if self.percent_threshold_lower:
+            lower = (diff_percents < 0) & (diff_percents < self.percent_threshold_lower)
+            anom_scores[lower] = -1 * diff_percents[lower]
+        return anom_scores
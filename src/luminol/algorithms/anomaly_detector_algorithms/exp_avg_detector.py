@@ -13,7 +13,6 @@ import numpy
 
 from luminol import utils
 from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
-from luminol.modules.time_series import TimeSeries
 from luminol.constants import (DEFAULT_EMA_SMOOTHING_FACTOR,
                                DEFAULT_EMA_WINDOW_SIZE_PCT)
 
@@ -37,55 +36,38 @@ class ExpAvgDetector(AnomalyDetectorAlgorithm):
         self.use_lag_window = use_lag_window
         self.smoothing_factor = smoothing_factor if smoothing_factor > 0 else DEFAULT_EMA_SMOOTHING_FACTOR
         self.lag_window_size = lag_window_size if lag_window_size else int(self.time_series_length * DEFAULT_EMA_WINDOW_SIZE_PCT)
-        self.time_series_items = self.time_series.items()
 
-    def _compute_anom_score(self, lag_window_points, point):
+    def _compute_anom_scores_using_window(self):
         """
-        Compute anomaly score for a single data point.
+        Compute anomaly scores before denoising, using a lagging window.
         Anomaly score for a single data point(t,v) equals: abs(v - ema(lagging window)).
-        :param list lag_window_points: values in the lagging window.
-        :param float point: data point value.
-        :return float: the anomaly score.
+        :return numpy.ndarray: the anomaly scores aligned with the time series timestamps.
         """
-        ema = utils.compute_ema(self.smoothing_factor, lag_window_points)[-1]
-        return abs(point - ema)
-
-    def _compute_anom_data_using_window(self):
-        """
-        Compute anomaly scores using a lagging window.
-        """
-        anom_scores = {}
-        values = self.time_series.values
+        values = self.time_series.values_array
+        ema = utils.compute_windowed_ema(self.smoothing_factor, values, self.lag_window_size)
+        anom_scores = numpy.abs(values - ema)
         stdev = numpy.std(values)
-        for i, (timestamp, value) in enumerate(self.time_series_items):
-            if i < self.lag_window_size:
-                anom_score = self._compute_anom_score(values[:i + 1], value)
-            else:
-                anom_score = self._compute_anom_score(values[i - self.lag_window_size: i + 1], value)
-            if stdev:
-                anom_scores[timestamp] = anom_score / stdev
-            else:
-                anom_scores[timestamp] = anom_score
-        self.anom_scores = TimeSeries(self._denoise_scores(anom_scores))
+        if stdev:
+            anom_scores /= stdev
+        return anom_scores
 
-    def _compute_anom_data_decay_all(self):
+    def _compute_anom_scores_decay_all(self):
         """
-        Compute anomaly scores using a lagging window covering all the data points before.
+        Compute anomaly scores before denoising, using a lagging window covering all the data points before.
+        :return numpy.ndarray: the anomaly scores aligned with the time series timestamps.
         """
-        anom_scores = {}
-        values = self.time_series.values
-        ema = utils.compute_ema(self.smoothing_factor, values)
+        values = self.time_series.values_array
+        ema = utils._compute_ema(self.smoothing_factor, values)
         stdev = numpy.std(values)
-        for i, (timestamp, value) in enumerate(self.time_series_items):
-            anom_score = abs((value - ema[i]) / stdev) if stdev else value - ema[i]
-            anom_scores[timestamp] = anom_score
-        self.anom_scores = TimeSeries(self._denoise_scores(anom_scores))
+        return numpy.abs((values - ema) / stdev) if stdev else values - ema
 
-    def _set_scores(self):
+    def _compute_anom_scores(self):
         """
         Compute anomaly scores for the time series.
-        Currently uses a lagging window covering all the data points before.
+        Uses a lagging window of lag_window_size points if use_lag_window is asserted,
+        otherwise a lagging window covering all the data points before.
+        :return numpy.ndarray: the anomaly scores aligned with the time series timestamps.
         """
         if self.use_lag_window:
-            self._compute_anom_data_using_window()
-        self._compute_anom_data_decay_all()
+            return self._compute_anom_scores_using_window()
+        return self._compute_anom_scores_decay_all()
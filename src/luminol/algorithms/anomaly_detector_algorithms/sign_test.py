@@ -13,7 +13,7 @@ import numpy as np
 
 from luminol import exceptions
 from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
-from luminol.utils import qbinom, pbinom
+from luminol.utils import get_sign_test_table, pbinom
 from luminol.modules.time_series import TimeSeries
 
 
@@ -36,6 +36,10 @@ class SignTest(AnomalyDetectorAlgorithm):
      a) every timestamp that exists in time_series also exists in baseline_time_series
      b) lengths of both time series are same
      c) the test window must not be larger than the time series
+
+    Several scan windows and confidences can be tested at once. The comparison to the baseline is computed once
+    and every configuration counts its windows from the same cumulative sum. The anomaly score of a point is the
+    maximal score over all configurations, and the scores of each configuration are kept too.
     """
     def __init__(self, time_series, baseline_time_series,
                  percent_threshold_upper=None, percent_threshold_lower=None,
@@ -52,7 +56,9 @@ class SignTest(AnomalyDetectorAlgorithm):
                                  or for lower value
                                  TimeSeries < offset +    (1 + percent_threshold_lower/100) * Baseline
         :param scan_window: number of data points to evaluate for anomalies default of 24 = 5 minute period for 2 hours
+                            or a list of them
         :param confidence: Confidence to use for determining anomaly, default is 0.01
+                           or a list of them, paired with the list of scan windows
         :return:
         """
         super(SignTest, self).__init__(self.__class__.__name__, time_series, baseline_time_series)
@@ -65,13 +71,23 @@ class SignTest(AnomalyDetectorAlgorithm):
             raise exceptions.RequiredParametersNotPassed('luminol.algorithms.anomaly_detector_algorithms.sign_test: \
                     Cannot specify both percent_threshold_upper and percent_threshold_lower')
 
-        if not scan_window:
+        scan_windows = scan_window if isinstance(scan_window, (list, tuple)) else [scan_window]
+        confidences = confidence if isinstance(confidence, (list, tuple)) else [confidence] * len(scan_windows)
+        if len(scan_windows) == 1 and len(confidences) > 1:
+            scan_windows = scan_windows * len(confidences)
+
+        if not scan_windows or not all(scan_windows):
             raise exceptions.RequiredParametersNotPassed('luminol.algorithms.anomaly_detector_algorithms.sign_test: \
                     scan window size needs to be specified')
 
+        if len(scan_windows) != len(confidences):
+            raise exceptions.InvalidDataFormat('luminol.algorithms.anomaly_detector_algorithms.sign_test: \
+                    scan_window and confidence lists must be of the same length')
+
         # make assignements
         self.scan_window = scan_window
         self.confidence = confidence
+        self.configurations = list(zip(scan_windows, confidences))
         self.offset = offset
 
         self.percent_threshold = percent_threshold_upper if percent_threshold_upper is not None else percent_threshold_lower
@@ -87,22 +103,32 @@ class SignTest(AnomalyDetectorAlgorithm):
         to the entire region
         """
 
-        scores = np.zeros(len(self.time_series.values))
-
-        anomalies = SignTest._rolling_sign_test(self.scale * np.array(self.time_series.values),
-                                                self.scale * np.array(self.baseline_time_series.values),
-                                                k=self.scan_window,
-                                                conf=self.confidence,
-                                                alpha=float(self.percent_threshold) / 100,
-                                                offset=self.scale * self.offset)
-        for (s, e), prob in anomalies:
-            scores[s:e] = 100 * prob
-
-        scores_dict = dict()
-        for i, timestamp in enumerate(self.time_series.timestamps):
-            scores_dict[timestamp] = scores[i]
-
-        self.anom_scores = TimeSeries(scores_dict)
+        x = self.scale * self.time_series.values_array
+        y = self.scale * self.baseline_time_series.values_array
+        alpha = float(self.percent_threshold) / 100
+
+        scores = np.zeros(len(self.time_series))
+        self.anom_scores_by_configuration = {}
+        if len(x) == len(y):
+            d = SignTest._compute_exceedances(x, y, alpha=alpha, offset=self.scale * self.offset)
+            counts = np.concatenate(([0], np.cumsum(d)))
+        for k, conf in self.configurations:
+            configuration_scores = np.zeros(len(self.time_series))
+            if len(x) == len(y):
+                for (s, e), prob in SignTest._sign_test_ranges(counts, k=k, conf=conf):
+                    configuration_scores[s:e] = 100 * prob
+            self.anom_scores_by_configuration[k, conf] = TimeSeries.from_arrays(self.time_series.timestamps_array,
+                                                                                configuration_scores)
+            np.fmax(scores, configuration_scores, out=scores)
+
+        self.anom_scores = TimeSeries.from_arrays(self.time_series.timestamps_array, scores)
+
+    def get_scores_by_configuration(self):
+        """
+        Get anomaly scores for each configuration.
+        :return dict: (scan window, confidence) -> a TimeSeries representation of the anomaly scores.
+        """
+        return self.anom_scores_by_configuration
 
     @staticmethod
     def _merge_ranges(ranges, max_gap):
@@ -131,33 +157,33 @@ class SignTest(AnomalyDetectorAlgorithm):
         return merged_ranges
 
     @staticmethod
-    def _rolling_sign_test(x, y, k=24, alpha=0.05, offset=0.0, conf=0.01, gap=0):
+    def _compute_exceedances(x, y, alpha=0.05, offset=0.0):
         """
-        sign test ccompares x to y counts how many are over
-        do a rolling comparison over all x , y
-        x is compared against shift + alpha * y
+        compare x to shift + alpha * y
         :param x: values to be compared
         :param y: values to compared against
-        :param k: how many values to compare default is 24 (5 minute intervals * 2 hours)
         :param alpha scaling for y in percents 0.5 = 5% increase
         :param shift: amount to shift baseline by
+        :return: array which is 1 where x is bigger, 0 otherwise
+        """
+        return np.fmax(np.sign(x - offset - (1. + alpha) * y), 0)
+
+    @staticmethod
+    def _sign_test_ranges(counts, k=24, conf=0.01, gap=0):
+        """
+        find windows of k values where significantly many x are over, from the counts of exceedances
+        :param counts: counts[i] is how many of the first i values are over
+        :param k: how many values to compare default is 24 (5 minute intervals * 2 hours)
         :param conf: likelihood to use for anomaly
         :param gap: allowed gap between anomalies
         """
-
-        if len(x) != len(y) or len(x) < k:
+        if len(counts) - 1 < k:
             return list()
 
-        # our filter to convolve with - just counts
-        f = np.ones(k)
-
         # threshold to be bigger than
-        qthresh = qbinom(1 - conf, k) - 1
-
-        # this is 1 if bigger 0 otherwise
-        d = np.fmax(np.sign(x - offset - (1. + alpha) * y), 0)
+        qthresh, _ = get_sign_test_table(k, conf)
 
-        con = np.convolve(f, d, mode='valid')
+        con = counts[k:] - counts[:-k]
 
         a = np.fmax(con - qthresh, 0)
 
@@ -166,10 +192,35 @@ class SignTest(AnomalyDetectorAlgorithm):
         ranges = SignTest._merge_ranges(ranges, gap)
 
         # compute score
-        probs = list()
-        for s, e in ranges:
-            count = sum(d[s:e])
-            probs.append(pbinom(count, e - s))
+        starts = np.array([s for s, e in ranges], dtype=int)
+        ends = np.array([e for s, e in ranges], dtype=int)
+        probs = pbinom(counts[ends] - counts[starts], ends - starts)
 
         # compute confidence
-        return zip(ranges, probs)
+        return zip(ranges, probs.tolist())
+
+    @staticmethod
+    def _rolling_sign_test(x, y, k=24, alpha=0.05, offset=0.0, conf=0.01, gap=0):
+        """
+        sign test ccompares x to y counts how many are over
+        do a rolling comparison over all x , y
+        x is compared against shift + alpha * y
+        :param x: values to be compared
+        :param y: values to compared against
+        :param k: how many values to compare default is 24 (5 minute intervals * 2 hours)
+        :param alpha scaling for y in percents 0.5 = 5% increase
+        :param shift: amount to shift baseline by
+        :param conf: likelihood to use for anomaly
+        :param gap: allowed gap between anomalies
+        """
+
+        if len(x) != len(y) or len(x) < k:
+            return list()
+
+        # this is 1 if bigger 0 otherwise
+        d = SignTest._compute_exceedances(x, y, alpha=alpha, offset=offset)
+
+        # counts of d in [0, i) - the count of any window is a difference of two of them
+        counts = np.concatenate(([0], np.cumsum(d)))
+
+        return SignTest._sign_test_ranges(counts, k=k, conf=conf, gap=gap)
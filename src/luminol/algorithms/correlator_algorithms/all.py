@@ -9,8 +9,8 @@ Unless required by applicable law or agreed to in writing, software
 distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
-from luminol.algorithms.correlator_algorithms import cross_correlator
+from luminol.algorithms.registry import AlgorithmRegistry
 
-correlator_algorithms = {
-        'cross_correlator': cross_correlator.CrossCorrelator
-}
+correlator_algorithms = AlgorithmRegistry('luminol.correlator_algorithms', {
+    'cross_correlator': 'luminol.algorithms.correlator_algorithms.cross_correlator:CrossCorrelator'
+})
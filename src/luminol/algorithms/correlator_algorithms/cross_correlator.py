@@ -9,6 +9,9 @@ Unless required by applicable law or agreed to in writing, software
 distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
+import numpy
+
+from luminol import exceptions
 from luminol.algorithms.correlator_algorithms import CorrelatorAlgorithm
 from luminol.modules.correlation_result import CorrelationResult
 from luminol.constants import (DEFAULT_SHIFT_IMPACT,
@@ -21,15 +24,21 @@ class CrossCorrelator(CorrelatorAlgorithm):
     Method 1: CrossCorrelation algorithm.
     Ideas come from Paul Bourke(http://paulbourke.net/miscellaneous/correlate/).
     """
-    def __init__(self, time_series_a, time_series_b, max_shift_seconds=None, shift_impact=None):
+    def __init__(self, time_series_a, time_series_b, max_shift_seconds=None, shift_impact=None, method='auto'):
         """
         Initializer
         :param TimeSeries time_series_a: TimeSeries a.
         :param TimeSeries time_series_b: TimeSeries b.
         :param int max_shift_milliseconds: allowed maximal shift seconds.
         :param time_period: if given, correlate the data inside the time period only.
+        :param str method: how to compute the correlation at all shifts: 'direct' computes one dot product per shift,
+            'fft' computes all shifts at once with FFT, and 'auto' picks the faster one.
         """
         super(CrossCorrelator, self).__init__(self.__class__.__name__, time_series_a, time_series_b)
+        if method not in ('auto', 'direct', 'fft'):
+            raise exceptions.InvalidDataFormat('luminol.algorithms.correlator_algorithms.cross_correlator: '
+                                               'method has to be one of auto, direct and fft.')
+        self.method = method
         self.shift_impact = shift_impact or DEFAULT_SHIFT_IMPACT
         if max_shift_seconds is not None:
             self.max_shift_milliseconds = max_shift_seconds
@@ -40,57 +49,55 @@ class CrossCorrelator(CorrelatorAlgorithm):
         """
         Detect correlation by computing correlation coefficients for all allowed shift steps,
         then take the maximum.
+        The aligned values are new arrays, they are normalized in place so that both time series stay unchanged.
         """
-        correlations = []
-        shifted_correlations = []
-        self.time_series_a.normalize()
-        self.time_series_b.normalize()
         a, b = self.time_series_a.align(self.time_series_b)
-        a_values, b_values = a.values, b.values
-        a_avg, b_avg = a.average(), b.average()
-        a_stdev, b_stdev = a.stdev(), b.stdev()
-        n = len(a)
-        denom = a_stdev * b_stdev * n
+        a_values = normalize_values(a.values_array)
+        b_values = normalize_values(b.values_array)
+        shifts, coefficients, shifted_coefficients = self._correlate_aligned(a.timestamps_array, a_values, b_values)
+        self.correlation_result = CorrelationResult(shifts.item(), coefficients.item(), shifted_coefficients.item())
+
+    def _correlate_aligned(self, timestamps, a_values, b_values):
+        """
+        Correlate aligned values of time series a with aligned values of one or many time series b.
+        :param numpy.ndarray timestamps: the timestamps shared by all values.
+        :param numpy.ndarray a_values: values of time series a.
+        :param numpy.ndarray b_values: values of time series b, or a 2-D array with the values of one time series b per row.
+        :return tuple: arrays of shifts, coefficients and shifted coefficients, with one element per time series b.
+        """
+        n = len(timestamps)
+        a_centered = a_values - a_values.mean()
+        b_centered = b_values - b_values.mean(axis=-1)[..., numpy.newaxis]
+        denom = a_values.std() * b_values.std(axis=-1) * n
         # Find the maximal shift steps according to the maximal shift seconds.
-        allowed_shift_step = self._find_allowed_shift(a.timestamps)
+        allowed_shift_step = self._find_allowed_shift(timestamps)
         if allowed_shift_step:
-            shift_upper_bound = allowed_shift_step
-            shift_lower_bound = -allowed_shift_step
+            delays = numpy.arange(-allowed_shift_step, allowed_shift_step)
         else:
-            shift_upper_bound = 1
-            shift_lower_bound = 0
-        for delay in range(shift_lower_bound, shift_upper_bound):
-            delay_in_seconds = a.timestamps[abs(delay)] - a.timestamps[0]
-            if delay < 0:
-                delay_in_seconds = -delay_in_seconds
-            s = 0
-            for i in range(n):
-                j = i + delay
-                if j < 0 or j >= n:
-                    continue
-                else:
-                    s += ((a_values[i] - a_avg) * (b_values[j] - b_avg))
-            r = s / denom if denom != 0 else s
-            correlations.append([delay_in_seconds, r])
-            # Take shift into account to create a "shifted correlation coefficient".
-            if self.max_shift_milliseconds:
-                shifted_correlations.append(r * (1 + float(delay_in_seconds) / self.max_shift_milliseconds * self.shift_impact))
-            else:
-                shifted_correlations.append(r)
-        max_correlation = list(max(correlations, key=lambda k: k[1]))
-        max_shifted_correlation = max(shifted_correlations)
-        max_correlation.append(max_shifted_correlation)
-        self.correlation_result = CorrelationResult(*max_correlation)
+            delays = numpy.arange(0, 1)
+        delays_in_seconds = timestamps[numpy.abs(delays)] - timestamps[0]
+        delays_in_seconds[delays < 0] *= -1
+        sums = compute_lagged_sums(a_centered, b_centered, delays, self.method)
+        denom = numpy.where(denom != 0, denom, 1)[..., numpy.newaxis]
+        correlations = sums / denom
+        # Take shift into account to create a "shifted correlation coefficient".
+        if self.max_shift_milliseconds:
+            shifted_correlations = correlations * (1 + delays_in_seconds / float(self.max_shift_milliseconds) * self.shift_impact)
+        else:
+            shifted_correlations = correlations
+        max_positions = numpy.argmax(correlations, axis=-1)
+        return (delays_in_seconds[max_positions],
+                numpy.take_along_axis(correlations, max_positions[..., numpy.newaxis], axis=-1)[..., 0],
+                shifted_correlations.max(axis=-1))
 
     def _find_allowed_shift(self, timestamps):
         """
         Find the maximum allowed shift steps based on max_shift_milliseconds.
-        param list timestamps: timestamps of a time series.
+        The steps are bounded by the last timestamp, as shifts are measured by the timestamps.
+        param numpy.ndarray timestamps: timestamps of a time series.
         """
-        init_ts = timestamps[0]
-        residual_timestamps = [ts - init_ts for ts in timestamps]
-        n = len(residual_timestamps)
-        return self._find_first_bigger(residual_timestamps, self.max_shift_milliseconds, 0, n)
+        allowed_shift_step = numpy.searchsorted(timestamps - timestamps[0], self.max_shift_milliseconds, side='right')
+        return min(int(allowed_shift_step), len(timestamps) - 1)
 
     def _find_first_bigger(self, timestamps, target, lower_bound, upper_bound):
         """
@@ -108,3 +115,36 @@ class CrossCorrelator(CorrelatorAlgorithm):
             else:
                 lower_bound = pos + 1
         return pos
+
+
+def normalize_values(values):
+    """
+    Normalize values in place by their maximum, as TimeSeries.normalize does.
+    :param numpy.ndarray values: float values, or a 2-D array with the values of one time series per row.
+    :return numpy.ndarray: the normalized values.
+    """
+    if values.size:
+        maximum = values.max(axis=-1)[..., numpy.newaxis]
+        values /= numpy.where(maximum != 0, maximum, 1)
+    return values
+
+
+def compute_lagged_sums(a, b, delays, method='auto'):
+    """
+    Compute sum(a[i] * b[i + delay]) over all i where both points exist, for every delay.
+    :param numpy.ndarray a: values of time series a, centered on their mean.
+    :param numpy.ndarray b: values of time series b, centered on their mean, as long as a.
+        A 2-D array holds one time series b per row.
+    :param numpy.ndarray delays: the delays in steps, each smaller than the length of the time series.
+    :param str method: 'direct', 'fft' or 'auto'.
+    :return numpy.ndarray: the sum for each delay, with one row per time series b if b is 2-D.
+    """
+    n = len(a)
+    # A dot product per delay costs O(n) while FFT costs O(n * log(n)) for all delays at once,
+    # with a bigger constant factor.
+    if method == 'fft' or (method == 'auto' and len(delays) > 2 * numpy.log2(n) ** 2):
+        size = 1 << int(2 * n - 1).bit_length()
+        sums = numpy.fft.irfft(numpy.conj(numpy.fft.rfft(a, size)) * numpy.fft.rfft(b, size, axis=-1), size, axis=-1)
+        return sums[..., delays % size]
+    return numpy.array([numpy.dot(b[..., max(0, delay): n - max(0, -delay)], a[max(0, -delay): n - max(0, delay)])
+                        for delay in delays.tolist()]).T
@@ -0,0 +1,136 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+from importlib import import_module
+
+
+def _iter_entry_points(group):
+    """
+    Find the entry points installed for a group.
+    :param str group: name of the entry point group.
+    :return list: entry points which have a name and a load method.
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        try:
+            from pkg_resources import iter_entry_points
+        except ImportError:
+            return []
+        return list(iter_entry_points(group))
+    installed = entry_points()
+    if hasattr(installed, 'select'):
+        return list(installed.select(group=group))
+    return list(installed.get(group, []))
+
+
+class AlgorithmRegistry(object):
+
+    """
+    Map algorithm names to algorithm classes, importing each algorithm module only when it is first asked for.
+    Algorithms installed by other packages are found through the entry points of entry_point_group.
+    """
+    def __init__(self, entry_point_group, algorithms):
+        """
+        Initializer
+        :param str entry_point_group: name of the entry point group other packages register algorithms under.
+        :param dict algorithms: algorithm name -> algorithm class, or its path as 'module:ClassName'.
+        """
+        self.entry_point_group = entry_point_group
+        self._sources = dict(algorithms)
+        self._algorithms = {}
+        self._entry_points_loaded = False
+
+    def register(self, name, algorithm):
+        """
+        Register an algorithm, replacing any algorithm registered with the same name.
+        :param str name: name of the algorithm.
+        :param algorithm: algorithm class, or its path as 'module:ClassName'.
+        """
+        self._sources[name] = algorithm
+        self._algorithms.pop(name, None)
+
+    def _load_entry_points(self):
+        """
+        Add the algorithms registered through entry points, without overriding algorithms with the same name.
+        """
+        if not self._entry_points_loaded:
+            self._entry_points_loaded = True
+            for entry_point in _iter_entry_points(self.entry_point_group):
+                self._sources.setdefault(entry_point.name, entry_point)
+
+    def _load(self, source):
+        """
+        Load an algorithm class.
+        :param source: algorithm class, its path as 'module:ClassName', or an entry point.
+        :return: algorithm class.
+        """
+        if isinstance(source, str):
+            module_name, class_name = source.split(':')
+            return getattr(import_module(module_name), class_name)
+        if hasattr(source, 'load'):
+            return source.load()
+        return source
+
+    def __getitem__(self, name):
+        if name not in self._algorithms:
+            if name not in self._sources:
+                self._load_entry_points()
+            self._algorithms[name] = self._load(self._sources[name])
+        return self._algorithms[name]
+
+    def __setitem__(self, name, algorithm):
+        self.register(name, algorithm)
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        del self._sources[name]
+        self._algorithms.pop(name, None)
+
+    def __contains__(self, name):
+        if name not in self._sources:
+            self._load_entry_points()
+        return name in self._sources
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        """
+        :return list: names of all the algorithms, including those registered through entry points.
+        """
+        self._load_entry_points()
+        return sorted(self._sources)
+
+    def get(self, name, default=None):
+        """
+        Get an algorithm class, as dict.get does.
+        :param str name: name of the algorithm.
+        :param default: value to return if no algorithm is registered with the name.
+        :return: algorithm class, or default.
+        """
+        return self[name] if name in self else default
+
+    def items(self):
+        """
+        :return list: (name, algorithm class) tuples of all the algorithms, which are all imported.
+        """
+        return [(name, self[name]) for name in self.keys()]
+
+    def values(self):
+        """
+        :return list: classes of all the algorithms, which are all imported.
+        """
+        return [self[name] for name in self.keys()]
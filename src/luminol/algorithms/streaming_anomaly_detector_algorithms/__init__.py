@@ -0,0 +1,55 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import math
+
+__all__ = ['bitmap_detector', 'derivative_detector', 'exp_avg_detector', 'default_detector',
+           'sign_test']
+
+
+class StreamingAnomalyDetectorAlgorithm(object):
+
+    """
+    Base Class for StreamingAnomalyDetector algorithm.
+    A streaming algorithm scores one data point at a time and only keeps the state it needs
+    to score the next data point, so the cost of a point does not depend on how many points came before.
+    """
+    def __init__(self, class_name):
+        """
+        Initializer
+        :param str class_name: extended class name.
+        """
+        self.class_name = class_name
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _update_stdev(self, value):
+        """
+        Add a value to the running standard deviation(Welford's algorithm).
+        :param float value: the value to add.
+        :return float: standard deviation of all the values added so far.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        return math.sqrt(self.m2 / self.count)
+
+    # Need to be extended.
+    def update(self, timestamp, value):
+        """
+        Add a data point and compute its anomaly score.
+        :param int timestamp: timestamp of the data point.
+        :param float value: value of the data point.
+        :return float: the anomaly score.
+        """
+        raise NotImplementedError
@@ -0,0 +1,20 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+from luminol.algorithms.registry import AlgorithmRegistry
+
+streaming_anomaly_detector_algorithms = AlgorithmRegistry('luminol.streaming_anomaly_detector_algorithms', {
+    'bitmap_detector': 'luminol.algorithms.streaming_anomaly_detector_algorithms.bitmap_detector:StreamingBitmapDetector',
+    'default_detector': 'luminol.algorithms.streaming_anomaly_detector_algorithms.default_detector:StreamingDefaultDetector',
+    'derivative_detector': 'luminol.algorithms.streaming_anomaly_detector_algorithms.derivative_detector:StreamingDerivativeDetector',
+    'exp_avg_detector': 'luminol.algorithms.streaming_anomaly_detector_algorithms.exp_avg_detector:StreamingExpAvgDetector',
+    'sign_test': 'luminol.algorithms.streaming_anomaly_detector_algorithms.sign_test:StreamingSignTest'
+})
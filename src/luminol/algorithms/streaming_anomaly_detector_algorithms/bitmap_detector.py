@@ -0,0 +1,150 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+from collections import deque
+
+import numpy
+
+from luminol import utils
+from luminol.algorithms.streaming_anomaly_detector_algorithms import StreamingAnomalyDetectorAlgorithm
+from luminol.constants import (DEFAULT_BITMAP_PRECISION,
+                               DEFAULT_BITMAP_CHUNK_SIZE,
+                               DEFAULT_STREAMING_BITMAP_WINDOW_SIZE)
+
+
+class StreamingBitmapDetector(StreamingAnomalyDetectorAlgorithm):
+
+    """
+    Streaming version of BitmapDetector.
+    The most recent future_window_size points form the future window and the lag_window_size points before them
+    form the lagging window. A data point's anomaly score is the distance between the chunk frequencies of the
+    two windows once it has been added, so it tells how different the latest points are from the points before.
+    Points are given a score of 0 until both windows are full.
+    Adding a point moves one chunk into and one chunk out of each window, so only the counts of these four chunks
+    are updated. The SAX representation of all points is only computed again when the value range changes.
+    """
+    def __init__(self, precision=None, lag_window_size=None, future_window_size=None, chunk_size=None,
+                 value_min=None, value_max=None):
+        """
+        Initializer
+        :param int precision: how many sections to categorize values.
+        :param int lag_window_size: lagging window size.
+        :param int future_window_size: future window size.
+        :param int chunk_size: chunk size.
+        :param float value_min: lower bound of the value sections, the minimal value in the windows by default.
+        :param float value_max: upper bound of the value sections, the maximal value in the windows by default.
+        """
+        super(StreamingBitmapDetector, self).__init__(self.__class__.__name__)
+        self.precision = precision if precision and precision > 0 else DEFAULT_BITMAP_PRECISION
+        self.chunk_size = chunk_size if chunk_size and chunk_size > 0 else DEFAULT_BITMAP_CHUNK_SIZE
+        self.lag_window_size = lag_window_size or DEFAULT_STREAMING_BITMAP_WINDOW_SIZE
+        self.future_window_size = future_window_size or DEFAULT_STREAMING_BITMAP_WINDOW_SIZE
+        self.value_min = value_min
+        self.value_max = value_max
+        self.window = deque(maxlen=self.lag_window_size + self.future_window_size)
+        self.point_count = 0
+        # (position, value) of the points which can still become the minimal or maximal value in the window.
+        self.min_candidates = deque()
+        self.max_candidates = deque()
+        # Value range the SAX representation of the window is computed for.
+        self.value_range = None
+        # Codes of all chunks in the window, as a ring buffer starting at the oldest chunk.
+        self.chunk_codes = []
+        self.oldest_chunk = 0
+        # Frequency of each chunk in the future window minus its frequency in the lagging window.
+        self.count_diffs = {}
+        self.score = 0
+
+    @staticmethod
+    def _add_candidate(candidates, position, value, is_replaced, window_size):
+        """
+        Add a point to the candidates for the minimal or maximal value in the window.
+        :param deque candidates: (position, value) of the candidates, the best candidate first.
+        :param int position: position of the point.
+        :param float value: value of the point.
+        :param function is_replaced: whether a candidate value can never be better than the point value.
+        :param int window_size: window size.
+        """
+        while candidates and is_replaced(candidates[-1][1], value):
+            candidates.pop()
+        candidates.append((position, value))
+        if candidates[0][0] <= position - window_size:
+            candidates.popleft()
+
+    def _change_count(self, code, delta):
+        """
+        Change the difference between the future and lagging window frequencies of a chunk, and the score with it.
+        :param int code: code of the chunk.
+        :param int delta: change of the difference.
+        """
+        count_diff = self.count_diffs.get(code, 0)
+        self.score += 2 * delta * count_diff + 1
+        self.count_diffs[code] = count_diff + delta
+
+    def _count_chunks(self):
+        """
+        Compute the SAX representation and the chunk frequencies of all points in the windows.
+        """
+        sax = utils.compute_sax(numpy.array(self.window, dtype=numpy.float64), self.precision, *self.value_range)
+        self.chunk_codes = utils.compute_sax_chunk_codes(sax, self.precision, self.chunk_size).tolist()
+        self.oldest_chunk = 0
+        self.count_diffs = {}
+        self.score = 0
+        lws = self.lag_window_size
+        for code in self.chunk_codes[0: max(lws - self.chunk_size + 1, 0)]:
+            self._change_count(code, -1)
+        for code in self.chunk_codes[lws: lws + max(self.future_window_size - self.chunk_size + 1, 0)]:
+            self._change_count(code, 1)
+
+    def _slide_chunks(self, value):
+        """
+        Update the chunk frequencies after a point has been added to full windows.
+        :param float value: value of the point.
+        """
+        codes = self.chunk_codes
+        oldest = self.oldest_chunk
+        chunk_number = len(codes)
+        symbol = int(utils.compute_sax([value], self.precision, *self.value_range)[0])
+        newest_code = codes[(oldest - 1) % chunk_number]
+        code = (newest_code % self.precision ** (self.chunk_size - 1)) * self.precision + symbol
+        lws = self.lag_window_size
+        if lws >= self.chunk_size:
+            self._change_count(codes[oldest], 1)
+            self._change_count(codes[(oldest + lws - self.chunk_size + 1) % chunk_number], -1)
+        if self.future_window_size >= self.chunk_size:
+            self._change_count(codes[(oldest + lws) % chunk_number], -1)
+            self._change_count(code, 1)
+        codes[oldest] = code
+        self.oldest_chunk = (oldest + 1) % chunk_number
+
+    def update(self, timestamp, value):
+        """
+        Add a data point and compute its anomaly score.
+        :param int timestamp: timestamp of the data point.
+        :param float value: value of the data point.
+        :return float: the anomaly score.
+        """
+        position = self.point_count
+        self.point_count += 1
+        self.window.append(value)
+        window_size = self.window.maxlen
+        self._add_candidate(self.min_candidates, position, value, lambda candidate, value: candidate >= value, window_size)
+        self._add_candidate(self.max_candidates, position, value, lambda candidate, value: candidate <= value, window_size)
+        if len(self.window) < window_size:
+            return 0.0
+        value_range = (self.min_candidates[0][1] if self.value_min is None else self.value_min,
+                       self.max_candidates[0][1] if self.value_max is None else self.value_max)
+        if value_range != self.value_range:
+            self.value_range = value_range
+            self._count_chunks()
+        elif self.chunk_codes:
+            self._slide_chunks(value)
+        return float(self.score)
@@ -0,0 +1,47 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+from luminol.algorithms.streaming_anomaly_detector_algorithms import StreamingAnomalyDetectorAlgorithm
+from luminol.algorithms.streaming_anomaly_detector_algorithms.exp_avg_detector import StreamingExpAvgDetector
+from luminol.algorithms.streaming_anomaly_detector_algorithms.derivative_detector import StreamingDerivativeDetector
+from luminol.constants import (DEFAULT_DETECTOR_EMA_WEIGHT,
+                               DEFAULT_DETECTOR_EMA_SIGNIFICANT)
+
+
+class StreamingDefaultDetector(StreamingAnomalyDetectorAlgorithm):
+
+    """
+    Streaming version of DefaultDetector.
+    Not configurable.
+    """
+    def __init__(self):
+        """
+        Initializer
+        """
+        super(StreamingDefaultDetector, self).__init__(self.__class__.__name__)
+        self.exp_avg_detector = StreamingExpAvgDetector()
+        self.derivative_detector = StreamingDerivativeDetector()
+
+    def update(self, timestamp, value):
+        """
+        Add a data point and compute its anomaly score using a weighted sum.
+        :param int timestamp: timestamp of the data point.
+        :param float value: value of the data point.
+        :return float: the anomaly score.
+        """
+        ema_score = self.exp_avg_detector.update(timestamp, value)
+        deri_score = self.derivative_detector.update(timestamp, value)
+        # Compute a weighted anomaly score.
+        anom_score = max(ema_score, ema_score * DEFAULT_DETECTOR_EMA_WEIGHT + deri_score * (1 - DEFAULT_DETECTOR_EMA_WEIGHT))
+        # If ema score is significant enough, take the bigger one of the weighted score and deri score.
+        if ema_score > DEFAULT_DETECTOR_EMA_SIGNIFICANT:
+            anom_score = max(anom_score, deri_score)
+        return anom_score
@@ -0,0 +1,55 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+from luminol.algorithms.streaming_anomaly_detector_algorithms import StreamingAnomalyDetectorAlgorithm
+from luminol.constants import DEFAULT_DERI_SMOOTHING_FACTOR
+
+
+class StreamingDerivativeDetector(StreamingAnomalyDetectorAlgorithm):
+
+    """
+    Streaming version of DerivativeDetector.
+    A data point's anomaly score is the deviation of its derivative from the exponential moving average of
+    the derivatives so far, divided by the standard deviation of all such deviations so far.
+    """
+    def __init__(self, smoothing_factor=None):
+        """
+        Initializer
+        :param float smoothing_factor: smoothing factor.
+        """
+        super(StreamingDerivativeDetector, self).__init__(self.__class__.__name__)
+        self.smoothing_factor = (smoothing_factor or DEFAULT_DERI_SMOOTHING_FACTOR)
+        self.pre_timestamp = None
+        self.pre_value = None
+        self.derivatives_ema = None
+
+    def update(self, timestamp, value):
+        """
+        Add a data point and compute its anomaly score.
+        The first data point has no derivative and is given a score of 0.
+        :param int timestamp: timestamp of the data point.
+        :param float value: value of the data point.
+        :return float: the anomaly score.
+        """
+        pre_timestamp, pre_value = self.pre_timestamp, self.pre_value
+        self.pre_timestamp, self.pre_value = timestamp, value
+        if pre_timestamp is None:
+            self._update_stdev(0.0)
+            return 0.0
+        td = timestamp - pre_timestamp
+        derivative = abs((value - pre_value) / td if td != 0 else value - pre_value)
+        if self.derivatives_ema is None:
+            self.derivatives_ema = derivative
+        else:
+            self.derivatives_ema = self.smoothing_factor * derivative + (1 - self.smoothing_factor) * self.derivatives_ema
+        anom_score = abs(derivative - self.derivatives_ema)
+        stdev = self._update_stdev(anom_score)
+        return anom_score / stdev if stdev else anom_score
@@ -0,0 +1,44 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+from luminol.algorithms.streaming_anomaly_detector_algorithms import StreamingAnomalyDetectorAlgorithm
+from luminol.constants import DEFAULT_EMA_SMOOTHING_FACTOR
+
+
+class StreamingExpAvgDetector(StreamingAnomalyDetectorAlgorithm):
+
+    """
+    Streaming version of ExpAvgDetector.
+    A data point's anomaly score is its deviation from the exponential moving average of all the points so far,
+    divided by the standard deviation of all the points so far.
+    """
+    def __init__(self, smoothing_factor=0):
+        """
+        Initializer
+        :param float smoothing_factor: smoothing factor for computing exponential moving average.
+        """
+        super(StreamingExpAvgDetector, self).__init__(self.__class__.__name__)
+        self.smoothing_factor = smoothing_factor if smoothing_factor > 0 else DEFAULT_EMA_SMOOTHING_FACTOR
+        self.ema = None
+
+    def update(self, timestamp, value):
+        """
+        Add a data point and compute its anomaly score.
+        :param int timestamp: timestamp of the data point.
+        :param float value: value of the data point.
+        :return float: the anomaly score.
+        """
+        if self.ema is None:
+            self.ema = value
+        else:
+            self.ema = self.smoothing_factor * value + (1 - self.smoothing_factor) * self.ema
+        stdev = self._update_stdev(value)
+        return abs((value - self.ema) / stdev) if stdev else value - self.ema
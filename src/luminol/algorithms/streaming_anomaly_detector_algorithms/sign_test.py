@@ -0,0 +1,81 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+from collections import deque
+
+from luminol import exceptions
+from luminol.algorithms.streaming_anomaly_detector_algorithms import StreamingAnomalyDetectorAlgorithm
+from luminol.utils import get_sign_test_table
+
+
+class StreamingSignTest(StreamingAnomalyDetectorAlgorithm):
+
+    """
+    Streaming version of SignTest.
+    Each data point comes with the baseline value it is compared to. A running count keeps how many of the latest
+    scan_window points exceed their baseline. When the count is significant, the latest point's anomaly score is
+    100 times the binomial cdf of the count, looked up in a table computed once for (scan_window, confidence).
+    Unlike SignTest, points before the latest one are not scored again, and scores are 0 until scan_window points came.
+    """
+    def __init__(self, percent_threshold_upper=None, percent_threshold_lower=None, offset=0.0, scan_window=None, confidence=0.01):
+        """
+        Initializer
+        :param percent_threshold_upper: If a value is larger than its baseline by this percent, then its
+        a candidate for an anomaly
+        :param percent_threshold_lower: If a value is smaller than its baseline by this percent, then its
+        a candidate for an anomaly. Percent_threshold_lower should be a negative number to work as intended.
+        :param offset: baseline will be adjusted by this amount prior to computing percentage
+        :param scan_window: number of data points to evaluate for anomalies
+        :param confidence: Confidence to use for determining anomaly, default is 0.01
+        """
+        super(StreamingSignTest, self).__init__(self.__class__.__name__)
+
+        if percent_threshold_upper is None and percent_threshold_lower is None:
+            raise exceptions.RequiredParametersNotPassed('luminol.algorithms.streaming_anomaly_detector_algorithms.sign_test: \
+                    Either percent_threshold_upper or percent_threshold_lower is needed')
+
+        if percent_threshold_upper is not None and percent_threshold_lower is not None:
+            raise exceptions.RequiredParametersNotPassed('luminol.algorithms.streaming_anomaly_detector_algorithms.sign_test: \
+                    Cannot specify both percent_threshold_upper and percent_threshold_lower')
+
+        if not scan_window:
+            raise exceptions.RequiredParametersNotPassed('luminol.algorithms.streaming_anomaly_detector_algorithms.sign_test: \
+                    scan window size needs to be specified')
+
+        self.scan_window = scan_window
+        percent_threshold = percent_threshold_upper if percent_threshold_upper is not None else percent_threshold_lower
+        self.alpha = float(percent_threshold) / 100
+        # if we are detecting lower threshold we mirror the data
+        self.scale = 1 if percent_threshold_upper is not None else -1
+        self.offset = self.scale * offset
+        self.threshold, self.cdf = get_sign_test_table(scan_window, confidence)
+        self.exceedances = deque(maxlen=scan_window)
+        self.exceedance_count = 0
+
+    def update(self, timestamp, value, baseline_value=None):
+        """
+        Add a data point and compute its anomaly score.
+        :param int timestamp: timestamp of the data point.
+        :param float value: value of the data point.
+        :param float baseline_value: baseline value at the timestamp.
+        :return float: the anomaly score.
+        """
+        if baseline_value is None:
+            raise exceptions.RequiredParametersNotPassed('luminol.algorithms.streaming_anomaly_detector_algorithms.sign_test: \
+                    baseline value needs to be specified')
+        exceedance = int(self.scale * value - self.offset - (1. + self.alpha) * self.scale * baseline_value > 0)
+        if len(self.exceedances) == self.scan_window:
+            self.exceedance_count -= self.exceedances[0]
+        self.exceedances.append(exceedance)
+        self.exceedance_count += exceedance
+        if len(self.exceedances) == self.scan_window and self.exceedance_count > self.threshold:
+            return 100 * self.cdf[self.exceedance_count].item()
+        return 0.0
@@ -15,6 +15,11 @@ API for Anomaly Detector Module
 This module detects anomalies in a single time series.
 """
 
+import ctypes
+import multiprocessing
+
+import numpy
+
 from luminol import exceptions, utils
 from luminol.algorithms.anomaly_detector_algorithms.all import anomaly_detector_algorithms
 from luminol.modules.anomaly import Anomaly
@@ -28,12 +33,12 @@ class AnomalyDetector(object):
 
     def __init__(self, time_series, baseline_time_series=None, score_only=False, score_threshold=None,
                  score_percent_threshold=None, algorithm_name=None, algorithm_params=None, refine_algorithm_name=None,
-                 refine_algorithm_params=None, algorithm_class=None):
+                 refine_algorithm_params=None, algorithm_class=None, score_cache=None):
         """
         Initializer
         :param time_series: a TimeSeries, a dictionary or a path to a csv file(str).
         :param baseline_time_series: a TimeSeries, a dictionary or a path to a csv file(str).
-        :param bool score_only: if asserted, only anomaly scores are computed.
+        :param bool score_only: if asserted, only anomaly scores are computed, and anomalies are never looked for.
         :param float score_percent_threshold: percent threshold on anomaly score above which is considered an anomaly.
         :param str algorithm_name: name of the algorithm to use(file name).
         :param dict algorithm_params: additional params for the specific algorithm.
@@ -41,6 +46,7 @@ class AnomalyDetector(object):
         :param dict refine_algorithm_params: additional params for the specific refine algorithm.
         :param AnomalyDetectorAlgorithm algorithm_class: A AnomalyDetectorAlgorithm class that when passed to luminol will
             be used to assign anomaly scores. This is useful when luminol user wants to use a custom algorithm.
+        :param ScoreCache score_cache: if passed, anomaly scores are looked up in and added to this cache.
         """
 
         self.time_series = self._load(time_series)
@@ -59,10 +65,16 @@ class AnomalyDetector(object):
         self.algorithm_params.update(algorithm_params)
         self.refine_algorithm_params = refine_algorithm_params or {}
 
-        # Detect anomalies.
-        self._detect(score_only)
+        # Scores, anomaly intervals and anomalies are computed when they are first asked for.
+        self.score_only = score_only
+        self.score_cache = score_cache
+        self.anom_scores = None
+        self.anomaly_intervals = None
+        self.anomalies = None
+        self._prepare_algorithm()
 
-    def _load(self, time_series):
+    @staticmethod
+    def _load(time_series):
         """
         Load time series.
         :param time_series: a TimeSeries, a dictionary or a path to a csv file(str).
@@ -74,7 +86,7 @@ class AnomalyDetector(object):
             return time_series
         if isinstance(time_series, dict):
             return TimeSeries(time_series)
-        return TimeSeries(utils.read_csv(time_series))
+        return TimeSeries.from_arrays(*utils.read_csv_arrays(time_series))
 
     def _get_algorithm(self, algorithm_name):
         """
@@ -88,72 +100,244 @@ class AnomalyDetector(object):
         except KeyError:
             raise exceptions.AlgorithmNotFound('luminol.AnomalyDetector: ' + str(algorithm_name) + ' not found.')
 
-    def _detect(self, score_only):
+    def _prepare_algorithm(self):
         """
-        Detect anomaly periods.
-        :param bool score_only: if true, only anomaly scores are computed.
+        Initialize the algorithm, which checks its parameters.
+        Fall back to the default detector if the time series does not have enough data points for the algorithm.
         """
         try:
-            algorithm = self.algorithm(**self.algorithm_params)
-            self.anom_scores = algorithm.run()
+            self.algorithm_instance = self.algorithm(**self.algorithm_params)
         except exceptions.NotEnoughDataPoints:
-            algorithm = anomaly_detector_algorithms['default_detector'](self.time_series)
-            self.threshold = self.threshold or ANOMALY_THRESHOLD['default_detector']
-            self.anom_scores = algorithm.run()
-        if not score_only:
-            self._detect_anomalies()
+            self._use_default_detector()
 
-    def _detect_anomalies(self):
+    def _use_default_detector(self):
+        """
+        Use the default detector instead of the algorithm.
+        """
+        self.algorithm_instance = anomaly_detector_algorithms['default_detector'](self.time_series)
+        self.threshold = self.threshold or ANOMALY_THRESHOLD['default_detector']
+
+    def _detect_scores(self):
+        """
+        Compute anomaly scores, or get them from the score cache.
+        """
+        if self.score_cache is not None:
+            key = self.score_cache.make_key(self.time_series, self.baseline_time_series, self.algorithm, self.algorithm_params)
+            # Scores of the default detector used instead of the algorithm are cached under their own key,
+            # so that a cache hit falls back to the default detector's threshold as well.
+            default_detector_key = key + ('default_detector',)
+            self.anom_scores = self.score_cache.get(key)
+            if self.anom_scores is not None:
+                return
+            self.anom_scores = self.score_cache.get(default_detector_key)
+            if self.anom_scores is not None:
+                self._use_default_detector()
+                return
+        try:
+            self.anom_scores = self.algorithm_instance.run()
+        except exceptions.NotEnoughDataPoints:
+            self._use_default_detector()
+            self.anom_scores = self.algorithm_instance.run()
+            if self.score_cache is not None:
+                key = default_detector_key
+        if self.score_cache is not None:
+            self.score_cache.put(key, self.anom_scores)
+
+    def _detect_anomaly_intervals(self):
         """
-        Detect anomalies using a threshold on anomaly scores.
+        Detect anomaly intervals using a threshold on anomaly scores.
+        Intervals are also kept as positions in the anomaly scores.
         """
-        anom_scores = self.anom_scores
+        anom_scores = self.get_all_scores()
+        timestamps = anom_scores.timestamps_array
+        values = anom_scores.values_array
         max_anom_score = anom_scores.max()
-        anomalies = []
+        self.interval_positions = []
 
-        if max_anom_score:
+        if max_anom_score and not self.score_only:
             threshold = self.threshold or max_anom_score * self.score_percent_threshold
-            # Find all the anomaly intervals.
-            intervals = []
-            start, end = None, None
-            for timestamp, value in anom_scores.iteritems():
-                if value > threshold:
-                    end = timestamp
-                    if not start:
-                        start = timestamp
-                elif start and end is not None:
-                    intervals.append([start, end])
-                    start = None
-                    end = None
-            if start is not None:
-                intervals.append([start, end])
-
-            # Locate the exact anomaly point within each anomaly interval.
-            for interval_start, interval_end in intervals:
-                interval_series = anom_scores.crop(interval_start, interval_end)
-
-                self.refine_algorithm_params['time_series'] = interval_series
-                refine_algorithm = self.refine_algorithm(**self.refine_algorithm_params)
-                scores = refine_algorithm.run()
-                max_refine_score = scores.max()
-
-                # Get the timestamp of the maximal score.
-                max_refine_timestamp = scores.timestamps[scores.values.index(max_refine_score)]
-                anomaly = Anomaly(interval_start, interval_end, interval_series.max(), max_refine_timestamp)
-                anomalies.append(anomaly)
+            # Find all the anomaly intervals, as the positions where the scores cross the threshold.
+            edges = numpy.diff(numpy.concatenate(([0], (values > threshold).view(numpy.int8), [0])))
+            self.interval_positions = list(zip(numpy.flatnonzero(edges == 1).tolist(), numpy.flatnonzero(edges == -1).tolist()))
+        self.anomaly_intervals = [(timestamps[start].item(), timestamps[end - 1].item(), values[start:end].max().item())
+                                  for start, end in self.interval_positions]
+
+    def _detect_anomalies(self):
+        """
+        Build anomalies from the anomaly intervals, locating the exact anomaly point within each interval.
+        """
+        anom_scores = self.get_all_scores()
+        timestamps = anom_scores.timestamps_array
+        values = anom_scores.values_array
+        anomalies = []
+
+        for (start_timestamp, end_timestamp, anomaly_score), (start, end) in zip(self.get_anomaly_intervals(), self.interval_positions):
+            interval_series = TimeSeries.from_arrays(timestamps[start:end], values[start:end])
+
+            self.refine_algorithm_params['time_series'] = interval_series
+            refine_algorithm = self.refine_algorithm(**self.refine_algorithm_params)
+            scores = refine_algorithm.run()
+
+            # Get the timestamp of the maximal score.
+            max_refine_timestamp = scores.timestamps_array[numpy.argmax(scores.values_array)].item()
+            anomalies.append(Anomaly(start_timestamp, end_timestamp, anomaly_score, max_refine_timestamp))
 
         self.anomalies = anomalies
 
     def get_anomalies(self):
         """
         Get anomalies.
+        They are detected on the first call, which computes anomaly scores too if needed.
         :return list: a list of Anomaly objects.
         """
-        return getattr(self, 'anomalies', [])
+        if self.anomalies is None:
+            self._detect_anomalies()
+        return self.anomalies
+
+    def get_anomaly_intervals(self):
+        """
+        Get anomaly intervals, without locating the exact anomaly point within them.
+        They are detected on the first call, which computes anomaly scores too if needed.
+        :return list: a list of (start timestamp, end timestamp, anomaly score) tuples.
+        """
+        if self.anomaly_intervals is None:
+            self._detect_anomaly_intervals()
+        return self.anomaly_intervals
 
     def get_all_scores(self):
         """
         Get anomaly scores.
+        They are computed on the first call.
         :return: a TimeSeries object represents anomaly scores.
         """
-        return getattr(self, 'anom_scores', None)
+        if self.anom_scores is None:
+            self._detect_scores()
+        return self.anom_scores
+
+
+def detect_many(series_mapping, workers=None, chunk_size=None, **detector_params):
+    """
+    Detect anomalies in many time series, spread over a pool of worker processes.
+    The time series are copied once into shared memory arrays which the workers read without copying,
+    and the anomaly scores are written back into another shared memory array.
+    Each time series falls back to the default detector on its own if it does not have enough data points.
+    A time series which cannot be loaded or scored does not stop the others, the exception is returned for it instead.
+    :param dict series_mapping: metric name -> a TimeSeries, a dictionary or a path to a csv file(str).
+    :param int workers: number of worker processes, the number of cpus by default.
+        With a single worker, detection runs in the current process.
+    :param int chunk_size: number of time series sent to a worker at once.
+    :param detector_params: additional params for AnomalyDetector, such as algorithm_name or score_only.
+    :return tuple: (dict of metric name -> anomaly scores TimeSeries, dict of metric name -> a list of Anomaly objects,
+        dict of metric name -> the exception raised for the time series)
+    """
+    all_scores, all_anomalies, errors = {}, {}, {}
+    names = []
+    series = []
+    for name in series_mapping:
+        try:
+            time_series = AnomalyDetector._load(series_mapping[name])
+        except Exception as e:
+            errors[name] = e
+            continue
+        names.append(name)
+        series.append(time_series)
+    offsets = numpy.cumsum([0] + [len(time_series) if time_series else 0 for time_series in series])
+
+    # Shared arrays can not be empty.
+    size = max(int(offsets[-1]), 1)
+    shared_arrays = (multiprocessing.RawArray(ctypes.c_int64, size),
+                     multiprocessing.RawArray(ctypes.c_double, size),
+                     multiprocessing.RawArray(ctypes.c_double, size))
+    timestamps, values, scores = _get_shared_views(shared_arrays)
+    for i, time_series in enumerate(series):
+        if time_series:
+            timestamps[offsets[i]: offsets[i + 1]] = time_series.timestamps_array
+            values[offsets[i]: offsets[i + 1]] = time_series.values_array
+
+    workers = workers or multiprocessing.cpu_count()
+    chunk_size = chunk_size or max(1, len(names) // (workers * 4))
+    tasks = [(name, int(offsets[i]), int(offsets[i + 1])) for i, name in enumerate(names)]
+    chunks = [(tasks[i: i + chunk_size], detector_params) for i in range(0, len(tasks), chunk_size)]
+    if workers == 1:
+        results = [_detect_chunk(shared_arrays, chunk) for chunk in chunks]
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_detect_worker, initargs=(shared_arrays,))
+        try:
+            results = pool.map(_detect_chunk_in_worker, chunks)
+        finally:
+            pool.close()
+            pool.join()
+
+    for name, start, end, anomalies, unaligned_scores, error in (result for chunk in results for result in chunk):
+        if error is not None:
+            errors[name] = error
+            continue
+        # Scores are copied out of the shared arrays, so that they do not keep the shared memory alive.
+        if unaligned_scores is None:
+            all_scores[name] = TimeSeries.from_arrays(timestamps[start:end].copy(), scores[start:end].copy())
+        else:
+            all_scores[name] = TimeSeries.from_arrays(unaligned_scores.timestamps_array.copy(),
+                                                      unaligned_scores.values_array.copy())
+        all_anomalies[name] = anomalies
+    return all_scores, all_anomalies, errors
+
+
+def _get_shared_views(shared_arrays):
+    """
+    Get numpy views on the shared timestamps, values and scores arrays.
+    :param tuple shared_arrays: the shared timestamps, values and scores arrays.
+    :return tuple: numpy arrays using the shared memory.
+    """
+    timestamps, values, scores = shared_arrays
+    return (numpy.frombuffer(timestamps, dtype=numpy.int64), numpy.frombuffer(values, dtype=numpy.float64),
+            numpy.frombuffer(scores, dtype=numpy.float64))
+
+
+# Shared arrays of detect_many, set in each worker process.
+_worker_shared_arrays = None
+
+
+def _init_detect_worker(shared_arrays):
+    """
+    Keep the shared arrays in a worker process of detect_many.
+    :param tuple shared_arrays: the shared timestamps, values and scores arrays.
+    """
+    global _worker_shared_arrays
+    _worker_shared_arrays = shared_arrays
+
+
+def _detect_chunk_in_worker(chunk):
+    """
+    Detect anomalies for a chunk of time series in a worker process of detect_many.
+    :param tuple chunk: a list of (metric name, start offset, end offset) and AnomalyDetector params.
+    :return list: a list of results.
+    """
+    return _detect_chunk(_worker_shared_arrays, chunk)
+
+
+def _detect_chunk(shared_arrays, chunk):
+    """
+    Detect anomalies for a chunk of time series stored in the shared arrays.
+    Anomaly scores are written into the shared scores array when they are aligned with the time series,
+    otherwise they are returned as a TimeSeries.
+    :param tuple shared_arrays: the shared timestamps, values and scores arrays.
+    :param tuple chunk: a list of (metric name, start offset, end offset) and AnomalyDetector params.
+    :return list: a list of (metric name, start offset, end offset, anomalies, unaligned scores or None,
+        the exception raised or None).
+    """
+    timestamps, values, scores = _get_shared_views(shared_arrays)
+    tasks, detector_params = chunk
+    results = []
+    for name, start, end in tasks:
+        try:
+            detector = AnomalyDetector(TimeSeries.from_arrays(timestamps[start:end], values[start:end]), **detector_params)
+            anom_scores = detector.get_all_scores()
+            anomalies = detector.get_anomalies()
+        except Exception as e:
+            results.append((name, start, end, None, None, e))
+            continue
+        if numpy.array_equal(anom_scores.timestamps_array, timestamps[start:end]):
+            scores[start:end] = anom_scores.values_array
+            anom_scores = None
+        results.append((name, start, end, anomalies, anom_scores, None))
+    return results
@@ -41,6 +41,9 @@ DEFAULT_BITMAP_CHUNK_SIZE = 2
 
 DEFAULT_BITMAP_PRECISION = 4
 
+# Window size for the streaming BitmapDetector, since the length of a stream is not known in advance.
+DEFAULT_STREAMING_BITMAP_WINDOW_SIZE = DEFAULT_BITMAP_MAXIMAL_POINTS_IN_WINDOWS
+
 # Constants for ExpAvgDetector.
 DEFAULT_EMA_SMOOTHING_FACTOR = 0.2
 
@@ -79,6 +82,35 @@ DEFAULT_CORRELATE_THRESHOLD = 0.7
 # The impact of shift on shifted correlation coefficient.
 DEFAULT_SHIFT_IMPACT = 0.05
 
+# The number of data points CorrelationMatrix correlates at once, summed over all candidates in a block.
+# It bounds the memory used by FFT.
+DEFAULT_CORRELATION_MATRIX_BLOCK_SIZE = 2 ** 22
+
+# The maximal number of points of the sketches CorrelationMatrix prunes candidates on when only the top results are kept.
+DEFAULT_CORRELATION_SKETCH_SIZE = 256
+
+# The number of candidates CorrelationMatrix fully correlates for each top result kept.
+DEFAULT_CORRELATION_PRUNE_FACTOR = 10
+
+# How many symbols CorrelationIndex categorizes normalized bucket means into for its SAX words.
+DEFAULT_CORRELATION_INDEX_PRECISION = 4
+
+# The number of buckets in each SAX word of CorrelationIndex.
+DEFAULT_CORRELATION_INDEX_WORD_SIZE = 4
+
+# The share of spare rows and buckets a saved CorrelationIndex keeps, so that a loaded index can grow into them in place.
+DEFAULT_CORRELATION_INDEX_SPARE_CAPACITY = 0.5
+
+# The maximal number of prefix sums of lagged products WindowedCorrelator keeps, summed over all shift steps.
+DEFAULT_WINDOWED_CORRELATION_PREFIX_SIZE = 2 ** 22
+
+# The minimal variance of a time window, relative to the variance of all the values times the number of values per
+# window value, for WindowedCorrelator to correlate it on prefix sums. Windows varying less are correlated on their values.
+DEFAULT_WINDOWED_CORRELATION_MIN_VARIANCE = 1e-6
+
+# Maximal memory in bytes used by the anomaly scores kept in a ScoreCache.
+DEFAULT_SCORE_CACHE_MAX_BYTES = 2 ** 28
+
 TIMESTAMP_STR_FORMATS = [
     '%Y%m%d_%H:%M:%S',
     '%Y-%m-%d %H:%M:%S.%f',
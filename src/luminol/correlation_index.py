@@ -0,0 +1,421 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+"""
+API for CorrelationIndex Module
+This module keeps compact sketches of many time series to find the ones most similar to a time series quickly.
+"""
+
+import json
+import math
+import os
+
+import numpy
+
+from luminol import exceptions, utils
+from luminol.constants import (DEFAULT_CORRELATION_INDEX_PRECISION,
+                               DEFAULT_CORRELATION_INDEX_SPARE_CAPACITY,
+                               DEFAULT_CORRELATION_INDEX_WORD_SIZE,
+                               DEFAULT_CORRELATION_MATRIX_BLOCK_SIZE,
+                               DEFAULT_CORRELATION_PRUNE_FACTOR)
+from luminol.modules.time_series import TimeSeries
+
+# os.replace does not exist in python 2, where os.rename replaces files the same way on POSIX systems.
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _masked_correlations(target, values, mask):
+    """
+    Compute the correlation coefficient of target with every row of values, only over the positions in mask.
+    :param numpy.ndarray target: the target values.
+    :param numpy.ndarray values: a 2-D array with one time series per row, as long as target.
+    :param numpy.ndarray mask: a boolean array, either as long as target or with the shape of values.
+    :return numpy.ndarray: one coefficient per row, 0 where a row or the target is flat.
+    """
+    mask = numpy.broadcast_to(mask, values.shape)
+    # Flat rows can keep rounding errors of their mean, so they are found by comparing their extremes instead.
+    flat = ((numpy.where(mask, values, numpy.inf).min(axis=1) == numpy.where(mask, values, -numpy.inf).max(axis=1)) |
+            (numpy.where(mask, target, numpy.inf).min(axis=1) == numpy.where(mask, target, -numpy.inf).max(axis=1)))
+    mask = mask.astype(numpy.float64)
+    counts = mask.sum(axis=1)
+    safe_counts = numpy.maximum(counts, 1)[:, numpy.newaxis]
+    # Values are centered on their mean over the mask before being multiplied, so that large offsets do not cancel out.
+    target = target * mask
+    target = (target - target.sum(axis=1)[:, numpy.newaxis] / safe_counts) * mask
+    values = values * mask
+    values = (values - values.sum(axis=1)[:, numpy.newaxis] / safe_counts) * mask
+    covariances = (target * values).sum(axis=1)
+    denominators = numpy.sqrt((target * target).sum(axis=1) * (values * values).sum(axis=1))
+    valid = (counts >= 2) & (denominators > 0) & ~flat
+    return numpy.where(valid, covariances / numpy.where(valid, denominators, 1), 0)
+
+
+def _get_breakpoints(precision):
+    """
+    Get the SAX breakpoints of normalized values, which cut the standard normal distribution into equally likely sections.
+    :param int precision: the number of sections.
+    :return numpy.ndarray: the precision - 1 breakpoints.
+    """
+    # scipy is only imported once an index is created, it is slow to import.
+    from scipy.stats import norm
+    return norm.ppf(numpy.arange(1, precision) / float(precision))
+
+
+class CorrelationIndex(object):
+
+    def __init__(self, bucket_size, precision=DEFAULT_CORRELATION_INDEX_PRECISION, word_size=DEFAULT_CORRELATION_INDEX_WORD_SIZE):
+        """
+        Initializer
+        Every time series is kept as a sketch: the mean and the number of its points within each bucket of
+        bucket_size timestamps(PAA, Piecewise Aggregate Approximation). Buckets are grouped into segments of word_size
+        buckets, and the bucket means of each segment are normalized and turned into a SAX word. An inverted index
+        maps every word of every segment to the time series having it, so that similar time series are found
+        without going through all of them.
+        :param int bucket_size: the time span of a bucket, in the unit of the timestamps.
+        :param int precision: how many symbols to categorize normalized bucket means into.
+        :param int word_size: the number of buckets in a SAX word.
+        """
+        if not bucket_size or bucket_size <= 0:
+            raise exceptions.InvalidDataFormat('luminol.CorrelationIndex: bucket_size has to be a positive number.')
+        if precision < 2 or word_size < 1 or precision ** word_size > numpy.iinfo(numpy.int32).max:
+            raise exceptions.InvalidDataFormat('luminol.CorrelationIndex: precision ** word_size has to fit in int32, '
+                                               'with a precision of at least 2.')
+        self.bucket_size = bucket_size
+        self.precision = precision
+        self.word_size = word_size
+        self.breakpoints = _get_breakpoints(precision)
+        self.names = []
+        self.rows = {}
+        # Absolute number of the first bucket, a multiple of word_size so that segments do not move.
+        self.first_bucket = None
+        self.bucket_count = 0
+        self._allocate(0, 0, 0)
+        # (absolute segment number, word) -> set of rows, built from the words when first needed after loading.
+        self.postings = {}
+
+    @staticmethod
+    def _load(time_series):
+        """
+        Load time series into a TimeSeries object.
+        :param timeseries: a TimeSeries, a dictionary or a path to a csv file(str).
+        :return TimeSeries: a TimeSeries object.
+        """
+        if isinstance(time_series, TimeSeries):
+            return time_series
+        if isinstance(time_series, dict):
+            return TimeSeries(time_series)
+        return TimeSeries.from_arrays(*utils.read_csv_arrays(time_series))
+
+    def _allocate(self, row_capacity, bucket_capacity, bucket_offset):
+        """
+        Move the sketches into arrays with new capacities.
+        :param int row_capacity: the number of time series the arrays can hold.
+        :param int bucket_capacity: the number of buckets the arrays can hold, a multiple of word_size.
+        :param int bucket_offset: the number of buckets added before the first bucket, a multiple of word_size.
+        """
+        means = numpy.zeros((row_capacity, bucket_capacity), dtype=numpy.float32)
+        counts = numpy.zeros((row_capacity, bucket_capacity), dtype=numpy.uint32)
+        words = numpy.full((row_capacity, bucket_capacity // self.word_size), -1, dtype=numpy.int32)
+        rows = len(self.names)
+        if rows and self.bucket_count:
+            columns = slice(bucket_offset, bucket_offset + self.bucket_count)
+            means[:rows, columns] = self.means[:rows, :self.bucket_count]
+            counts[:rows, columns] = self.counts[:rows, :self.bucket_count]
+            segments = self._segment_count()
+            segment_offset = bucket_offset // self.word_size
+            words[:rows, segment_offset:segment_offset + segments] = self.words[:rows, :segments]
+        self.means, self.counts, self.words = means, counts, words
+
+    def _segment_count(self):
+        """
+        Get the number of segments covering the buckets.
+        :return int: the number of segments.
+        """
+        return -(-self.bucket_count // self.word_size)
+
+    def _reserve(self, first_bucket, last_bucket):
+        """
+        Make room for the buckets from first_bucket to last_bucket.
+        Capacity is doubled when more buckets are needed at the end, so that adding new points stays cheap.
+        :param int first_bucket: absolute number of the first bucket needed.
+        :param int last_bucket: absolute number of the last bucket needed.
+        """
+        word_size = self.word_size
+        if self.first_bucket is None:
+            self.first_bucket = first_bucket - first_bucket % word_size
+        bucket_offset = -(-max(self.first_bucket - first_bucket, 0) // word_size) * word_size
+        first_bucket = self.first_bucket - bucket_offset
+        bucket_count = max(self.bucket_count + bucket_offset, last_bucket - first_bucket + 1)
+        bucket_capacity = self.means.shape[1]
+        # Loaded arrays are only as wide as the buckets, which may not fill their last segment.
+        if bucket_offset or bucket_count > bucket_capacity or bucket_capacity % word_size:
+            bucket_capacity = max(bucket_count, 2 * bucket_capacity)
+            self._allocate(self.means.shape[0], -(-bucket_capacity // word_size) * word_size, bucket_offset)
+        self.first_bucket = first_bucket
+        self.bucket_count = bucket_count
+
+    def _get_row(self, name):
+        """
+        Get the row of a time series, adding a row if it is not in the index yet.
+        :param str name: name of the time series.
+        :return int: the row.
+        """
+        if name not in self.rows:
+            if len(self.names) == self.means.shape[0]:
+                bucket_capacity = -(-self.means.shape[1] // self.word_size) * self.word_size
+                self._allocate(max(1, 2 * len(self.names)), bucket_capacity, 0)
+            self.rows[name] = len(self.names)
+            self.names.append(name)
+        return self.rows[name]
+
+    def _compute_words(self, means, filled):
+        """
+        Compute the SAX words of segments.
+        The bucket means of a segment are normalized to a zero mean and a unit standard deviation, and each of them is
+        represented by the section of the standard normal distribution it falls into. Empty buckets take the mean.
+        :param numpy.ndarray means: a 2-D array with the bucket means of one segment per row.
+        :param numpy.ndarray filled: whether each bucket has points.
+        :return numpy.ndarray: the words, read as base-precision numbers, or -1 for segments with less than two
+            filled buckets or flat segments.
+        """
+        counts = filled.sum(axis=1)
+        safe_counts = numpy.maximum(counts, 1)
+        segment_means = numpy.where(filled, means, 0).sum(axis=1) / safe_counts
+        centered = numpy.where(filled, means - segment_means[:, numpy.newaxis], 0)
+        stdevs = numpy.sqrt((centered * centered).sum(axis=1) / safe_counts)
+        # Bucket means are kept as float32, differences below its precision are rounding errors.
+        valid = (counts >= 2) & (stdevs > 1e-6 * numpy.abs(segment_means)) & (stdevs > 0)
+        symbols = numpy.searchsorted(self.breakpoints, centered / numpy.where(valid, stdevs, 1)[:, numpy.newaxis])
+        words = numpy.zeros(len(means), dtype=numpy.int64)
+        for column in range(self.word_size):
+            words = words * self.precision + symbols[:, column]
+        return numpy.where(valid, words, -1).astype(numpy.int32)
+
+    def _update_words(self, row, start, end):
+        """
+        Compute again the words of the segments of a time series covering some buckets, and update the inverted index.
+        :param int row: the row of the time series.
+        :param int start: the first bucket changed.
+        :param int end: the bucket after the last bucket changed.
+        """
+        word_size = self.word_size
+        first_segment = start // word_size
+        end_segment = -(-end // word_size)
+        columns = slice(first_segment * word_size, end_segment * word_size)
+        means = self.means[row, columns].astype(numpy.float64).reshape(-1, word_size)
+        filled = (self.counts[row, columns] > 0).reshape(-1, word_size)
+        words = self._compute_words(means, filled)
+        old_words = self.words[row, first_segment:end_segment].tolist()
+        self.words[row, first_segment:end_segment] = words
+        if self.postings is None:
+            return
+        segment_number = self.first_bucket // word_size + first_segment
+        for segment, old_word, word in zip(range(segment_number, segment_number + len(words)), old_words, words.tolist()):
+            if old_word == word:
+                continue
+            if old_word >= 0:
+                rows = self.postings[segment, old_word]
+                rows.discard(row)
+                if not rows:
+                    del self.postings[segment, old_word]
+            if word >= 0:
+                self.postings.setdefault((segment, word), set()).add(row)
+
+    def _get_postings(self):
+        """
+        Get the inverted index, building it from the words after the index was loaded.
+        :return dict: (absolute segment number, word) -> set of rows.
+        """
+        if self.postings is None:
+            rows, segments = numpy.nonzero(self.words[:len(self.names), :self._segment_count()] >= 0)
+            keys = (segments.astype(numpy.int64) + self.first_bucket // self.word_size) * self.precision ** self.word_size
+            keys += self.words[rows, segments]
+            order = numpy.argsort(keys, kind='stable')
+            keys, rows = keys[order], rows[order]
+            bounds = numpy.flatnonzero(numpy.diff(keys)) + 1
+            self.postings = {}
+            for key, key_rows in zip(keys[numpy.append(0, bounds)].tolist() if len(keys) else [], numpy.split(rows, bounds)):
+                self.postings[divmod(key, self.precision ** self.word_size)] = set(key_rows.tolist())
+        return self.postings
+
+    def add(self, name, time_series):
+        """
+        Add the points of a time series to the index, creating its sketch if it is not in the index yet.
+        Points are merged into the bucket means, so new points can be added as they arrive, but each point should only
+        be added once. Only the words of the segments the points fall into are computed again.
+        :param str name: name of the time series.
+        :param time_series: a TimeSeries, a dictionary or a path to a csv file(str).
+        """
+        time_series = self._load(time_series)
+        row = self._get_row(name)
+        if not len(time_series):
+            return
+        buckets = time_series.timestamps_array // self.bucket_size
+        self._reserve(buckets[0].item(), buckets[-1].item())
+        columns = buckets - buckets[0]
+        start = buckets[0].item() - self.first_bucket
+        end = start + columns[-1].item() + 1
+        counts = numpy.bincount(columns)
+        sums = numpy.bincount(columns, weights=time_series.values_array)
+        old_counts = self.counts[row, start:end].astype(numpy.float64)
+        new_counts = old_counts + counts
+        filled = new_counts > 0
+        means = self.means[row, start:end].astype(numpy.float64)
+        means[filled] = (means[filled] * old_counts[filled] + sums[filled]) / new_counts[filled]
+        self.means[row, start:end] = means
+        self.counts[row, start:end] = new_counts
+        self._update_words(row, start, end)
+
+    def _get_window(self, time_series):
+        """
+        Compute the sketch of a time series over the buckets it covers.
+        :param TimeSeries time_series: a TimeSeries object.
+        :return tuple: the buckets covered as a slice, the bucket means, and whether each bucket has points.
+        """
+        buckets = time_series.timestamps_array // self.bucket_size - self.first_bucket
+        inside = (buckets >= 0) & (buckets < self.bucket_count)
+        buckets = buckets[inside]
+        if len(buckets) < 2 or buckets[0] == buckets[-1]:
+            raise exceptions.NotEnoughDataPoints('luminol.CorrelationIndex: Too few data points!')
+        columns = buckets - buckets[0]
+        counts = numpy.bincount(columns)
+        sums = numpy.bincount(columns, weights=time_series.values_array[inside])
+        filled = counts > 0
+        means = sums / numpy.maximum(counts, 1)
+        return slice(buckets[0].item(), buckets[-1].item() + 1), means, filled
+
+    def _find_candidates(self, window, means, filled, candidate_number):
+        """
+        Find the time series sharing the most SAX words with a time series, over the segments inside a window.
+        :param slice window: the buckets covered by the time series.
+        :param numpy.ndarray means: the bucket means of the time series within the window.
+        :param numpy.ndarray filled: whether each bucket of the time series has points.
+        :param int candidate_number: the maximal number of time series to return.
+        :return numpy.ndarray: sorted rows of the candidates, or None if the time series has no word in the window.
+        """
+        word_size = self.word_size
+        first_segment = -(-window.start // word_size)
+        end_segment = window.stop // word_size
+        if end_segment <= first_segment:
+            return None
+        columns = slice(first_segment * word_size - window.start, end_segment * word_size - window.start)
+        # Words are computed from float32 means like the stored ones, so that both are quantized the same way.
+        target_means = means[columns].astype(numpy.float32).astype(numpy.float64).reshape(-1, word_size)
+        words = self._compute_words(target_means, filled[columns].reshape(-1, word_size))
+        if (words < 0).all():
+            return None
+        postings = self._get_postings()
+        segment_number = self.first_bucket // word_size + first_segment
+        matches = [numpy.fromiter(postings.get((segment, word), ()), dtype=numpy.int64)
+                   for segment, word in zip(range(segment_number, segment_number + len(words)), words.tolist()) if word >= 0]
+        rows, match_counts = numpy.unique(numpy.concatenate(matches), return_counts=True)
+        return numpy.sort(rows[numpy.argsort(-match_counts, kind='stable')[:candidate_number]])
+
+    def get_similar(self, time_series, time_period=None, top_k=10, prune_factor=DEFAULT_CORRELATION_PRUNE_FACTOR):
+        """
+        Find the time series whose sketches correlate best with a time series.
+        Candidates are the top_k * prune_factor time series sharing the most SAX words with the time series, over the
+        segments inside the window it covers. They are looked up in the inverted index, so the work depends on how many
+        time series share words with the window, not on the number of time series in the index. Candidates are then
+        ranked on their bucket means. Time series sharing no word with the window are not returned.
+        Without pruning, or when the time series has no word in the window because it is flat or shorter than a
+        segment, all time series are ranked on their bucket means, which takes linear time.
+        :param time_series: a TimeSeries, a dictionary or a path to a csv file(str).
+        :param time_period: a tuple (start, end) representing a data period for considering correlation.
+        :param int top_k: the number of time series to return.
+        :param int prune_factor: smaller values prune more aggressively, 0 or None ranks all time series on bucket means.
+        :return list: (name, coefficient) tuples from the highest coefficient to the lowest.
+        """
+        time_series = self._load(time_series)
+        if time_period:
+            start_p, end_p = time_period
+            try:
+                time_series = time_series.crop(start_p, end_p)
+            # No data points fall into the specific time range.
+            except ValueError:
+                raise exceptions.NotEnoughDataPoints('luminol.CorrelationIndex: Too few data points!')
+        if not self.names or self.first_bucket is None:
+            return []
+        window, means, filled = self._get_window(time_series)
+        rows = None
+        if prune_factor and top_k * prune_factor < len(self.names):
+            rows = self._find_candidates(window, means, filled, top_k * prune_factor)
+        if rows is None:
+            rows = numpy.arange(len(self.names))
+        if not len(rows):
+            return []
+        block_size = max(1, DEFAULT_CORRELATION_MATRIX_BLOCK_SIZE // len(means))
+        coefficients = numpy.concatenate([
+            _masked_correlations(means, self.means[block, window], filled & (self.counts[block, window] > 0))
+            for block in (rows[start:start + block_size] for start in range(0, len(rows), block_size))])
+        ranked = numpy.argsort(-coefficients, kind='stable')[:top_k]
+        return [(self.names[row], coefficient) for row, coefficient in zip(rows[ranked].tolist(), coefficients[ranked].tolist())]
+
+    def save(self, path):
+        """
+        Save the index into a directory, as numpy arrays and a json file of names and parameters.
+        The arrays keep DEFAULT_CORRELATION_INDEX_SPARE_CAPACITY of spare rows and buckets, so that time series and
+        buckets can be added to a loaded index without copying its arrays into memory.
+        Files are written under temporary names first and then replace the saved ones, so an index loaded from the
+        same directory can be saved back while its arrays are still memory-mapped.
+        :param str path: path to the directory, which is created if needed.
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        rows = len(self.names)
+        row_capacity = max(1, int(math.ceil(rows * (1 + DEFAULT_CORRELATION_INDEX_SPARE_CAPACITY))))
+        bucket_capacity = int(math.ceil(self.bucket_count * (1 + DEFAULT_CORRELATION_INDEX_SPARE_CAPACITY)))
+        bucket_capacity = max(1, -(-bucket_capacity // self.word_size)) * self.word_size
+        segments = self._segment_count()
+        arrays = (('means', self.means[:rows, :self.bucket_count], bucket_capacity, 0),
+                  ('counts', self.counts[:rows, :self.bucket_count], bucket_capacity, 0),
+                  ('words', self.words[:rows, :segments], bucket_capacity // self.word_size, -1))
+        for array_name, array, columns, fill_value in arrays:
+            file_name = os.path.join(path, array_name + '.npy')
+            # Spare rows and buckets are left as holes in the file, which take no disk space where supported.
+            saved = numpy.lib.format.open_memmap(file_name + '.tmp', mode='w+', dtype=array.dtype,
+                                                 shape=(row_capacity, columns))
+            if fill_value:
+                saved.fill(fill_value)
+            saved[:array.shape[0], :array.shape[1]] = array
+            saved.flush()
+            del saved
+            _replace(file_name + '.tmp', file_name)
+        file_name = os.path.join(path, 'index.json')
+        with open(file_name + '.tmp', 'w') as index_file:
+            json.dump({'bucket_size': self.bucket_size, 'precision': self.precision, 'word_size': self.word_size,
+                       'first_bucket': self.first_bucket, 'bucket_count': self.bucket_count, 'names': self.names},
+                      index_file)
+        _replace(file_name + '.tmp', file_name)
+
+    @classmethod
+    def load(cls, path, mmap_mode='c'):
+        """
+        Load an index saved into a directory.
+        The arrays are memory-mapped, so that only the buckets read by queries are loaded from disk. Added points are
+        written into the spare rows and buckets in place, and the arrays are only copied into memory when they outgrow
+        them. The inverted index is built from the words when it is first needed.
+        :param str path: path to the directory.
+        :param str mmap_mode: memory-mapping mode of numpy.load. With 'c', added points are kept in memory and the
+            files are left unchanged until the index is saved. None reads the arrays into memory.
+        :return CorrelationIndex: the index.
+        """
+        with open(os.path.join(path, 'index.json')) as index_file:
+            meta = json.load(index_file)
+        index = cls(meta['bucket_size'], meta['precision'], meta['word_size'])
+        index.names = meta['names']
+        index.rows = dict((name, row) for row, name in enumerate(index.names))
+        index.first_bucket = meta['first_bucket']
+        index.bucket_count = meta['bucket_count']
+        for array_name in ('means', 'counts', 'words'):
+            setattr(index, array_name, numpy.load(os.path.join(path, array_name + '.npy'), mmap_mode=mmap_mode))
+        index.postings = None
+        return index
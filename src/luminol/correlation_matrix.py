@@ -0,0 +1,274 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+"""
+API for CorrelationMatrix Module
+This module finds correlations between one time series and many candidates, or between all pairs of many time series.
+"""
+
+import numpy
+
+from luminol import exceptions, utils
+from luminol.algorithms.correlator_algorithms.cross_correlator import CrossCorrelator, normalize_values
+from luminol.anomaly_detector import AnomalyDetector
+from luminol.constants import (DEFAULT_CORRELATION_MATRIX_BLOCK_SIZE,
+                               DEFAULT_CORRELATION_PRUNE_FACTOR,
+                               DEFAULT_CORRELATION_SKETCH_SIZE)
+from luminol.modules.correlation_result import CorrelationResult
+from luminol.modules.time_series import TimeSeries
+from luminol.score_cache import default_score_cache
+
+
+class CorrelationMatrix(object):
+
+    def __init__(self, time_series, candidates=None, time_period=None, use_anomaly_score=False, algorithm_params=None,
+                 score_cache=None, top_k=None, prune_factor=DEFAULT_CORRELATION_PRUNE_FACTOR):
+        """
+        Initializer
+        :param time_series: the target time series, a TimeSeries, a dictionary or a path to a csv file(str).
+            If candidates is not given, a dict of metric name -> time series to correlate with each other.
+        :param dict candidates: metric name -> time series to correlate with the target time series.
+        :param time_period: a tuple (start, end) representing a data period for considering correlation.
+        :param bool use_anomaly_score: if asserted, correlate the anomaly scores of the time series.
+        :param dict algorithm_params: additional params for the cross_correlator algorithm.
+        :param ScoreCache score_cache: cache of anomaly scores used with use_anomaly_score, the shared default cache if not passed.
+        :param int top_k: if passed, only the top_k results with the highest coefficients are kept.
+        :param int prune_factor: with top_k and a target, only the top_k * prune_factor candidates which correlate best
+            on coarse sketches are fully correlated. Smaller values prune more aggressively, 0 or None disables pruning.
+        """
+        if top_k is not None and top_k < 1:
+            raise exceptions.InvalidDataFormat('luminol.CorrelationMatrix: top_k has to be a positive number.')
+        self.top_k = top_k
+        self.prune_factor = prune_factor
+        if algorithm_params is not None and not isinstance(algorithm_params, dict):
+            raise exceptions.InvalidDataFormat('luminol.CorrelationMatrix: algorithm_params passed is not a dictionary.')
+        self.algorithm_params = algorithm_params or {}
+        self.use_anomaly_score = use_anomaly_score
+        self.score_cache = score_cache if score_cache is not None else default_score_cache
+        self.time_period = time_period
+        if candidates is None:
+            if not isinstance(time_series, dict):
+                raise exceptions.InvalidDataFormat('luminol.CorrelationMatrix: time series to correlate with each other have to be passed in a dictionary.')
+            self.target = None
+            names, series = self._prepare(time_series)
+        else:
+            if not isinstance(candidates, dict):
+                raise exceptions.InvalidDataFormat('luminol.CorrelationMatrix: candidates passed is not a dictionary.')
+            target = self._prepare_time_series(time_series)
+            if target is None:
+                raise exceptions.NotEnoughDataPoints('luminol.CorrelationMatrix: Too few data points!')
+            self.target = target
+            names, series = self._prepare(candidates)
+        self.names = names
+        self._group(series)
+        self._correlate()
+
+    @staticmethod
+    def _load(time_series):
+        """
+        Load time series into a TimeSeries object.
+        :param timeseries: a TimeSeries, a dictionary or a path to a csv file(str).
+        :return TimeSeries: a TimeSeries object.
+        """
+        if isinstance(time_series, TimeSeries):
+            return time_series
+        if isinstance(time_series, dict):
+            return TimeSeries(time_series)
+        return TimeSeries.from_arrays(*utils.read_csv_arrays(time_series))
+
+    def _prepare_time_series(self, time_series):
+        """
+        Load a time series, compute its anomaly scores and crop it as asked.
+        :param time_series: a TimeSeries, a dictionary or a path to a csv file(str).
+        :return TimeSeries: a TimeSeries object, or None if it has too few data points to correlate.
+        """
+        time_series = self._load(time_series)
+        if self.use_anomaly_score:
+            time_series = AnomalyDetector(time_series, score_only=True, score_cache=self.score_cache).get_all_scores()
+        if self.time_period:
+            start_p, end_p = self.time_period
+            try:
+                time_series = time_series.crop(start_p, end_p)
+            # No data points fall into the specific time range.
+            except ValueError:
+                return None
+        return time_series if len(time_series) >= 2 else None
+
+    def _prepare(self, series_mapping):
+        """
+        Prepare all time series of a mapping, leaving out the ones with too few data points.
+        :param dict series_mapping: metric name -> time series.
+        :return tuple: a list of metric names and a list of TimeSeries objects.
+        """
+        names = []
+        series = []
+        for name, time_series in series_mapping.items():
+            time_series = self._prepare_time_series(time_series)
+            if time_series is not None:
+                names.append(name)
+                series.append(time_series)
+        return names, series
+
+    def _group(self, series):
+        """
+        Group the time series sampled at the same timestamps.
+        Correlator aligns each pair onto the union of its own timestamps, which is the same union for all time series
+        of a group, so that the time series of a group are aligned and correlated in batch.
+        :param list series: TimeSeries objects, one per metric name.
+        """
+        self.series = series
+        self.groups = []
+        group_positions = {}
+        for row, time_series in enumerate(series):
+            key = time_series.timestamps_array.tobytes()
+            if key not in group_positions:
+                group_positions[key] = len(self.groups)
+                self.groups.append((time_series.timestamps_array, []))
+            self.groups[group_positions[key]][1].append(row)
+
+    @staticmethod
+    def _union(timestamps, other_timestamps):
+        """
+        Get the union of two sets of timestamps.
+        :param numpy.ndarray timestamps: sorted timestamps.
+        :param numpy.ndarray other_timestamps: other sorted timestamps.
+        :return numpy.ndarray: the sorted union.
+        """
+        # Metrics are often sampled at the same timestamps, which are then the union already.
+        if numpy.array_equal(timestamps, other_timestamps):
+            return timestamps
+        return numpy.union1d(timestamps, other_timestamps)
+
+    @staticmethod
+    def _reindex(series, timestamps, union):
+        """
+        Get the normalized values of time series sampled at the same timestamps, on a union of timestamps.
+        A missing timestamp takes the value of the next existing timestamp, as TimeSeries.align does.
+        Values are then normalized by their maximum, as the cross_correlator algorithm does.
+        :param list series: TimeSeries objects sampled at timestamps.
+        :param numpy.ndarray timestamps: the timestamps of the time series.
+        :param numpy.ndarray union: a union of timestamps including timestamps.
+        :return numpy.ndarray: a 2-D array with the values of one time series per row.
+        """
+        positions = None
+        if len(timestamps) != len(union):
+            positions = numpy.minimum(numpy.searchsorted(timestamps, union), len(timestamps) - 1)
+        values = numpy.empty((len(series), len(union)))
+        for row, time_series in zip(values, series):
+            row[:] = time_series.values_array if positions is None else time_series.values_array[positions]
+        return normalize_values(values)
+
+    def _correlate(self):
+        """
+        Correlate the target with all candidates, or every time series with all the others.
+        With top_k, only the top_k results are kept, and candidates are pruned before they are correlated.
+        """
+        algorithm = CrossCorrelator(self.target, None, **self.algorithm_params)
+        self.correlation_results = {}
+        if not self.names:
+            return
+        if self.target is not None:
+            target = self.target
+            aligned = []
+            for timestamps, rows in self.groups:
+                union = self._union(target.timestamps_array, timestamps)
+                aligned.append((union, self._reindex([target], target.timestamps_array, union)[0],
+                                self._reindex([self.series[row] for row in rows], timestamps, union)))
+            kept = self._prune_candidates(algorithm, aligned)
+            for (union, target_values, values), (_, rows) in zip(aligned, self.groups):
+                if kept is not None:
+                    selected = kept[rows]
+                    values = values[selected]
+                    rows = numpy.array(rows)[selected].tolist()
+                if not rows:
+                    continue
+                results = self._correlate_rows(algorithm, union, target_values, values)
+                for row, shift, coefficient, shifted_coefficient in zip(rows, *[result.tolist() for result in results]):
+                    self.correlation_results[self.names[row]] = CorrelationResult(shift, coefficient, shifted_coefficient)
+        else:
+            for timestamps, rows in self.groups:
+                for other_timestamps, other_rows in self.groups:
+                    union = self._union(timestamps, other_timestamps)
+                    values = self._reindex([self.series[row] for row in rows], timestamps, union)
+                    if other_rows is rows:
+                        other_values = values
+                    else:
+                        other_values = self._reindex([self.series[row] for row in other_rows], other_timestamps, union)
+                    for row, target_values in zip(rows, values):
+                        results = self._correlate_rows(algorithm, union, target_values, other_values)
+                        for other_row, shift, coefficient, shifted_coefficient in zip(other_rows, *[result.tolist() for result in results]):
+                            if other_row != row:
+                                self.correlation_results[self.names[row], self.names[other_row]] = CorrelationResult(
+                                    shift, coefficient, shifted_coefficient)
+        if self.top_k is not None:
+            self.correlation_results = dict(self.get_ranked_results()[:self.top_k])
+
+    @staticmethod
+    def _correlate_rows(algorithm, timestamps, target_values, values):
+        """
+        Correlate target values with every row of values.
+        Rows are correlated in blocks to bound the memory used by FFT.
+        :param CrossCorrelator algorithm: the cross_correlator algorithm.
+        :param numpy.ndarray timestamps: the timestamps shared by all values.
+        :param numpy.ndarray target_values: values of the target.
+        :param numpy.ndarray values: a 2-D array with the values of one time series per row.
+        :return list: arrays of shifts, coefficients and shifted coefficients, with one element per row.
+        """
+        block_size = max(1, DEFAULT_CORRELATION_MATRIX_BLOCK_SIZE // len(timestamps))
+        results = [algorithm._correlate_aligned(timestamps, target_values, values[start:start + block_size])
+                   for start in range(0, len(values), block_size)]
+        return [numpy.concatenate(parts) for parts in zip(*results)]
+
+    def _prune_candidates(self, algorithm, aligned):
+        """
+        Pick the candidates worth a full correlation when only the top_k results are kept.
+        Candidates are ranked by their correlation with the target on sketches, which average the aligned values over
+        blocks of timestamps so that they have at most DEFAULT_CORRELATION_SKETCH_SIZE points.
+        The top_k * prune_factor best ranked candidates are kept.
+        :param CrossCorrelator algorithm: the cross_correlator algorithm.
+        :param list aligned: for each group, the union of timestamps, the aligned target values and the aligned values.
+        :return numpy.ndarray: whether each candidate is kept, or None to keep all of them.
+        """
+        if self.top_k is None or not self.prune_factor:
+            return None
+        kept = self.top_k * self.prune_factor
+        if kept >= len(self.names) or all(len(union) <= DEFAULT_CORRELATION_SKETCH_SIZE for union, _, _ in aligned):
+            return None
+        coefficients = numpy.empty(len(self.names))
+        for (union, target_values, values), (_, rows) in zip(aligned, self.groups):
+            n = len(union)
+            block = -(-n // DEFAULT_CORRELATION_SKETCH_SIZE)
+            starts = numpy.arange(0, n, block)
+            counts = numpy.diff(numpy.append(starts, n))
+            sketch_target = numpy.add.reduceat(target_values, starts) / counts
+            sketch_values = numpy.add.reduceat(values, starts, axis=1) / counts
+            coefficients[rows] = self._correlate_rows(algorithm, union[starts], sketch_target, sketch_values)[1]
+        selected = numpy.zeros(len(self.names), dtype=bool)
+        selected[numpy.argsort(-coefficients, kind='stable')[:kept]] = True
+        return selected
+
+    def get_correlation_results(self):
+        """
+        Get correlation results.
+        :return dict: metric name -> CorrelationResult object when correlating with a target time series,
+            otherwise (metric name, other metric name) -> CorrelationResult object.
+        """
+        return self.correlation_results
+
+    def get_ranked_results(self, threshold=None):
+        """
+        Rank correlation results from the highest coefficient to the lowest.
+        :param float threshold: if given, only results with a coefficient above the threshold are returned.
+        :return list: a list of (key, CorrelationResult object) tuples, keyed as in get_correlation_results.
+        """
+        results = [(key, result) for key, result in self.correlation_results.items()
+                   if threshold is None or result.coefficient >= threshold]
+        return sorted(results, key=lambda item: item[1].coefficient, reverse=True)
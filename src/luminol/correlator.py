@@ -19,11 +19,13 @@ from luminol.algorithms.correlator_algorithms.all import correlator_algorithms
 from luminol.anomaly_detector import AnomalyDetector
 from luminol.constants import CORRELATOR_ALGORITHM
 from luminol.modules.time_series import TimeSeries
+from luminol.score_cache import default_score_cache
 
 
 class Correlator(object):
 
-    def __init__(self, time_series_a, time_series_b, time_period=None, use_anomaly_score=False, algorithm_name=None, algorithm_params=None):
+    def __init__(self, time_series_a, time_series_b, time_period=None, use_anomaly_score=False, algorithm_name=None, algorithm_params=None,
+                 score_cache=None):
         """
         Initializer
         :param time_series_a: a TimeSeries, a dictionary or a path to a csv file(str).
@@ -31,7 +33,9 @@ class Correlator(object):
         :param time_period: a tuple (start, end) representing a data period for considering correlation.
         :param str algorithm_name: name of the algorithm to use.
         :param dict algorithm_params: additional params for the specific algorithm.
+        :param ScoreCache score_cache: cache of anomaly scores used with use_anomaly_score, the shared default cache if not passed.
         """
+        self.score_cache = score_cache if score_cache is not None else default_score_cache
         self.time_series_a = self._load(time_series_a)
         self.time_series_b = self._load(time_series_b)
         if use_anomaly_score:
@@ -55,7 +59,7 @@ class Correlator(object):
         Get anomaly scores of a time series.
         :param TimeSeries time_series: a time_series.
         """
-        return AnomalyDetector(time_series, score_only=True).get_all_scores()
+        return AnomalyDetector(time_series, score_only=True, score_cache=self.score_cache).get_all_scores()
 
     def _load(self, time_series):
         """
@@ -67,7 +71,7 @@ class Correlator(object):
             return time_series
         if isinstance(time_series, dict):
             return TimeSeries(time_series)
-        return TimeSeries(utils.read_csv(time_series))
+        return TimeSeries.from_arrays(*utils.read_csv_arrays(time_series))
 
     def _get_algorithm_and_params(self, algorithm_name, algorithm_params):
         """
@@ -14,36 +14,126 @@ import numpy
 
 class TimeSeries(object):
 
+    # Whether the arrays may be used by other objects, they are then copied before values are changed in place.
+    _shared = False
+
     def __init__(self, series):
-        self.timestamps = []
-        self.values = []
+        timestamps = []
+        values = []
 
         # Clean the time series by removing null values.
         for ts in sorted(series):
             if series[ts] is not None:
-                self.timestamps.append(int(ts))
-                self.values.append(float(series[ts]))
+                timestamps.append(int(ts))
+                values.append(float(series[ts]))
+
+        # Timestamps and values are kept in two contiguous arrays sorted by timestamp,
+        # so lookups by timestamp can be done with a binary search.
+        self._timestamps = numpy.array(timestamps, dtype=numpy.int64)
+        self._values = numpy.array(values, dtype=numpy.float64)
+
+    @classmethod
+    def from_arrays(cls, timestamps, values, assume_sorted=True):
+        """
+        Create a TimeSeries from sequences of timestamps and values.
+        Numpy arrays, array.array objects and memoryviews which already hold int64 timestamps
+        and float64 values are used as storage without being copied. The time series copies its arrays
+        the first time a data point is set, so the passed in arrays are never changed.
+
+        :param timestamps: timestamps of the time series.
+        :param values: values aligned with timestamps.
+        :param bool assume_sorted: if asserted, timestamps are expected to be in ascending order already.
+        :return: :class:`TimeSeries` object.
+        """
+        timestamps = numpy.asarray(timestamps, dtype=numpy.int64)
+        values = numpy.asarray(values, dtype=numpy.float64)
+        if timestamps.shape != values.shape or timestamps.ndim != 1:
+            raise ValueError('Timestamps and values must be one dimensional and of the same length.')
+        if not assume_sorted:
+            order = numpy.argsort(timestamps, kind='mergesort')
+            timestamps, values = timestamps[order], values[order]
+        time_series = cls.__new__(cls)
+        time_series._timestamps = timestamps
+        time_series._values = values
+        time_series._shared = True
+        return time_series
+
+    @classmethod
+    def from_buffer(cls, timestamps_buffer, values_buffer, assume_sorted=True):
+        """
+        Create a TimeSeries from raw buffers(bytes, bytearray, mmap, shared memory...) holding
+        native int64 timestamps and float64 values. The buffers are used as storage without being copied,
+        even read-only buffers such as bytes, as data points are only set on a copy.
+
+        :param timestamps_buffer: buffer of int64 timestamps.
+        :param values_buffer: buffer of float64 values.
+        :param bool assume_sorted: if asserted, timestamps are expected to be in ascending order already.
+        :return: :class:`TimeSeries` object.
+        """
+        return cls.from_arrays(numpy.frombuffer(timestamps_buffer, dtype=numpy.int64),
+                               numpy.frombuffer(values_buffer, dtype=numpy.float64), assume_sorted)
+
+    @property
+    def timestamps(self):
+        """
+        Return list of timestamps in ascending order.
+        The list is a copy, so changing it does not change the time series. Use ts[timestamp] = value
+        or assign a whole list to set data points, and timestamps_array to access the underlying storage.
+        """
+        return self._timestamps.tolist()
+
+    @timestamps.setter
+    def timestamps(self, timestamps):
+        self._timestamps = numpy.asarray(timestamps, dtype=numpy.int64)
+
+    @property
+    def values(self):
+        """
+        Return list of values ordered by timestamp.
+        The list is a copy, so changing it does not change the time series. Use ts[timestamp] = value
+        or assign a whole list to set data points, and values_array to access the underlying storage.
+        """
+        return self._values.tolist()
+
+    @values.setter
+    def values(self, values):
+        self._values = numpy.asarray(values, dtype=numpy.float64)
+        self._shared = True
+
+    @property
+    def timestamps_array(self):
+        """
+        Return the int64 numpy array holding the timestamps.
+        """
+        return self._timestamps
+
+    @property
+    def values_array(self):
+        """
+        Return the float64 numpy array holding the values.
+        """
+        return self._values
 
     @property
     def start(self):
         """
         Return the earliest timestamp in the time series.
         """
-        return min(self.timestamps) if self.timestamps else None
+        return self._timestamps[0].item() if len(self._timestamps) else None
 
     @property
     def end(self):
         """
         Return the latest timestamp in the time series.
         """
-        return max(self.timestamps) if self.timestamps else None
+        return self._timestamps[-1].item() if len(self._timestamps) else None
 
     @property
     def timestamps_ms(self):
         """
         Return list of timestamp values in order by milliseconds since epoch.
         """
-        return [ts * 1000 for ts in self.timestamps]
+        return (self._timestamps * 1000).tolist()
 
     def __repr__(self):
         return 'TimeSeries<start={0}, end={1}>'.format(repr(self.start), repr(self.end))
@@ -58,84 +148,118 @@ class TimeSeries(object):
         return string_rep
 
     def __nonzero__(self):
-        return len(self.timestamps) > 0
+        return len(self._timestamps) > 0
+
+    def _find(self, key):
+        """
+        Find the position of a timestamp using a binary search.
+
+        :param key: timestamp to look up.
+        :return int: position of the timestamp, or `None` if it does not exist.
+        """
+        try:
+            pos = int(numpy.searchsorted(self._timestamps, key))
+        except TypeError:
+            return None
+        if pos < len(self._timestamps) and self._timestamps[pos] == key:
+            return pos
+        return None
+
+    @staticmethod
+    def _to_timestamp(key):
+        """
+        Convert a key into an int64 timestamp, as timestamps are stored in an int64 array.
+
+        :param key: an integer, or a float with an integral value.
+        :return int: the timestamp.
+        """
+        try:
+            timestamp = int(key)
+        except (TypeError, ValueError):
+            raise ValueError('Timestamp must be an integer, got {0}.'.format(repr(key)))
+        if timestamp != key:
+            raise ValueError('Timestamp must be an integer, got {0}.'.format(repr(key)))
+        return timestamp
 
     def __getitem__(self, key):
-        if key in self.timestamps:
-            pos = self.timestamps.index(key)
-            return self.values[pos]
+        pos = self._find(key)
+        if pos is not None:
+            return self._values[pos].item()
         else:
             raise ValueError('Timestamp does not exist in TimeSeries object')
 
     def __setitem__(self, key, val):
-        if key in self.timestamps:
-            pos = self.timestamps.index(key)
+        pos = self._find(key)
+        if pos is not None:
             if val is None:
-                del self.timestamps[pos]
-                del self.values[pos]
+                del self[key]
             else:
-                self.values[pos] = val
-        else:
-            self.timestamps = sorted(self.timestamps + [key])
-            pos = self.timestamps.index(key)
-            self.values.insert(pos, val)
+                if self._shared:
+                    self._values = self._values.copy()
+                    self._shared = False
+                self._values[pos] = val
+        elif val is not None:
+            key = self._to_timestamp(key)
+            pos = int(numpy.searchsorted(self._timestamps, key))
+            self._timestamps = numpy.insert(self._timestamps, pos, key)
+            self._values = numpy.insert(self._values, pos, val)
 
     def __delitem__(self, key):
-        if key in self.timestamps:
-            pos = self.timestamps.index(key)
-            del self.timestamps[pos]
-            del self.values[pos]
+        pos = self._find(key)
+        if pos is not None:
+            self._timestamps = numpy.delete(self._timestamps, pos)
+            self._values = numpy.delete(self._values, pos)
 
     def __contains__(self, item):
-        return item in self.timestamps
+        return self._find(item) is not None
 
     def __iter__(self):
-        for key in self.timestamps:
+        for key in self._timestamps.tolist():
             yield key
 
     def __len__(self):
-        return len(self.timestamps)
+        return len(self._timestamps)
 
     def __eq__(self, other):
-        if len(self.timestamps) != len(other.timestamps):
+        if len(self._timestamps) != len(other.timestamps_array):
             return False
 
-        for pos, ts in enumerate(self.timestamps):
-            if ts != other.timestamps[pos] or self.values[pos] != other.values[pos]:
-                return False
-        else:
-            return True
+        return bool(numpy.array_equal(self._timestamps, other.timestamps_array) and
+                    numpy.array_equal(self._values, other.values_array))
 
     def __add__(self, other):
-        return self._generic_binary_op(other, self._get_value_type(other).__add__)
+        return self._generic_binary_op(other, numpy.add)
 
     def __sub__(self, other):
-        return self._generic_binary_op(other, self._get_value_type(other).__sub__)
+        return self._generic_binary_op(other, numpy.subtract)
 
     def __mul__(self, other):
-        return self._generic_binary_op(other, self._get_value_type(other).__mul__)
+        return self._generic_binary_op(other, numpy.multiply)
 
     def __div__(self, other):
-        return self._generic_binary_op(other, self._get_value_type(other).__div__)
+        return self._generic_binary_op(other, numpy.true_divide)
 
     __radd__ = __add__
     __rmul__ = __mul__
+    __truediv__ = __div__
 
     def __rsub__(self, other):
-        return self._generic_binary_op(other, self._get_value_type(other).__rsub__)
+        return self._generic_binary_op(other, numpy.subtract, reflected=True)
 
     def __rdiv__(self, other):
-        return self._generic_binary_op(other, self._get_value_type(other).__rdiv__)
+        return self._generic_binary_op(other, numpy.true_divide, reflected=True)
+
+    __rtruediv__ = __rdiv__
 
     def items(self):
-        return [(ts, self.values[pos]) for pos, ts in enumerate(self.timestamps)]
+        return list(zip(self._timestamps.tolist(), self._values.tolist()))
 
     def iterkeys(self):
-        for key in self.timestamps:
+        for key in self._timestamps.tolist():
             yield key
 
     def itervalues(self):
-        for value in self.values:
+        for value in self._values.tolist():
             yield value
 
     def iteritems(self):
@@ -147,103 +271,99 @@ class TimeSeries(object):
             yield item
         yield None
 
-    def _generic_binary_op(self, other, op):
+    def _generic_binary_op(self, other, op, reflected=False):
         """
         Perform the method operation specified in the op parameter on the values
         within the instance's time series values and either another time series
         or a constant number value.
+        When other is a time series, only timestamps present in both are kept.
+        Points where a division by zero would happen are dropped.
 
         :param other: Time series of values or a constant number to use in calculations with instance's time series.
-        :param func op: The method to perform the calculation between the values.
+        :param numpy.ufunc op: The numpy operation to perform the calculation between the values.
+        :param bool reflected: if asserted, other is used as the left operand.
         :return: :class:`TimeSeries` object.
         """
-        output = {}
         if isinstance(other, TimeSeries):
-            for key, value in self.items():
-                if key in other:
-                    try:
-                        result = op(value, other[key])
-                        if result is NotImplemented:
-                            other_type = type(other[key])
-                            other_op = vars(other_type).get(op.__name__)
-                            if other_op:
-                                output[key] = other_op(other_type(value), other[key])
-                        else:
-                            output[key] = result
-                    except ZeroDivisionError:
-                        continue
+            if not len(self._values) and not len(other.values_array):
+                raise ValueError('Cannot perform arithmetic on empty time series.')
+            positions, other_positions = self._intersect_positions(other)
+            timestamps = self._timestamps[positions]
+            values = self._values[positions]
+            other_values = other.values_array[other_positions]
         else:
-            for key, value in self.items():
-                try:
-                    result = op(value, other)
-                    if result is NotImplemented:
-                        other_type = type(other)
-                        other_op = vars(other_type).get(op.__name__)
-                        if other_op:
-                            output[key] = other_op(other_type(value), other)
-                    else:
-                        output[key] = result
-                except ZeroDivisionError:
-                    continue
-
-        if output:
-            return TimeSeries(output)
+            if not len(self._values):
+                raise ValueError('Cannot perform arithmetic on empty time series.')
+            timestamps = self._timestamps.copy()
+            values = self._values
+            other_values = other
+
+        if reflected:
+            values, other_values = other_values, values
+
+        if op is numpy.true_divide:
+            valid = numpy.broadcast_to(numpy.asarray(other_values) != 0, timestamps.shape)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                output = op(values, other_values)
+            timestamps, output = timestamps[valid], output[valid]
+        else:
+            output = op(values, other_values)
+
+        if len(timestamps):
+            return TimeSeries.from_arrays(timestamps, output)
         else:
             raise ValueError('TimeSeries data was empty or invalid.')
 
-    def _get_value_type(self, other):
+    def _intersect_positions(self, other):
         """
-        Get the object type of the value within the values portion of the time series.
+        Find the positions of the timestamps both time series have in common.
 
-        :return: `type` of object
+        :param TimeSeries other: the time series to intersect with.
+        :return: :tuple:(positions in self, positions in other)
         """
-        if self.values:
-            return type(self.values[0])
-        elif isinstance(other, TimeSeries) and other.values:
-            return type(other.values[0])
-        else:
-            raise ValueError('Cannot perform arithmetic on empty time series.')
+        other_timestamps = other.timestamps_array
+        if not len(other_timestamps):
+            empty = numpy.array([], dtype=numpy.intp)
+            return empty, empty
+        other_positions = numpy.searchsorted(other_timestamps, self._timestamps)
+        other_positions = numpy.minimum(other_positions, len(other_timestamps) - 1)
+        matched = other_timestamps[other_positions] == self._timestamps
+        return numpy.flatnonzero(matched), other_positions[matched]
+
+    def _reindex(self, timestamps):
+        """
+        Get the values of the time series at the given timestamps.
+        A missing timestamp takes the value of the next existing timestamp, or the last value
+        if it is after the end of the time series.
+
+        :param numpy.ndarray timestamps: sorted timestamps.
+        :return: :class:`TimeSeries` object.
+        """
+        positions = numpy.searchsorted(self._timestamps, timestamps)
+        positions = numpy.minimum(positions, len(self._timestamps) - 1)
+        return TimeSeries.from_arrays(timestamps, self._values[positions])
+
+    def intersect(self, other):
+        """
+        Keep only the timestamps both time series have in common.
+
+        :param TimeSeries other: the time series to intersect with.
+        :return: :tuple:(`TimeSeries` object(the intersected self), `TimeSeries` object(the intersected other))
+        """
+        positions, other_positions = self._intersect_positions(other)
+        return (TimeSeries.from_arrays(self._timestamps[positions], self._values[positions]),
+                TimeSeries.from_arrays(other.timestamps_array[other_positions], other.values_array[other_positions]))
 
     def align(self, other):
         """
         Align two time series so that len(self) == len(other) and self.timstamps == other.timestamps.
+        The aligned time series cover the union of both timestamps(an outer join).
 
         :return: :tuple:(`TimeSeries` object(the aligned self), `TimeSeries` object(the aligned other))
         """
         if isinstance(other, TimeSeries):
-            aligned, other_aligned = {}, {}
-            i, other_i = self.iteritems_silent(), other.iteritems_silent()
-            item, other_item = next(i), next(other_i)
-
-            while item and other_item:
-                # Unpack timestamps and values.
-                timestamp, value = item
-                other_timestamp, other_value = other_item
-                if timestamp == other_timestamp:
-                    aligned[timestamp] = value
-                    other_aligned[other_timestamp] = other_value
-                    item = next(i)
-                    other_item = next(other_i)
-                elif timestamp < other_timestamp:
-                    aligned[timestamp] = value
-                    other_aligned[timestamp] = other_value
-                    item = next(i)
-                else:
-                    aligned[other_timestamp] = value
-                    other_aligned[other_timestamp] = other_value
-                    other_item = next(other_i)
-            # Align remaining items.
-            while item:
-                timestamp, value = item
-                aligned[timestamp] = value
-                other_aligned[timestamp] = other.values[-1]
-                item = next(i)
-            while other_item:
-                other_timestamp, other_value = other_item
-                aligned[other_timestamp] = self.values[-1]
-                other_aligned[other_timestamp] = other_value
-                other_item = next(other_i)
-            return TimeSeries(aligned), TimeSeries(other_aligned)
+            timestamps = numpy.union1d(self._timestamps, other.timestamps_array)
+            return self._reindex(timestamps), other._reindex(timestamps.copy())
 
     def smooth(self, smoothing_factor):
         """
@@ -253,23 +373,22 @@ class TimeSeries(object):
         :param float smoothing_factor: smoothing factor
         :return: :class:`TimeSeries` object.
         """
-        forward_smooth = {}
-        backward_smooth = {}
-        output = {}
+        forward_smooth = []
+        backward_smooth = []
 
         if self:
-            pre = self.values[0]
-            next = self.values[-1]
-            for key, value in self.items():
-                forward_smooth[key] = smoothing_factor * pre + (1 - smoothing_factor) * value
-                pre = forward_smooth[key]
-            for key, value in reversed(self.items()):
-                backward_smooth[key] = smoothing_factor * next + (1 - smoothing_factor) * value
-                next = backward_smooth[key]
-            for key in forward_smooth.keys():
-                output[key] = (forward_smooth[key] + backward_smooth[key]) / 2
-
-        return TimeSeries(output)
+            pre = self._values[0].item()
+            next = self._values[-1].item()
+            for value in self._values.tolist():
+                pre = smoothing_factor * pre + (1 - smoothing_factor) * value
+                forward_smooth.append(pre)
+            for value in reversed(self._values.tolist()):
+                next = smoothing_factor * next + (1 - smoothing_factor) * value
+                backward_smooth.append(next)
+            backward_smooth.reverse()
+
+        output = (numpy.array(forward_smooth) + numpy.array(backward_smooth)) / 2
+        return TimeSeries.from_arrays(self._timestamps.copy(), output)
 
     def add_offset(self, offset):
         """
@@ -278,7 +397,7 @@ class TimeSeries(object):
         :param int offset: The number of seconds to offset the time series.
         :return: `None`
         """
-        self.timestamps = [ts + offset for ts in self.timestamps]
+        self._timestamps = self._timestamps + offset
 
     def normalize(self):
         """
@@ -288,7 +407,7 @@ class TimeSeries(object):
         """
         maximum = self.max()
         if maximum:
-            self.values = [value / maximum for value in self.values]
+            self._values = self._values / maximum
 
     def crop(self, start_timestamp, end_timestamp):
         """
@@ -299,13 +418,11 @@ class TimeSeries(object):
         :param int end_timestamp: the end timestamp value
         :return: :class:`TimeSeries` object.
         """
-        output = {}
-        for key, value in self.items():
-            if key >= start_timestamp and key <= end_timestamp:
-                output[key] = value
+        start = numpy.searchsorted(self._timestamps, start_timestamp, side='left')
+        end = numpy.searchsorted(self._timestamps, end_timestamp, side='right')
 
-        if output:
-            return TimeSeries(output)
+        if start < end:
+            return TimeSeries.from_arrays(self._timestamps[start:end].copy(), self._values[start:end].copy())
         else:
             raise ValueError('TimeSeries data was empty or invalid.')
 
@@ -316,7 +433,7 @@ class TimeSeries(object):
         :param default: Value to return as a default should the calculation not be possible.
         :return: Float representing the average value or `None`.
         """
-        return numpy.average(self.values).item() if self.values else default
+        return numpy.average(self._values).item() if len(self._values) else default
 
     def median(self, default=None):
         """
@@ -325,7 +442,7 @@ class TimeSeries(object):
         :param default: Value to return as a default should the calculation not be possible.
         :return: Float representing the median value or `None`.
         """
-        return numpy.median(self.values).item() if self.values else default
+        return numpy.median(self._values).item() if len(self._values) else default
 
     def max(self, default=None):
         """
@@ -334,7 +451,7 @@ class TimeSeries(object):
         :param default: Value to return as a default should the calculation not be possible.
         :return: Float representing the maximum value or `None`.
         """
-        return numpy.max(self.values).item() if self.values else default
+        return numpy.max(self._values).item() if len(self._values) else default
 
     def min(self, default=None):
         """
@@ -343,7 +460,7 @@ class TimeSeries(object):
         :param default: Value to return as a default should the calculation not be possible.
         :return: Float representing the maximum value or `None`.
         """
-        return numpy.min(self.values).item() if self.values else default
+        return numpy.min(self._values).item() if len(self._values) else default
 
     def percentile(self, n, default=None):
         """
@@ -353,7 +470,7 @@ class TimeSeries(object):
         :param default: Value to return as a default should the calculation not be possible.
         :return: Float representing the Nth percentile value or `None`.
         """
-        return numpy.percentile(self.values, n).item() if self.values else default
+        return numpy.percentile(self._values, n).item() if len(self._values) else default
 
     def stdev(self, default=None):
         """
@@ -362,7 +479,7 @@ class TimeSeries(object):
         :param default: Value to return as a default should the calculation not be possible.
         :return: Float representing the standard deviation value or `None`.
         """
-        return numpy.std(self.values).item() if self.values else default
+        return numpy.std(self._values).item() if len(self._values) else default
 
     def sum(self, default=None):
         """
@@ -371,4 +488,4 @@ class TimeSeries(object):
         :param default: Value to return as a default should the calculation not be possible.
         :return: Float representing the sum or `None`.
         """
-        return numpy.sum(self.values).item() if self.values else default
+        return numpy.sum(self._values).item() if len(self._values) else default
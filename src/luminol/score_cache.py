@@ -0,0 +1,145 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+"""
+Cache of anomaly scores shared by AnomalyDetector, Correlator and CorrelationMatrix.
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+
+from luminol.constants import DEFAULT_SCORE_CACHE_MAX_BYTES
+from luminol.modules.time_series import TimeSeries
+
+
+def _digest(time_series):
+    """
+    Hash the content of a time series.
+    :param TimeSeries time_series: a TimeSeries object, or None.
+    :return str: hex digest of the timestamps and values, or None.
+    """
+    if time_series is None:
+        return None
+    digest = hashlib.sha1(time_series.timestamps_array.tobytes())
+    digest.update(time_series.values_array.tobytes())
+    return digest.hexdigest()
+
+
+def _copy(time_series):
+    """
+    Copy a time series, so that the cached scores can not be changed through the returned one.
+    :param TimeSeries time_series: a TimeSeries object.
+    :return TimeSeries: the copy.
+    """
+    return TimeSeries.from_arrays(time_series.timestamps_array.copy(), time_series.values_array.copy())
+
+
+class ScoreCache(object):
+
+    """
+    Least recently used cache of anomaly score time series.
+    Scores are keyed by the content of the time series and baseline time series, the algorithm and its params,
+    so that a time series changed after it was scored is scored again.
+    A cache can be shared by several threads.
+    """
+    def __init__(self, max_bytes=DEFAULT_SCORE_CACHE_MAX_BYTES):
+        """
+        Initializer
+        :param int max_bytes: maximal memory used by the cached scores, the least recently used ones are evicted beyond it.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(time_series, baseline_time_series, algorithm, algorithm_params):
+        """
+        Build the cache key of the scores of a time series.
+        :param TimeSeries time_series: the scored time series.
+        :param TimeSeries baseline_time_series: the baseline time series, or None.
+        :param algorithm: the AnomalyDetectorAlgorithm class.
+        :param dict algorithm_params: additional params for the algorithm, other than the time series.
+        :return tuple: the key.
+        """
+        params = sorted((name, value) for name, value in algorithm_params.items()
+                        if name not in ('time_series', 'baseline_time_series'))
+        return (_digest(time_series), _digest(baseline_time_series),
+                algorithm.__module__ + '.' + algorithm.__name__, repr(params))
+
+    def get(self, key):
+        """
+        Get cached scores, marking them as the most recently used.
+        :param tuple key: a key built by make_key.
+        :return TimeSeries: a copy of the scores, or None if they are not cached.
+        """
+        with self._lock:
+            scores = self._scores.pop(key, None)
+            if scores is None:
+                return None
+            self._scores[key] = scores
+        return _copy(scores)
+
+    def put(self, key, scores):
+        """
+        Cache scores, evicting the least recently used ones beyond max_bytes.
+        Scores larger than max_bytes are not cached.
+        :param tuple key: a key built by make_key.
+        :param TimeSeries scores: the anomaly scores.
+        """
+        scores = _copy(scores)
+        size = scores.timestamps_array.nbytes + scores.values_array.nbytes
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            self._discard(key)
+            self._scores[key] = scores
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and self._scores:
+                _, evicted = self._scores.popitem(last=False)
+                self.nbytes -= evicted.timestamps_array.nbytes + evicted.values_array.nbytes
+
+    def discard(self, key):
+        """
+        Remove cached scores if they are cached.
+        :param tuple key: a key built by make_key.
+        """
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        """
+        Remove cached scores if they are cached, with the lock held.
+        :param tuple key: a key built by make_key.
+        """
+        scores = self._scores.pop(key, None)
+        if scores is not None:
+            self.nbytes -= scores.timestamps_array.nbytes + scores.values_array.nbytes
+
+    def clear(self):
+        """
+        Remove all cached scores.
+        """
+        with self._lock:
+            self._scores.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, key):
+        return key in self._scores
+
+
+# Cache shared by correlations on anomaly scores when no cache is passed, for the whole process.
+# Lower its max_bytes to use less memory, or set it to 0 and clear it to stop caching.
+default_score_cache = ScoreCache()
@@ -0,0 +1,125 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+
+"""
+API for Streaming Anomaly Detector Module
+This module detects anomalies in a single time series, one data point at a time.
+"""
+
+from luminol import exceptions
+from luminol.algorithms.streaming_anomaly_detector_algorithms.all import streaming_anomaly_detector_algorithms
+from luminol.modules.anomaly import Anomaly
+from luminol.constants import (ANOMALY_DETECTOR_ALGORITHM, ANOMALY_THRESHOLD,
+                               ANOMALY_DETECTOR_REFINE_ALGORITHM,
+                               DEFAULT_SCORE_PERCENT_THRESHOLD)
+
+
+class StreamingAnomalyDetector(object):
+
+    def __init__(self, score_threshold=None, score_percent_threshold=None, algorithm_name=None, algorithm_params=None,
+                 refine_algorithm_name=None, refine_algorithm_params=None):
+        """
+        Initializer
+        :param float score_threshold: anomaly score above which is considered an anomaly.
+        :param float score_percent_threshold: percent threshold on the maximal anomaly score so far
+            above which is considered an anomaly.
+        :param str algorithm_name: name of the algorithm to use(file name).
+        :param dict algorithm_params: additional params for the specific algorithm.
+        :param str refine_algorithm_name: name of the refine algorithm to use(file name).
+        :param dict refine_algorithm_params: additional params for the specific refine algorithm.
+        """
+        algorithm_name = algorithm_name or ANOMALY_DETECTOR_ALGORITHM
+        self.algorithm = self._get_algorithm(algorithm_name)(**(algorithm_params or {}))
+        self.threshold = score_threshold or ANOMALY_THRESHOLD.get(algorithm_name)
+        self.score_percent_threshold = score_percent_threshold or DEFAULT_SCORE_PERCENT_THRESHOLD
+        self.refine_algorithm = self._get_algorithm(refine_algorithm_name or ANOMALY_DETECTOR_REFINE_ALGORITHM)
+        self.refine_algorithm_params = refine_algorithm_params or {}
+
+        self.last_timestamp = None
+        self.max_anom_score = None
+        self.anomalies = []
+        self.current_anomaly = None
+        # Refine algorithm of the current anomaly and its maximal score.
+        self.refine = None
+        self.max_refine_score = None
+
+    def _get_algorithm(self, algorithm_name):
+        """
+        Get the specific algorithm.
+        :param str algorithm_name: name of the algorithm to use(file name).
+        :return: algorithm class.
+        """
+        try:
+            return streaming_anomaly_detector_algorithms[algorithm_name]
+        except KeyError:
+            raise exceptions.AlgorithmNotFound('luminol.StreamingAnomalyDetector: ' + str(algorithm_name) + ' not found.')
+
+    def update(self, timestamp, value, baseline_value=None):
+        """
+        Add a data point, compute its anomaly score and update the anomaly it belongs to.
+        :param int timestamp: timestamp of the data point, larger than the timestamp of the previous data point.
+        :param float value: value of the data point.
+        :param float baseline_value: baseline value at the timestamp, for algorithms comparing with a baseline.
+        :return float: the anomaly score of the data point.
+        """
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            raise exceptions.InvalidDataFormat('luminol.StreamingAnomalyDetector: timestamps must be increasing.')
+        self.last_timestamp = timestamp
+
+        if baseline_value is None:
+            anom_score = self.algorithm.update(timestamp, float(value))
+        else:
+            anom_score = self.algorithm.update(timestamp, float(value), float(baseline_value))
+        if self.max_anom_score is None or anom_score > self.max_anom_score:
+            self.max_anom_score = anom_score
+        if self.max_anom_score:
+            threshold = self.threshold or self.max_anom_score * self.score_percent_threshold
+            if anom_score > threshold:
+                self._extend_anomaly(timestamp, anom_score)
+            elif self.current_anomaly:
+                self.anomalies.append(self.current_anomaly)
+                self.current_anomaly = None
+        return anom_score
+
+    def _extend_anomaly(self, timestamp, anom_score):
+        """
+        Add an anomalous data point to the current anomaly, or start a new anomaly with it.
+        The exact timestamp of the anomaly is where the refine algorithm gives the maximal score so far.
+        :param int timestamp: timestamp of the data point.
+        :param float anom_score: anomaly score of the data point.
+        """
+        if not self.current_anomaly:
+            self.current_anomaly = Anomaly(timestamp, timestamp, anom_score, timestamp)
+            self.refine = self.refine_algorithm(**self.refine_algorithm_params)
+            self.max_refine_score = self.refine.update(timestamp, anom_score)
+            return
+        anomaly = self.current_anomaly
+        anomaly.end_timestamp = timestamp
+        anomaly.anomaly_score = max(anomaly.anomaly_score, anom_score)
+        refine_score = self.refine.update(timestamp, anom_score)
+        if refine_score > self.max_refine_score:
+            self.max_refine_score = refine_score
+            anomaly.exact_timestamp = timestamp
+
+    def get_anomalies(self):
+        """
+        Get the anomalies which have ended.
+        :return list: a list of Anomaly objects.
+        """
+        return self.anomalies
+
+    def get_current_anomaly(self):
+        """
+        Get the anomaly the latest data point belongs to, it keeps growing until a data point is not anomalous.
+        :return Anomaly: an Anomaly object, or None if the latest data point is not anomalous.
+        """
+        return self.current_anomaly
@@ -11,13 +11,22 @@ distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
 import os
+import subprocess
 import sys
 import unittest
 
+import numpy
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from luminol import exceptions
-from luminol.anomaly_detector import AnomalyDetector
+from luminol import exceptions, utils
+from luminol.algorithms import registry as registry_module
+from luminol.algorithms.anomaly_detector_algorithms.all import anomaly_detector_algorithms
+from luminol.algorithms.anomaly_detector_algorithms import derivative_detector
+from luminol.algorithms.anomaly_detector_algorithms.diff_percent_threshold import DiffPercentThreshold
+from luminol.algorithms.anomaly_detector_algorithms.exp_avg_detector import ExpAvgDetector
+from luminol.algorithms.anomaly_detector_algorithms.sign_test import SignTest
+from luminol.anomaly_detector import AnomalyDetector, detect_many
 from luminol.modules.time_series import TimeSeries
 # Needed for custom algorithms
 from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
@@ -309,6 +318,40 @@ class TestAnomalyDetector(unittest.TestCase):
         self.assertGreater(anomaly.anomaly_score, 98)
         self.assertLess(anomaly.anomaly_score, 99)
 
+    def test_sign_test_algorithm_multiple_windows(self):
+        """
+        Test "sign test" algorithm with several scan windows and confidences at once.
+        """
+        bs = dict((t, 1) for t in range(1, 100))
+        ts = dict(bs)
+        ts.update((t, 1.200001) for t in range(10, 22))
+        ts.update((t, 1.200001) for t in range(50, 80))
+        configurations = [(10, 0.01), (24, 0.01), (24, 0.05)]
+        detector = AnomalyDetector(ts, baseline_time_series=bs, algorithm_name='sign_test',
+                                   algorithm_params={'percent_threshold_upper': 20,
+                                                     'scan_window': [k for k, conf in configurations],
+                                                     'confidence': [conf for k, conf in configurations]})
+        scores = detector.get_all_scores()
+        algorithm = SignTest(TimeSeries(ts), TimeSeries(bs), percent_threshold_upper=20,
+                             scan_window=[k for k, conf in configurations], confidence=[conf for k, conf in configurations])
+        self.assertEqual(algorithm.run(), scores)
+        single_scores = []
+        for k, conf in configurations:
+            single_detector = AnomalyDetector(ts, baseline_time_series=bs, algorithm_name='sign_test',
+                                              algorithm_params={'percent_threshold_upper': 20, 'scan_window': k, 'confidence': conf})
+            single_scores.append(single_detector.get_all_scores())
+            self.assertEqual(algorithm.get_scores_by_configuration()[k, conf], single_scores[-1])
+        self.assertEqual(scores.values, [max(values) for values in zip(*[single.values for single in single_scores])])
+        # The short regression is only caught by the short window.
+        self.assertEqual(single_scores[1].crop(10, 21).max(), 0)
+        self.assertTrue(single_scores[0].crop(10, 21).max() > 0)
+        self.assertEqual(len(detector.get_anomalies()), 2)
+
+        self.assertRaises(exceptions.InvalidDataFormat,
+                          lambda: AnomalyDetector(ts, baseline_time_series=bs, algorithm_name='sign_test',
+                                                  algorithm_params={'percent_threshold_upper': 20, 'scan_window': [10, 24],
+                                                                    'confidence': [0.01, 0.05, 0.1]}))
+
     def test_absolute_threshold_algorithm(self):
         """
         Test "absolute threshold" algorithm with a upper and lower threshold of 0.2
@@ -322,6 +365,123 @@ class TestAnomalyDetector(unittest.TestCase):
         self.assertRaises(exceptions.RequiredParametersNotPassed,
                           lambda: AnomalyDetector(self.s1, algorithm_name='absolute_threshold'))
 
+    def test_bitmap_detector(self):
+        """
+        Test "bitmap detector" algorithm finds a level shift.
+        """
+        ts = dict((t, t % 3) for t in range(300))
+        ts.update((t, t % 3 + 10) for t in range(150, 160))
+        detector = AnomalyDetector(ts, algorithm_name='bitmap_detector',
+                                   algorithm_params={'lag_window_size': 30, 'future_window_size': 30})
+        scores = detector.get_all_scores()
+        self.assertEqual(scores.values[:30], [0] * 30)
+        self.assertEqual(scores.values[-29:], [0] * 29)
+        # Both the start and the end of the level shift are anomalies.
+        anomalies = detector.get_anomalies()
+        self.assertEqual(len(anomalies), 2)
+        self.assertTrue(anomalies[0].start_timestamp < 150 < anomalies[0].end_timestamp)
+        self.assertTrue(anomalies[1].start_timestamp < 160 < anomalies[1].end_timestamp)
+
+    def test_detect_many(self):
+        """
+        Test if detect_many gives the same results as AnomalyDetector for each time series.
+        """
+        s3 = dict((t, t % 7 + (10 if 90 < t < 95 else 0)) for t in range(200))
+        series = {'s1': self.s1, 's2': self.s2, 's3': s3}
+        for workers in (1, 2):
+            scores, anomalies, errors = detect_many(dict(series, empty={}, missing='missing.csv'), workers=workers,
+                                                    algorithm_name='bitmap_detector')
+            for name, time_series in series.items():
+                detector = AnomalyDetector(time_series, algorithm_name='bitmap_detector')
+                self.assertEqual(scores[name], detector.get_all_scores())
+                self.assertEqual([vars(anomaly) for anomaly in anomalies[name]],
+                                 [vars(anomaly) for anomaly in detector.get_anomalies()])
+                self.assertTrue(scores[name].values_array.flags.owndata)
+            # Time series which can not be scored are reported without stopping the others.
+            self.assertEqual(sorted(errors), ['empty', 'missing'])
+            self.assertEqual(sorted(scores), ['s1', 's2', 's3'])
+
+    def test_exp_avg_detector_lag_window(self):
+        """
+        Test if "exp avg detector" with a lagging window computes the ema of each lagging window.
+        """
+        ts = dict((t, (t * 7) % 11 + (20 if 40 < t < 45 else 0)) for t in range(100))
+        time_series = TimeSeries(ts)
+        values = time_series.values
+        stdev = time_series.stdev()
+        scores = []
+        for i, value in enumerate(values):
+            ema = utils.compute_ema(0.2, values[max(0, i - 10): i + 1])[-1]
+            scores.append(abs(value - ema) / stdev)
+        algorithm = ExpAvgDetector(time_series, use_lag_window=True, lag_window_size=10)
+        for score, expected_score in zip(algorithm.run().values, algorithm._denoise_scores(scores)):
+            self.assertAlmostEqual(score, expected_score)
+        self.assertNotEqual(algorithm.run(), ExpAvgDetector(time_series).run())
+        # Time series shorter than 5 points get a lagging window of 0 points before each point.
+        detector = AnomalyDetector({1: 1, 2: 5, 3: 2, 4: 8}, algorithm_name='exp_avg_detector',
+                                   algorithm_params={'use_lag_window': True})
+        self.assertEqual(detector.get_all_scores().values, [0, 0, 0, 0])
+
+    def test_derivative_detector_batch(self):
+        """
+        Test if derivative scores of a batch of aligned time series equal the scores of each time series.
+        """
+        timestamps = numpy.array([0, 1, 1, 3, 6, 7, 8, 8, 9])
+        values = numpy.array([list(self.s1.values()), list(self.s2.values()), [3] * 9], dtype=numpy.float64)
+        derivatives = derivative_detector.compute_derivatives(timestamps, values)
+        self.assertEqual(derivatives[0].tolist(), [0, 0, 0, 0, 1 / 3.0, 1, 0, 0, 2])
+        batch_scores = derivative_detector.compute_derivative_scores(derivatives)
+        for row in range(len(values)):
+            algorithm = derivative_detector.DerivativeDetector(TimeSeries.from_arrays(timestamps, values[row]))
+            self.assertTrue(numpy.allclose(batch_scores[row], algorithm._compute_anom_scores()))
+
+    def test_anomaly_intervals(self):
+        """
+        Test if every interval of scores above the threshold is an anomaly, including one at timestamp 0.
+        """
+        ts = {0: 100, 1: 0, 2: 0, 3: 50, 4: 60, 5: 0, 6: 40}
+        detector = AnomalyDetector(ts, algorithm_name='absolute_threshold',
+                                   algorithm_params={'absolute_threshold_value_upper': 10})
+        self.assertEqual([anomaly.get_time_window() for anomaly in detector.get_anomalies()], [(0, 0), (3, 4), (6, 6)])
+        self.assertEqual([anomaly.anomaly_score for anomaly in detector.get_anomalies()], [90, 50, 30])
+        self.assertEqual([anomaly.exact_timestamp for anomaly in detector.get_anomalies()], [0, 4, 6])
+
+    def test_lazy_detection(self):
+        """
+        Test if scores, anomaly intervals and anomalies are only computed when first asked for.
+        """
+        detector = AnomalyDetector(self.s1)
+        self.assertTrue(detector.anom_scores is None)
+        scores = detector.get_all_scores()
+        self.assertTrue(detector.get_all_scores() is scores)
+        self.assertTrue(detector.anomalies is None)
+        intervals = detector.get_anomaly_intervals()
+        self.assertTrue(detector.anomalies is None)
+        anomalies = detector.get_anomalies()
+        self.assertTrue(detector.get_anomalies() is anomalies)
+        self.assertEqual(intervals, [(anomaly.start_timestamp, anomaly.end_timestamp, anomaly.anomaly_score) for anomaly in anomalies])
+        self.assertEqual(AnomalyDetector(self.s1, score_only=True).get_anomaly_intervals(), [])
+
+    def test_score_arrays(self):
+        """
+        Test if algorithms compute float64 score arrays which are denoised in place.
+        """
+        s1, s2 = TimeSeries(self.s1), TimeSeries(self.s2)
+        for algorithm_class, algorithm_params in ((DiffPercentThreshold, {'percent_threshold_upper': 20, 'percent_threshold_lower': -20}),
+                                                  (CustomAlgo, {'percent_threshold_upper': 20, 'percent_threshold_lower': -20}),
+                                                  (ExpAvgDetector, {})):
+            scores = algorithm_class(s1, s2, **algorithm_params).run()
+            self.assertEqual(scores.values_array.dtype, numpy.float64)
+            self.assertEqual(scores.timestamps, s1.timestamps)
+        self.assertEqual(DiffPercentThreshold(s1, s2, percent_threshold_upper=20).run().values,
+                         CustomAlgo(s1, s2, percent_threshold_upper=20).run().values)
+        self.assertRaises(ValueError, lambda: DiffPercentThreshold(s1, TimeSeries({0: 1}), percent_threshold_upper=20).run())
+
+        algorithm = AnomalyDetectorAlgorithm('algorithm', s1)
+        scores = numpy.array([100.0, 0.05, 0.2, 50.0])
+        self.assertTrue(algorithm._denoise_scores(scores) is scores)
+        self.assertEqual(scores.tolist(), [100.0, 0.0, 0.2, 50.0])
+
     def test_threshold(self):
         """
         Test score threshold=0
@@ -366,6 +526,51 @@ class TestAnomalyDetector(unittest.TestCase):
         """
         self.assertRaises(exceptions.AlgorithmNotFound, lambda: AnomalyDetector(self.s1, algorithm_name='NotValidAlgorithm'))
 
+    def test_algorithm_registry(self):
+        """
+        Test if algorithms are loaded lazily from module paths, classes and entry points.
+        """
+        class EntryPoint(object):
+            name = 'entry_point_algo'
+
+            def load(self):
+                return CustomAlgo
+
+        registry = registry_module.AlgorithmRegistry('luminol.test_algorithms', {
+            'exp_avg_detector': 'luminol.algorithms.anomaly_detector_algorithms.exp_avg_detector:ExpAvgDetector'})
+        registry.register('custom_algo', CustomAlgo)
+        iter_entry_points = registry_module._iter_entry_points
+        registry_module._iter_entry_points = lambda group: [EntryPoint()]
+        try:
+            self.assertTrue(registry['exp_avg_detector'] is ExpAvgDetector)
+            self.assertTrue(registry['custom_algo'] is CustomAlgo)
+            self.assertFalse(registry._entry_points_loaded)
+            self.assertTrue(registry['entry_point_algo'] is CustomAlgo)
+            self.assertEqual(list(registry), ['custom_algo', 'entry_point_algo', 'exp_avg_detector'])
+            self.assertRaises(KeyError, lambda: registry['NotValidAlgorithm'])
+        finally:
+            registry_module._iter_entry_points = iter_entry_points
+
+        # Algorithms can still be registered and looked up as in a dict.
+        anomaly_detector_algorithms['dict_algo'] = CustomAlgo
+        try:
+            self.assertTrue(anomaly_detector_algorithms.get('dict_algo') is CustomAlgo)
+            self.assertTrue(('dict_algo', CustomAlgo) in anomaly_detector_algorithms.items())
+            self.assertTrue(CustomAlgo in anomaly_detector_algorithms.values())
+            self.assertEqual(anomaly_detector_algorithms.get('NotValidAlgorithm'), None)
+            detector = AnomalyDetector(self.s1, algorithm_name='dict_algo', algorithm_params={'percent_threshold_upper': 20})
+            self.assertTrue(isinstance(detector.algorithm_instance, CustomAlgo))
+        finally:
+            del anomaly_detector_algorithms['dict_algo']
+        self.assertFalse('dict_algo' in anomaly_detector_algorithms)
+
+        # Neither the algorithm modules nor scipy are imported with the anomaly detector.
+        code = ('import sys; import luminol.anomaly_detector; '
+                'print(any(name.startswith("scipy") or name.endswith("bitmap_detector") for name in sys.modules))')
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+        self.assertEqual(output.strip(), b'False')
+
     def test_algorithm_params(self):
         """
         Test if optional parameter algorithm_params works as expected.
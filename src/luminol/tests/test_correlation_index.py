@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from luminol import exceptions
+from luminol.correlation_index import CorrelationIndex, _masked_correlations
+from luminol.modules.time_series import TimeSeries
+
+
+class TestCorrelationIndex(unittest.TestCase):
+
+    def setUp(self):
+        random_state = numpy.random.RandomState(0)
+        self.timestamps = numpy.arange(1000, dtype=numpy.int64)
+        self.target = numpy.cumsum(random_state.randn(1000))
+        self.series = {
+            'same': self.target * 2 + 1,
+            'noisy': self.target + random_state.randn(1000),
+            'inverse': -self.target,
+        }
+        for i in range(20):
+            self.series['random%d' % i] = numpy.cumsum(random_state.randn(1000))
+        self.index = CorrelationIndex(10)
+        for name, values in sorted(self.series.items()):
+            self.index.add(name, TimeSeries.from_arrays(self.timestamps, values))
+
+    def test_get_similar(self):
+        """
+        Test that the most similar time series are ranked first, with and without pruning.
+        """
+        target = TimeSeries.from_arrays(self.timestamps, self.target)
+        similar = self.index.get_similar(target, top_k=2, prune_factor=2)
+        self.assertEqual([name for name, _ in similar], ['same', 'noisy'])
+        self.assertAlmostEqual(similar[0][1], 1)
+        unpruned = self.index.get_similar(target, top_k=2, prune_factor=None)
+        self.assertEqual(unpruned, similar)
+        ranked = self.index.get_similar(target, (200, 600), top_k=30, prune_factor=None)
+        self.assertEqual(len(ranked), len(self.series))
+        self.assertEqual(ranked[-1][0], 'inverse')
+        self.assertAlmostEqual(ranked[-1][1], -1, places=3)
+        self.assertRaises(exceptions.NotEnoughDataPoints, lambda: self.index.get_similar(target, (2000, 3000)))
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: CorrelationIndex(0))
+
+    def test_masked_correlations(self):
+        """
+        Test that masked correlations stay precise for values with large offsets.
+        """
+        random_state = numpy.random.RandomState(2)
+        target = random_state.randn(50) + 1e8
+        values = numpy.array([target + random_state.randn(50), -target + 3e8])
+        mask = random_state.rand(50) > 0.2
+        coefficients = _masked_correlations(target, values, mask)
+        for row in range(2):
+            self.assertAlmostEqual(coefficients[row], numpy.corrcoef(target[mask], values[row, mask])[0, 1])
+        flat = numpy.full((2, 50), 0.1, dtype=numpy.float32)
+        flat[1] += 1e8
+        self.assertEqual(_masked_correlations(target, flat, mask).tolist(), [0, 0])
+
+    def test_incremental_add(self):
+        """
+        Test that adding points in several parts builds the same sketches as adding them at once.
+        """
+        index = CorrelationIndex(10)
+        values = self.series['noisy']
+        for start, end in ((500, 1000), (0, 250), (250, 500)):
+            index.add('noisy', TimeSeries.from_arrays(self.timestamps[start:end], values[start:end]))
+        row = self.index.rows['noisy']
+        self.assertEqual(index.first_bucket, self.index.first_bucket)
+        self.assertEqual(index.bucket_count, self.index.bucket_count)
+        numpy.testing.assert_allclose(index.means[0, :index.bucket_count], self.index.means[row, :self.index.bucket_count],
+                                      rtol=1e-6)
+        numpy.testing.assert_array_equal(index.counts[0, :index.bucket_count], self.index.counts[row, :self.index.bucket_count])
+        numpy.testing.assert_array_equal(index.words[0, :index._segment_count()],
+                                         self.index.words[row, :self.index._segment_count()])
+        for key, rows in index.postings.items():
+            self.assertTrue(row in self.index.postings[key])
+        one_by_one = CorrelationIndex(10)
+        for timestamp in numpy.random.RandomState(1).permutation(numpy.arange(920, 1000)):
+            one_by_one.add('noisy', TimeSeries.from_arrays(self.timestamps[timestamp:timestamp + 1],
+                                                           values[timestamp:timestamp + 1]))
+        self.assertEqual(one_by_one.first_bucket, 92)
+        numpy.testing.assert_array_equal(one_by_one.words[0, :2], index.words[0, 23:25])
+        self.assertEqual(sorted(one_by_one.postings), [(23, index.words[0, 23]), (24, index.words[0, 24])])
+
+    def test_inverted_index(self):
+        """
+        Test that candidates are found through shared SAX words, on the same scale for stored and queried time series.
+        """
+        target = TimeSeries.from_arrays(self.timestamps, self.target * 100 + 5000)
+        candidates = self.index._find_candidates(*self.index._get_window(target), candidate_number=3)
+        names = [self.index.names[row] for row in candidates]
+        self.assertTrue('same' in names)
+        self.assertTrue('inverse' not in names)
+        postings = dict((key, set(rows)) for key, rows in self.index.postings.items())
+        self.index.postings = None
+        self.assertEqual(self.index._get_postings(), postings)
+        flat = TimeSeries.from_arrays(self.timestamps, numpy.ones(1000))
+        self.assertEqual(self.index._find_candidates(*self.index._get_window(flat), candidate_number=3), None)
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: CorrelationIndex(10, precision=16, word_size=8))
+
+    def test_save_load(self):
+        """
+        Test that a loaded index is memory-mapped, gives the same results and can still be updated.
+        """
+        path = tempfile.mkdtemp()
+        try:
+            self.index.save(path)
+            index = CorrelationIndex.load(path)
+            self.assertTrue(isinstance(index.means, numpy.memmap))
+            target = TimeSeries.from_arrays(self.timestamps, self.target)
+            self.assertEqual(index.get_similar(target, top_k=3), self.index.get_similar(target, top_k=3))
+            # New time series and buckets fit into the spare capacity, without copying the arrays into memory.
+            index.add('extra', TimeSeries.from_arrays(self.timestamps + 200, self.target))
+            self.assertTrue(isinstance(index.means, numpy.memmap))
+            self.assertEqual(index.bucket_count, 120)
+            self.assertEqual(index.get_similar(TimeSeries.from_arrays(self.timestamps + 200, self.target), top_k=1)[0][0],
+                             'extra')
+            index.add('later', TimeSeries.from_arrays(self.timestamps + 1000, self.target))
+            self.assertEqual(index.bucket_count, 200)
+            self.assertEqual(index.get_similar(TimeSeries.from_arrays(self.timestamps + 1000, self.target), top_k=1)[0][0],
+                             'later')
+            self.assertEqual(CorrelationIndex.load(path).names, self.index.names)
+            index.save(path)
+            reloaded = CorrelationIndex.load(path)
+            self.assertEqual(reloaded.names, index.names)
+            rows = len(index.names)
+            self.assertEqual(reloaded.bucket_count, index.bucket_count)
+            numpy.testing.assert_array_equal(reloaded.means[:rows, :index.bucket_count], index.means[:rows, :index.bucket_count])
+            numpy.testing.assert_array_equal(reloaded.words[:rows, :index._segment_count()],
+                                             index.words[:rows, :index._segment_count()])
+            self.assertEqual(reloaded.get_similar(target, top_k=3), index.get_similar(target, top_k=3))
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
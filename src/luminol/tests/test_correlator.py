@@ -14,11 +14,16 @@ import os
 import sys
 import unittest
 
+import numpy
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from luminol import exceptions
 from luminol import Luminol
+from luminol.correlation_matrix import CorrelationMatrix
 from luminol.correlator import Correlator
+from luminol.modules.time_series import TimeSeries
+from luminol.windowed_correlator import WindowedCorrelator
 
 
 class TestCorrelator(unittest.TestCase):
@@ -44,6 +49,17 @@ class TestCorrelator(unittest.TestCase):
         self.assertEqual(self.correlator1.get_correlation_result().coefficient, self.correlator2.get_correlation_result().coefficient)
         self.assertEqual(self.correlator1.get_correlation_result().shift, self.correlator2.get_correlation_result().shift)
 
+    def test_inputs_unchanged(self):
+        """
+        Test if correlating does not modify the time series passed in.
+        """
+        s1 = TimeSeries({0: 0, 1: 2, 2: 4, 3: 2})
+        s2 = TimeSeries({0: 1, 1: 3, 2: 1, 3: 1})
+        correlator = Correlator(s1, s2)
+        self.assertEqual(s1.values, [0.0, 2.0, 4.0, 2.0])
+        self.assertEqual(s2.values, [1.0, 3.0, 1.0, 1.0])
+        self.assertEqual(Correlator(s1, s2).get_correlation_result().coefficient, correlator.get_correlation_result().coefficient)
+
     def test_if_correlate(self):
         """
         Test if function is_correlated gives same result as function get_correlation_result
@@ -76,6 +92,20 @@ class TestCorrelator(unittest.TestCase):
         correlator = Correlator(self.s1, self.s2, algorithm_name='cross_correlator', algorithm_params={'max_shift_seconds': 0})
         self.assertNotEqual(self.correlator2.get_correlation_result().coefficient, correlator.get_correlation_result().coefficient)
 
+    def test_method(self):
+        """
+        Test if direct and FFT cross correlation give the same result.
+        """
+        s4 = dict((t, (t * 7) % 11 + (t % 5) * 0.5) for t in range(200))
+        s5 = dict((t, (t * 3) % 13) for t in range(200))
+        results = [Correlator(s4, s5, algorithm_name='cross_correlator', algorithm_params={'method': method}).get_correlation_result()
+                   for method in ('direct', 'fft', 'auto')]
+        for result in results[1:]:
+            self.assertEqual(results[0].shift, result.shift)
+            self.assertAlmostEqual(results[0].coefficient, result.coefficient)
+            self.assertAlmostEqual(results[0].shifted_coefficient, result.shifted_coefficient)
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: Correlator(s4, s5, algorithm_name='cross_correlator', algorithm_params={'method': 'fast'}))
+
     def test_sanity_check(self):
         """
         Test if exception NotEnoughDataPoints is raised as expected.
@@ -90,6 +120,179 @@ class TestCorrelator(unittest.TestCase):
         self.assertRaises(exceptions.InvalidDataFormat, lambda: Correlator(list(), 1))
 
 
+class TestCorrelationMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.s1 = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0.5, 5: 1, 6: 1, 7: 1, 8: 0}
+        self.candidates = {
+            's2': {0: 0, 1: 0.5, 2: 1, 3: 1, 4: 1, 5: 0, 6: 0, 7: 0, 8: 0},
+            's3': {0: 1, 1: 1, 2: 1, 3: 0.5, 4: 0, 5: 0, 6: 0, 7: 0, 8: 1},
+            's4': {0: 0, 1: 0, 2: 0, 3: 0, 4: 1, 5: 1, 6: 1, 7: 0, 8: 0},
+            's5': {0: 1}
+        }
+
+    def test_correlate_with_target(self):
+        """
+        Test if correlating with a target gives the same results as Correlator.
+        """
+        matrix = CorrelationMatrix(self.s1, self.candidates)
+        results = matrix.get_correlation_results()
+        self.assertEqual(sorted(results.keys()), ['s2', 's3', 's4'])
+        for name, result in results.items():
+            correlation_result = Correlator(self.s1, self.candidates[name]).get_correlation_result()
+            self.assertEqual(correlation_result.shift, result.shift)
+            self.assertAlmostEqual(correlation_result.coefficient, result.coefficient)
+            self.assertAlmostEqual(correlation_result.shifted_coefficient, result.shifted_coefficient)
+        ranked = matrix.get_ranked_results()
+        self.assertEqual([name for name, result in ranked], ['s4', 's2', 's3'])
+        self.assertEqual([name for name, result in matrix.get_ranked_results(threshold=0.7)], ['s4', 's2'])
+
+    def test_top_k(self):
+        """
+        Test if keeping the top results with pruning finds the same best candidates as a full scan.
+        """
+        random_state = numpy.random.RandomState(0)
+        timestamps = numpy.arange(1024)
+        values = numpy.cumsum(random_state.randn(1024))
+        target = TimeSeries.from_arrays(timestamps, values)
+        candidates = dict(('s%d' % i, TimeSeries.from_arrays(timestamps, numpy.cumsum(random_state.randn(1024)))) for i in range(30))
+        candidates['close'] = TimeSeries.from_arrays(timestamps, values + random_state.randn(1024))
+        candidates['far'] = TimeSeries.from_arrays(timestamps, values + 5 * random_state.randn(1024))
+        expected = CorrelationMatrix(target, candidates).get_ranked_results()[:2]
+        for prune_factor in (None, 2):
+            matrix = CorrelationMatrix(target, candidates, top_k=2, prune_factor=prune_factor)
+            ranked = matrix.get_ranked_results()
+            self.assertEqual([name for name, result in ranked], ['close', 'far'])
+            self.assertEqual([result.coefficient for name, result in ranked], [result.coefficient for name, result in expected])
+        self.assertEqual(len(CorrelationMatrix(self.candidates, top_k=2).get_correlation_results()), 2)
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: CorrelationMatrix(self.s1, self.candidates, top_k=0))
+
+    def test_correlate_all_pairs(self):
+        """
+        Test if correlating every time series with each other gives the same results as Correlator.
+        """
+        results = CorrelationMatrix(self.candidates).get_correlation_results()
+        self.assertEqual(len(results), 6)
+        for (name_a, name_b), result in results.items():
+            correlation_result = Correlator(self.candidates[name_a], self.candidates[name_b]).get_correlation_result()
+            self.assertAlmostEqual(correlation_result.coefficient, result.coefficient)
+
+    def test_irregular_timestamps(self):
+        """
+        Test if time series sampled at different timestamps give the same results as Correlator, which aligns each pair on its own.
+        """
+        random_state = numpy.random.RandomState(0)
+        series = {}
+        for i in range(6):
+            timestamps = numpy.sort(random_state.choice(300, 60 + 10 * (i % 3), replace=False))
+            series['s%d' % i] = TimeSeries.from_arrays(timestamps, numpy.cumsum(random_state.randn(len(timestamps))))
+        target = series.pop('s0')
+        params = {'max_shift_seconds': 20}
+        for time_period in (None, (50, 200)):
+            results = CorrelationMatrix(target, series, time_period=time_period, algorithm_params=params).get_correlation_results()
+            self.assertEqual(len(results), 5)
+            for name, result in results.items():
+                correlation_result = Correlator(target, series[name], time_period=time_period, algorithm_params=params).get_correlation_result()
+                self.assertEqual(correlation_result.shift, result.shift)
+                self.assertAlmostEqual(correlation_result.coefficient, result.coefficient)
+                self.assertAlmostEqual(correlation_result.shifted_coefficient, result.shifted_coefficient)
+        results = CorrelationMatrix(series, algorithm_params=params).get_correlation_results()
+        self.assertEqual(len(results), 20)
+        for (name_a, name_b), result in results.items():
+            correlation_result = Correlator(series[name_a], series[name_b], algorithm_params=params).get_correlation_result()
+            self.assertEqual(correlation_result.shift, result.shift)
+            self.assertAlmostEqual(correlation_result.coefficient, result.coefficient)
+
+    def test_invalid_input(self):
+        """
+        Test if exceptions are raised as expected.
+        """
+        self.assertRaises(exceptions.NotEnoughDataPoints, lambda: CorrelationMatrix({0: 0}, self.candidates))
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: CorrelationMatrix(self.s1, list()))
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: CorrelationMatrix(self.s1, self.candidates, algorithm_params=1))
+
+
+class TestWindowedCorrelator(unittest.TestCase):
+
+    def setUp(self):
+        self.s1 = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0.5, 5: 1, 6: 1, 7: 1, 8: 0, 9: 3, 10: 1, 11: -2, 12: 0}
+        self.s2 = {0: 0, 1: 0.5, 2: 1, 3: 1, 4: 1, 5: 0, 6: 0, 7: 0, 8: 0, 9: -1, 10: -2, 11: -1, 12: -3}
+
+    def test_windows(self):
+        """
+        Test if correlations within time windows match Correlator on the same time period.
+        """
+        correlator = WindowedCorrelator(self.s1, self.s2, algorithm_params={'max_shift_seconds': 2})
+        for time_period in [None, (0, 12), (2, 7), (4, 9), (9, 12), (-5, 3)]:
+            result = correlator.get_correlation_result(time_period)
+            expected = Correlator(self.s1, self.s2, time_period=time_period,
+                                  algorithm_params={'max_shift_seconds': 2}).get_correlation_result()
+            self.assertEqual(result.shift, expected.shift)
+            self.assertAlmostEqual(result.coefficient, expected.coefficient)
+            self.assertAlmostEqual(result.shifted_coefficient, expected.shifted_coefficient)
+        self.assertRaises(exceptions.NotEnoughDataPoints, lambda: correlator.get_correlation_result((12, 20)))
+        self.assertFalse(correlator.is_correlated((2, 7), threshold=1.1))
+        a_values = [self.s1[timestamp] for timestamp in range(2, 8)]
+        b_values = [self.s2[timestamp] for timestamp in range(2, 8)]
+        self.assertAlmostEqual(correlator.get_unshifted_coefficient((2, 7)), numpy.corrcoef(a_values, b_values)[0, 1])
+
+    def test_irregular_timestamps(self):
+        """
+        Test if time series sampled at different timestamps match Correlator, which crops them before aligning them.
+        """
+        random_state = numpy.random.RandomState(0)
+        timestamps_a = numpy.sort(random_state.choice(300, 120, replace=False))
+        timestamps_b = numpy.sort(random_state.choice(300, 60, replace=False))
+        time_series_a = TimeSeries.from_arrays(timestamps_a, numpy.cumsum(random_state.randn(120)))
+        time_series_b = TimeSeries.from_arrays(timestamps_b, numpy.cumsum(random_state.randn(60)))
+        params = {'max_shift_seconds': 10}
+        correlator = WindowedCorrelator(time_series_a, time_series_b, algorithm_params=params)
+        for start in range(0, 280, 7):
+            time_period = (start, start + 20 + start % 40)
+            try:
+                expected = Correlator(time_series_a, time_series_b, time_period=time_period,
+                                      algorithm_params=params).get_correlation_result()
+            except exceptions.NotEnoughDataPoints:
+                self.assertRaises(exceptions.NotEnoughDataPoints, lambda: correlator.get_correlation_result(time_period))
+                continue
+            result = correlator.get_correlation_result(time_period)
+            self.assertEqual(result.shift, expected.shift)
+            self.assertAlmostEqual(result.coefficient, expected.coefficient)
+            self.assertAlmostEqual(result.shifted_coefficient, expected.shifted_coefficient)
+            a, b = time_series_a.crop(*time_period).align(time_series_b.crop(*time_period))
+            self.assertAlmostEqual(correlator.get_unshifted_coefficient(time_period),
+                                   numpy.corrcoef(a.values_array / a.values_array.max(), b.values_array / b.values_array.max())[0, 1])
+
+    def test_flat_window(self):
+        """
+        Test if a window where a time series is flat has no correlation.
+        """
+        correlator = WindowedCorrelator(self.s1, self.s2)
+        self.assertEqual(correlator.get_correlation_result((0, 3)).coefficient, 0)
+
+    def test_level_shift(self):
+        """
+        Test if windows around a large level shift, which vary far less than all the values, match Correlator.
+        """
+        random_state = numpy.random.RandomState(0)
+        timestamps = numpy.arange(20000)
+        noise = random_state.randn(20000)
+        level = numpy.where(timestamps >= 10000, 1e7, 0)
+        time_series_a = TimeSeries.from_arrays(timestamps, noise + level)
+        time_series_b = TimeSeries.from_arrays(timestamps, 2 * noise + 0.3 * random_state.randn(20000) + level)
+        params = {'max_shift_seconds': 5}
+        correlator = WindowedCorrelator(time_series_a, time_series_b, algorithm_params=params)
+        for time_period in [(15000, 15100), (100, 5000), (9950, 10050)]:
+            result = correlator.get_correlation_result(time_period)
+            expected = Correlator(time_series_a, time_series_b, time_period=time_period,
+                                  algorithm_params=params).get_correlation_result()
+            self.assertEqual(result.shift, expected.shift)
+            self.assertAlmostEqual(result.coefficient, expected.coefficient)
+            self.assertAlmostEqual(result.shifted_coefficient, expected.shifted_coefficient)
+        self.assertEqual(correlator.get_correlation_result((15000, 15100)).shift, 0)
+        self.assertTrue(correlator.get_unshifted_coefficient((15000, 15100)) > 0.9)
+
+
 class TestLuminol(unittest.TestCase):
     def setUp(self):
         self.anomaly = ['A', 'B']
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from luminol import exceptions
+from luminol.algorithms.anomaly_detector_algorithms import AnomalyDetectorAlgorithm
+from luminol.algorithms.anomaly_detector_algorithms.bitmap_detector import BitmapDetector
+from luminol.anomaly_detector import AnomalyDetector
+from luminol.correlator import Correlator
+from luminol.modules.time_series import TimeSeries
+from luminol.score_cache import ScoreCache
+
+
+class TestScoreCache(unittest.TestCase):
+
+    def setUp(self):
+        self.s1 = TimeSeries({0: 0, 1: 0, 2: 0, 3: 0, 4: 1, 5: 2, 6: 2, 7: 2, 8: 0})
+        self.s2 = TimeSeries({0: 0, 1: 1, 2: 2, 3: 2, 4: 2, 5: 0, 6: 0, 7: 0, 8: 0})
+
+    def test_detector_cache(self):
+        """
+        Test if anomaly scores are computed once per time series content, algorithm and params.
+        """
+        cache = ScoreCache()
+        scores = AnomalyDetector(self.s1, score_cache=cache).get_all_scores()
+        self.assertEqual(len(cache), 1)
+        detector = AnomalyDetector(TimeSeries(dict(self.s1.items())), score_cache=cache)
+        detector.algorithm_instance = None
+        self.assertEqual(detector.get_all_scores(), scores)
+        self.assertEqual(len(cache), 1)
+
+        # Cached scores can not be changed through the returned scores.
+        scores[4] = 100
+        self.assertNotEqual(AnomalyDetector(self.s1, score_cache=cache).get_all_scores(), scores)
+
+        AnomalyDetector(self.s1, algorithm_name='exp_avg_detector', score_cache=cache).get_all_scores()
+        AnomalyDetector(self.s1, algorithm_name='exp_avg_detector', algorithm_params={'smoothing_factor': 0.3},
+                        score_cache=cache).get_all_scores()
+        AnomalyDetector(self.s2, score_cache=cache).get_all_scores()
+        self.assertEqual(len(cache), 4)
+
+    def test_default_detector_cache(self):
+        """
+        Test if scores of the default detector, used when the algorithm has too few data points, are detected
+        with the default detector's threshold whether they are cached or not.
+        """
+        class TooFewPoints(AnomalyDetectorAlgorithm):
+            def __init__(self, time_series, baseline_time_series=None):
+                super(TooFewPoints, self).__init__(self.__class__.__name__, time_series, baseline_time_series)
+
+            def _set_scores(self):
+                raise exceptions.NotEnoughDataPoints
+
+        cache = ScoreCache()
+        detector = AnomalyDetector(self.s1, algorithm_class=TooFewPoints, score_cache=cache)
+        intervals = detector.get_anomaly_intervals()
+        self.assertEqual(len(cache), 1)
+        cached_detector = AnomalyDetector(self.s1, algorithm_class=TooFewPoints, score_cache=cache)
+        self.assertEqual(cached_detector.get_anomaly_intervals(), intervals)
+        self.assertEqual(cached_detector.threshold, detector.threshold)
+        self.assertTrue(detector.threshold is not None)
+        self.assertEqual(cached_detector.get_all_scores(), detector.get_all_scores())
+
+    def test_eviction(self):
+        """
+        Test if the least recently used scores are evicted beyond the memory cap.
+        """
+        size = 2 * 8 * len(self.s1)
+        cache = ScoreCache(max_bytes=2 * size)
+        keys = [cache.make_key(TimeSeries({0: i}), None, BitmapDetector, {}) for i in range(3)]
+        cache.put(keys[0], self.s1)
+        cache.put(keys[1], self.s1)
+        self.assertTrue(cache.get(keys[0]) is not None)
+        cache.put(keys[2], self.s1)
+        self.assertEqual(cache.nbytes, 2 * size)
+        self.assertTrue(keys[0] in cache)
+        self.assertFalse(keys[1] in cache)
+        self.assertTrue(keys[2] in cache)
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+    def test_correlator_cache(self):
+        """
+        Test if correlating anomaly scores shares the scores through the cache.
+        """
+        cache = ScoreCache()
+        result = Correlator(self.s1, self.s2, use_anomaly_score=True, score_cache=cache).get_correlation_result()
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(Correlator(self.s1, self.s2, use_anomaly_score=True, score_cache=cache).get_correlation_result().coefficient,
+                         result.coefficient)
+        self.assertEqual(len(cache), 2)
+
+    def test_threads(self):
+        """
+        Test if the memory used stays consistent when several threads use a cache at once.
+        """
+        size = 2 * 8 * len(self.s1)
+        cache = ScoreCache(max_bytes=5 * size)
+
+        def use_cache(thread):
+            for i in range(200):
+                key = cache.make_key(TimeSeries({0: i % 20}), None, BitmapDetector, {'thread': thread % 2})
+                cache.put(key, self.s1)
+                cache.get(key)
+                if i % 7 == 0:
+                    cache.discard(key)
+
+        threads = [threading.Thread(target=use_cache, args=(thread,)) for thread in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.nbytes, len(cache) * size)
+        self.assertTrue(cache.nbytes <= cache.max_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
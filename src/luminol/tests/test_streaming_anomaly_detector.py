@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from luminol import exceptions, utils
+from luminol.algorithms.anomaly_detector_algorithms.bitmap_detector import BitmapDetector
+from luminol.algorithms.streaming_anomaly_detector_algorithms.bitmap_detector import StreamingBitmapDetector
+from luminol.constants import DEFAULT_BITMAP_PRECISION
+from luminol.modules.time_series import TimeSeries
+from luminol.streaming_anomaly_detector import StreamingAnomalyDetector
+
+
+class TestStreamingAnomalyDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.s1 = [(t, 1) for t in range(300)]
+        self.s1[150:155] = [(t, 30) for t in range(150, 155)]
+        self.s2 = [(t, t % 3) for t in range(300)]
+        self.s2[150:155] = [(t, 30) for t in range(150, 155)]
+
+    def test_anomalies(self):
+        """
+        Test that anomalies are opened and closed as data points arrive.
+        """
+        detector = StreamingAnomalyDetector(algorithm_name='default_detector')
+        for timestamp, value in self.s1[:151]:
+            detector.update(timestamp, value)
+        self.assertEqual(len(detector.get_anomalies()), 0)
+        self.assertEqual(detector.get_current_anomaly().start_timestamp, 150)
+
+        for timestamp, value in self.s1[151:]:
+            detector.update(timestamp, value)
+        anomalies = detector.get_anomalies()
+        self.assertTrue(len(anomalies) > 0)
+        self.assertEqual(anomalies[0].start_timestamp, 150)
+        self.assertTrue(150 <= anomalies[0].exact_timestamp <= anomalies[0].end_timestamp)
+
+    def test_bitmap_detector(self):
+        """
+        Test that the streaming bitmap detector gives the same scores as the bitmap detector
+        when the value sections are the same.
+        """
+        time_series = TimeSeries(dict(self.s2))
+        detector = BitmapDetector(time_series, lag_window_size=30, future_window_size=20)
+        scores = detector.run().values
+        streaming_detector = StreamingBitmapDetector(lag_window_size=30, future_window_size=20,
+                                                     value_min=time_series.min(), value_max=time_series.max())
+        streaming_scores = [streaming_detector.update(timestamp, value) for timestamp, value in self.s2]
+        self.assertEqual(streaming_scores[:49], [0] * 49)
+        self.assertEqual(streaming_scores[49:], scores[30: 281])
+
+        # Without a fixed value range, the SAX representation follows the minimal and maximal values in the windows.
+        values = [(t * 7) % 11 + (30 if 150 <= t < 155 else 0) for t in range(300)]
+        streaming_detector = StreamingBitmapDetector(lag_window_size=30, future_window_size=20, chunk_size=3)
+        for i, value in enumerate(values):
+            score = streaming_detector.update(i, value)
+            if i < 49:
+                self.assertEqual(score, 0)
+                continue
+            sax = utils.compute_sax(values[i - 49: i + 1], DEFAULT_BITMAP_PRECISION).tolist()
+            lag_chunks = [tuple(sax[j: j + 3]) for j in range(28)]
+            future_chunks = [tuple(sax[j: j + 3]) for j in range(30, 48)]
+            self.assertEqual(score, sum((future_chunks.count(chunk) - lag_chunks.count(chunk)) ** 2
+                                        for chunk in set(lag_chunks + future_chunks)))
+
+    def test_sign_test(self):
+        """
+        Test that the streaming sign test scores each point with the count of the latest scan window.
+        """
+        detector = StreamingAnomalyDetector(algorithm_name='sign_test',
+                                            algorithm_params={'percent_threshold_upper': 20, 'scan_window': 24})
+        values = [1.200001 if 10 <= t < 34 else 1 for t in range(100)]
+        scores = [detector.update(t, value, 1) for t, value in enumerate(values)]
+        threshold, _ = utils.get_sign_test_table(24, 0.01)
+        for t, score in enumerate(scores):
+            count = sum(1 for value in values[max(0, t - 23): t + 1] if value > 1.2)
+            if t >= 23 and count > threshold:
+                self.assertAlmostEqual(score, 100 * utils.pbinom(count, 24))
+            else:
+                self.assertEqual(score, 0)
+        anomalies = detector.get_anomalies()
+        self.assertEqual(len(anomalies), 1)
+        self.assertEqual(anomalies[0].get_time_window(), (27, 39))
+
+        detector = StreamingAnomalyDetector(algorithm_name='sign_test', algorithm_params={'percent_threshold_lower': -20, 'scan_window': 24})
+        self.assertRaises(exceptions.RequiredParametersNotPassed, lambda: detector.update(1, 1))
+        self.assertRaises(exceptions.RequiredParametersNotPassed, lambda: StreamingAnomalyDetector(algorithm_name='sign_test'))
+
+    def test_invalid_input(self):
+        """
+        Test if exceptions are raised as expected.
+        """
+        self.assertRaises(exceptions.AlgorithmNotFound, lambda: StreamingAnomalyDetector(algorithm_name='NotValidAlgorithm'))
+        detector = StreamingAnomalyDetector()
+        detector.update(1, 1)
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: detector.update(1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import array
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from luminol.modules.time_series import TimeSeries
+
+
+class TestTimeSeries(unittest.TestCase):
+
+    def setUp(self):
+        self.s1 = TimeSeries({0: 0, 1: 1, 3: 3, 5: 5, 8: None, 9: 9})
+
+    def test_storage(self):
+        """
+        Test that timestamps and values are stored as sorted int64 and float64 arrays.
+        """
+        self.assertEqual(self.s1.timestamps_array.dtype, numpy.int64)
+        self.assertEqual(self.s1.values_array.dtype, numpy.float64)
+        self.assertEqual(self.s1.timestamps, [0, 1, 3, 5, 9])
+        self.assertEqual(self.s1.values, [0.0, 1.0, 3.0, 5.0, 9.0])
+        self.assertEqual(self.s1.start, 0)
+        self.assertEqual(self.s1.end, 9)
+
+    def test_from_arrays(self):
+        """
+        Test creating time series from arrays and buffers without copying them.
+        """
+        timestamps = numpy.array([3, 1, 2], dtype=numpy.int64)
+        values = array.array('d', [3.0, 1.0, 2.0])
+        time_series = TimeSeries.from_arrays(timestamps, values)
+        self.assertTrue(time_series.timestamps_array is timestamps)
+        self.assertTrue(numpy.shares_memory(time_series.values_array, numpy.frombuffer(values)))
+
+        time_series = TimeSeries.from_arrays(timestamps, values, assume_sorted=False)
+        self.assertEqual(time_series.items(), [(1, 1.0), (2, 2.0), (3, 3.0)])
+        self.assertRaises(ValueError, lambda: TimeSeries.from_arrays([1, 2], [1.0]))
+
+        time_series = TimeSeries.from_buffer(bytearray(time_series.timestamps_array.tobytes()),
+                                             memoryview(time_series.values_array))
+        self.assertEqual(time_series, TimeSeries({1: 1, 2: 2, 3: 3}))
+
+    def test_copy_on_write(self):
+        """
+        Test that setting data points does not change the arrays or buffers a time series was created from.
+        """
+        timestamps = numpy.array([1, 2, 3], dtype=numpy.int64)
+        values = numpy.array([1.0, 2.0, 3.0])
+        time_series = TimeSeries.from_arrays(timestamps, values)
+        time_series[2] = 20
+        time_series[4] = 4
+        self.assertEqual(values.tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(time_series.items(), [(1, 1.0), (2, 20.0), (3, 3.0), (4, 4.0)])
+
+        time_series = TimeSeries.from_buffer(timestamps.tobytes(), values.tobytes())
+        time_series[1] = 10
+        self.assertEqual(time_series.values, [10.0, 2.0, 3.0])
+        time_series[3] = 30
+        self.assertEqual(time_series.values, [10.0, 2.0, 30.0])
+
+    def test_lookup(self):
+        """
+        Test getting, setting and deleting values by timestamp.
+        """
+        self.assertEqual(self.s1[3], 3.0)
+        self.assertTrue(5 in self.s1)
+        self.assertFalse(4 in self.s1)
+        self.assertRaises(ValueError, lambda: self.s1[4])
+
+        self.s1[4] = 4
+        self.s1[1] = 10
+        self.assertEqual(self.s1.timestamps, [0, 1, 3, 4, 5, 9])
+        self.assertEqual(self.s1.values, [0.0, 10.0, 3.0, 4.0, 5.0, 9.0])
+
+        self.s1[0] = None
+        del self.s1[9]
+        del self.s1[100]
+        self.assertEqual(self.s1.items(), [(1, 10.0), (3, 3.0), (4, 4.0), (5, 5.0)])
+
+        self.s1[6.0] = 6
+        self.assertEqual(self.s1.timestamps, [1, 3, 4, 5, 6])
+        for key in (5.5, 'a', None):
+            self.assertRaises(ValueError, self.s1.__setitem__, key, 1)
+        self.assertEqual(self.s1.timestamps, [1, 3, 4, 5, 6])
+
+    def test_crop(self):
+        """
+        Test cropping a time series by timestamps.
+        """
+        cropped = self.s1.crop(1, 6)
+        self.assertEqual(cropped.timestamps, [1, 3, 5])
+        self.assertEqual(cropped.values, [1.0, 3.0, 5.0])
+        self.assertRaises(ValueError, lambda: self.s1.crop(6, 8))
+
+    def test_arithmetic(self):
+        """
+        Test binary operations between time series and with constants.
+        """
+        s2 = TimeSeries({1: 2, 2: 2, 3: 0, 9: 3})
+        self.assertEqual((self.s1 + s2).items(), [(1, 3.0), (3, 3.0), (9, 12.0)])
+        self.assertEqual((self.s1 - s2).items(), [(1, -1.0), (3, 3.0), (9, 6.0)])
+        self.assertEqual((2 - s2).items(), [(1, 0.0), (2, 0.0), (3, 2.0), (9, -1.0)])
+        self.assertEqual((s2 * 2).values, [4.0, 4.0, 0.0, 6.0])
+        # Points that would divide by zero are dropped.
+        self.assertEqual((self.s1 / s2).items(), [(1, 0.5), (9, 3.0)])
+        self.assertEqual((6 / s2).items(), [(1, 3.0), (2, 3.0), (9, 2.0)])
+        self.assertRaises(ValueError, lambda: self.s1 / 0)
+        self.assertRaises(ValueError, lambda: TimeSeries({}) + 1)
+
+    def test_align(self):
+        """
+        Test aligning two time series on the union of their timestamps.
+        """
+        s2 = TimeSeries({2: 2, 3: 0, 11: 3})
+        aligned, other_aligned = self.s1.align(s2)
+        self.assertEqual(aligned.timestamps, [0, 1, 2, 3, 5, 9, 11])
+        self.assertEqual(other_aligned.timestamps, aligned.timestamps)
+        self.assertEqual(aligned.values, [0.0, 1.0, 3.0, 3.0, 5.0, 9.0, 9.0])
+        self.assertEqual(other_aligned.values, [2.0, 2.0, 2.0, 0.0, 3.0, 3.0, 3.0])
+
+        intersected, other_intersected = self.s1.intersect(s2)
+        self.assertEqual(intersected.items(), [(3, 3.0)])
+        self.assertEqual(other_intersected.items(), [(3, 0.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
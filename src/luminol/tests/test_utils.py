@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from luminol import exceptions, utils
+from luminol.anomaly_detector import AnomalyDetector
+
+
+class TestReadCsv(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write_csv(self, lines):
+        """
+        Write lines into a csv file.
+        :param list lines: lines of the csv file.
+        :return str: path to the csv file.
+        """
+        csv_name = os.path.join(self.directory, 'data.csv')
+        with open(csv_name, 'w') as csv_data:
+            csv_data.write('\n'.join(lines))
+        return csv_name
+
+    def test_epoch_timestamps(self):
+        """
+        Test reading a csv file with epoch timestamps, duplicated timestamps and invalid values.
+        """
+        csv_name = self._write_csv(['3,3', '1,1', '2,x', '3,4', '', '5.5,5'])
+        timestamps, values = utils.read_csv_arrays(csv_name)
+        self.assertEqual(timestamps.tolist(), [1.0, 3.0, 5.5])
+        self.assertEqual(values.tolist(), [1.0, 4.0, 5.0])
+        self.assertEqual(utils.read_csv(csv_name), {1.0: 1.0, 3.0: 4.0, 5.5: 5.0})
+        self.assertEqual(AnomalyDetector(csv_name).time_series.timestamps, [1, 3, 5])
+
+    def test_formatted_timestamps(self):
+        """
+        Test if formatted timestamps are converted as to_epoch does.
+        """
+        for lines in (['2015-01-01 00:00:00,1', '2015-01-01 00:00:01,2', '2015-07-01 12:30:00,3'],
+                      ['20150101_00:00:00.5,1', '20150701_12:30:00.25,2'],
+                      ['2015-01-01T00:00:00,1', '20150101T00:00:01,2', '2015-07-01 12:30:00,3']):
+            timestamps, values = utils.read_csv_arrays(self._write_csv(lines))
+            self.assertEqual(timestamps.tolist(), [utils.to_epoch(line.split(',')[0]) for line in lines])
+            self.assertEqual(values.tolist(), [float(line.split(',')[1]) for line in lines])
+
+    def test_invalid_timestamps(self):
+        """
+        Test if exception InvalidDataFormat is raised as expected.
+        """
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: utils.read_csv_arrays(self._write_csv(['time,value', '1,1'])))
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: utils.read_csv_arrays(1))
+        # numpy would parse these, but to_epoch does not accept them.
+        for lines in (['2015-01-01 00:00:00,1', '2015-01-01 00:00:01+01:00,2'],
+                      ['20150101T00:00:00,1', '20150101T00:00:01Z,2']):
+            self.assertRaises(exceptions.InvalidDataFormat, lambda: utils.read_csv_arrays(self._write_csv(lines)))
+        self.assertRaises(exceptions.InvalidDataFormat, lambda: utils.read_csv_arrays(self._write_csv(['1,1', '2'])))
+
+
+class TestComputeEma(unittest.TestCase):
+
+    def test_compute_ema(self):
+        """
+        Test if ema follows its recurrence, for one or many time series.
+        """
+        points = [[1, 2, 3, 0, 5], [0, 0, 10, 0, 0]]
+        for row in points:
+            ema = [row[0]]
+            for point in row[1:]:
+                ema.append(0.2 * point + 0.8 * ema[-1])
+            self.assertTrue(isinstance(utils.compute_ema(0.2, row), list))
+            self.assertTrue(numpy.allclose(utils.compute_ema(0.2, row), ema))
+            self.assertTrue(numpy.allclose(utils._compute_ema(0.2, points)[points.index(row)], ema))
+        self.assertEqual(utils.compute_ema(0.2, []), [])
+
+    def test_compute_windowed_ema(self):
+        """
+        Test if windowed ema equals the ema of each lagging window.
+        """
+        points = numpy.array([[1, 2, 3, 0, 5, 4, 1], [0, 0, 10, 0, 0, 1, 2]])
+        windowed_ema = utils.compute_windowed_ema(0.3, points, 2)
+        for i in range(points.shape[1]):
+            for row in range(2):
+                ema = utils.compute_ema(0.3, points[row, max(0, i - 2): i + 1])[-1]
+                self.assertAlmostEqual(windowed_ema[row, i], ema)
+        self.assertEqual(utils.compute_windowed_ema(0.3, points, 0).tolist(), points.tolist())
+        self.assertEqual(utils.compute_windowed_ema(0.3, [1, 5, 2], 0).tolist(), [1, 5, 2])
+
+
+
+class TestComputeSaxChunkCodes(unittest.TestCase):
+
+    def test_compute_sax_chunk_codes(self):
+        """
+        Test that chunks are read as base-precision numbers, without overflowing for long chunks.
+        """
+        self.assertEqual(utils.compute_sax_chunk_codes([1, 2, 3, 0], 4, 2).tolist(), [6, 11, 12])
+        # 16 ** 16 does not fit in int64, both chunks would get code 0 if it overflowed.
+        codes = utils.compute_sax_chunk_codes([1] + [0] * 17, 16, 17)
+        self.assertEqual(codes.tolist(), [16 ** 16, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
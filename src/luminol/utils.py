@@ -15,10 +15,11 @@ Utilities for luminol
 # from __future__ import unicode_literals
 import csv
 import datetime
+import numpy
+import re
 import time
 
 from luminol import constants, exceptions
-from scipy.stats import binom
 import sys
 
 
@@ -29,22 +30,118 @@ def compute_ema(smoothing_factor, points):
     :param list points: the data points.
     :return list: all ema in a list.
     """
-    ema = []
+    return _compute_ema(smoothing_factor, points).tolist()
+
+
+def _compute_ema(smoothing_factor, points):
+    """
+    Compute exponential moving average of points as an array.
+    The ema follows the linear recurrence ema[i] = smoothing_factor * points[i] + (1 - smoothing_factor) * ema[i - 1],
+    which is run as a linear filter over all the points at once.
+    :param float smoothing_factor: the smoothing factor.
+    :param points: the data points, or a 2-D array with the data points of one time series per row.
+    :return numpy.ndarray: all ema in an array of the same shape as points.
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    if points.shape[-1] == 0:
+        return points.copy()
+    # scipy is only imported once an ema is computed, it is slow to import.
+    from scipy.signal import lfilter
     # The initial point has a ema equal to itself.
-    if(len(points) > 0):
-        ema.append(points[0])
-    for i in range(1, len(points)):
-        ema.append(smoothing_factor * points[i] + (1 - smoothing_factor) * ema[i - 1])
+    initial_state = (1 - smoothing_factor) * points[..., :1]
+    ema, _ = lfilter([smoothing_factor], [1, smoothing_factor - 1], points, axis=-1, zi=initial_state)
+    return ema
+
+
+def compute_windowed_ema(smoothing_factor, points, window_size):
+    """
+    Compute exponential moving average of every point over a lagging window, in one pass.
+    The ema of point i is the ema of points[i - window_size: i + 1], starting from its first point.
+    With e the ema over all points before, it equals: e[i] - (1 - smoothing_factor) ** window_size * (e[s] - points[s])
+    where s = i - window_size is where the window starts, so points before the window do not count anymore.
+    :param float smoothing_factor: the smoothing factor.
+    :param points: the data points, or a 2-D array with the data points of one time series per row.
+    :param int window_size: lagging window size.
+    :return numpy.ndarray: all ema in an array of the same shape as points.
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    # A window of a single point has an ema equal to the point.
+    if window_size < 1:
+        return points.copy()
+    ema = _compute_ema(smoothing_factor, points)
+    if window_size < points.shape[-1]:
+        decay = (1 - smoothing_factor) ** window_size
+        ema[..., window_size:] -= decay * (ema[..., :-window_size] - points[..., :-window_size])
     return ema
 
 
+def compute_sax(values, precision, value_min=None, value_max=None):
+    """
+    Compute SAX representation(Symbolic Aggregate approXimation) of a list of points.
+    The value range is broken into precision sections of equal height, and each point is
+    represented by the number of the section it falls into.
+    :param values: the data points.
+    :param int precision: how many sections to categorize values.
+    :param float value_min: lower bound of the value range, the minimal value by default.
+    :param float value_max: upper bound of the value range, the maximal value by default.
+    :return numpy.ndarray: section number of each point, as the smallest unsigned integer type that fits.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    dtype = numpy.min_scalar_type(max(precision - 1, 0))
+    if not len(values):
+        return numpy.zeros(0, dtype=dtype)
+    value_min = numpy.nanmin(values) if value_min is None else value_min
+    value_max = numpy.nanmax(values) if value_max is None else value_max
+    section_height = (value_max - value_min) / precision
+    # Lower bound of each section.
+    sections = value_min + numpy.arange(precision) * section_height
+    sax = numpy.searchsorted(sections, values, side='right') - 1
+    # Points below the first section or without a value are put into the first section.
+    sax[(sax < 0) | numpy.isnan(values)] = 0
+    return sax.astype(dtype)
+
+
+def compute_sax_chunk_codes(sax, precision, chunk_size):
+    """
+    Encode every chunk of a SAX representation as an integer.
+    The chunk starting at each index is read as a base-precision number.
+    Codes are int64 when all of them fit, otherwise python integers, so that different chunks never share a code.
+    :param sax: a SAX representation.
+    :param int precision: number of distinct symbols in the SAX representation.
+    :param int chunk_size: chunk size.
+    :return numpy.ndarray: code of the chunk starting at each index where a whole chunk fits.
+    """
+    if precision ** chunk_size - 1 > numpy.iinfo(numpy.int64).max:
+        dtype = object
+    else:
+        dtype = numpy.int64
+    sax = numpy.asarray(sax, dtype=numpy.int64).astype(dtype)
+    chunk_number = max(len(sax) - chunk_size + 1, 0)
+    codes = numpy.zeros(chunk_number, dtype=dtype)
+    for offset in range(chunk_size):
+        codes = codes * precision + sax[offset: offset + chunk_number]
+    return codes
+
+
 def read_csv(csv_name):
     """
     Read data from a csv file into a dictionary.
     :param str csv_name: path to a csv file.
     :return dict: a dictionary represents the data in file.
     """
-    data = {}
+    timestamps, values = read_csv_arrays(csv_name)
+    return dict(zip(timestamps.tolist(), values.tolist()))
+
+
+def read_csv_arrays(csv_name):
+    """
+    Read data from a csv file into arrays of timestamps and values.
+    The timestamp format is detected once from the first row, then whole columns are converted at once.
+    Only when some row does not follow the format, rows are converted one by one as to_epoch does.
+    :param str csv_name: path to a csv file.
+    :return tuple: an array of epoch timestamps and an array of values, sorted by timestamp.
+        For duplicated timestamps, the last value in the file is kept.
+    """
     if int(sys.version[0]) == 2:
         str_types = (str, unicode)
     else:
@@ -53,14 +150,118 @@ def read_csv(csv_name):
         raise exceptions.InvalidDataFormat('luminol.utils: csv_name has to be a string!')
     with open(csv_name, 'r') as csv_data:
         reader = csv.reader(csv_data, delimiter=',', quotechar='|')
-        for row in reader:
+        # Empty lines are skipped, rows without a value are invalid.
+        rows = [row for row in reader if row]
+    if any(len(row) < 2 for row in rows):
+        raise exceptions.InvalidDataFormat('luminol.utils: every row of a csv file needs a timestamp and a value.')
+    timestamp_strs = [row[0] for row in rows]
+    value_strs = [row[1] for row in rows]
+    try:
+        timestamp_format = find_timestamp_format(timestamp_strs[0]) if rows else None
+        timestamps = _to_epochs(timestamp_strs, timestamp_format)
+        values = numpy.array(value_strs, dtype=numpy.float64)
+    except ValueError:
+        timestamps = []
+        values = []
+        for timestamp_str, value_str in zip(timestamp_strs, value_strs):
             try:
-                key = to_epoch(row[0])
-                value = float(row[1])
-                data[key] = value
+                timestamp = to_epoch(timestamp_str)
+                values.append(float(value_str))
+                timestamps.append(timestamp)
             except ValueError:
                 pass
-    return data
+        timestamps = numpy.array(timestamps, dtype=numpy.float64)
+        values = numpy.array(values, dtype=numpy.float64)
+    order = numpy.argsort(timestamps, kind='mergesort')
+    timestamps, values = timestamps[order], values[order]
+    last = numpy.append(timestamps[1:] != timestamps[:-1], True)
+    return timestamps[last], values[last]
+
+
+def find_timestamp_format(t_str):
+    """
+    Find the format of a timestamp string.
+    :param str t_str: a timestamp string.
+    :return str: the matching format in constants.TIMESTAMP_STR_FORMATS, or None if the timestamp is an epoch number.
+    """
+    try:
+        float(t_str)
+        return None
+    except ValueError:
+        for format in constants.TIMESTAMP_STR_FORMATS:
+            try:
+                datetime.datetime.strptime(t_str, format)
+                return format
+            except ValueError:
+                pass
+    raise exceptions.InvalidDataFormat
+
+
+def _to_epochs(t_strs, format):
+    """
+    Convert timestamp strings of the same format to epoch numbers, as to_epoch does.
+    :param list t_strs: timestamp strings.
+    :param str format: the format of the timestamps, or None if they are epoch numbers.
+    :return numpy.ndarray: epoch numbers of the timestamps.
+    """
+    if format is None:
+        return numpy.array(t_strs, dtype=numpy.float64)
+    if format.startswith('%Y-%m-%d') and not format.endswith('%z'):
+        iso_strs = [t_str[:10] + 'T' + t_str[11:] for t_str in t_strs]
+    elif format.startswith('%Y%m%d'):
+        iso_strs = [t_str[:4] + '-' + t_str[4:6] + '-' + t_str[6:8] + 'T' + t_str[9:] for t_str in t_strs]
+    elif format.startswith('%H'):
+        iso_strs = ['1900-01-01T' + t_str for t_str in t_strs]
+    else:
+        return numpy.array([to_epoch(t_str) for t_str in t_strs], dtype=numpy.float64)
+    # numpy also parses strings which strptime rejects, such as with a time zone, so they are checked against the format.
+    # Rows which do not follow the format fail, and then all rows are converted one by one.
+    pattern = _get_format_pattern(format)
+    if not all(pattern.match(t_str) for t_str in t_strs):
+        raise ValueError('Timestamps do not all follow the format ' + format)
+    microseconds = numpy.array(iso_strs, dtype='datetime64[us]').astype(numpy.int64)
+    seconds, microseconds = numpy.divmod(microseconds, 1000000)
+    # to_epoch reads the time as local time, the utc offset only changes with the hour.
+    hours, positions = numpy.unique(seconds // 3600, return_inverse=True)
+    offsets = numpy.array([_local_utc_offset(hour * 3600) for hour in hours.tolist()], dtype=numpy.int64)
+    return (seconds + offsets[positions.reshape(-1)]) * 1000.0 + microseconds / 1000.0
+
+
+# Regular expressions matching each timestamp format, built when first needed.
+_format_patterns = {}
+
+_DIRECTIVE_PATTERNS = {
+    '%Y': r'\d{4}',
+    '%m': r'\d{2}',
+    '%d': r'\d{2}',
+    '%H': r'\d{2}',
+    '%M': r'\d{2}',
+    '%S': r'\d{2}',
+    '%f': r'\d{1,6}',
+}
+
+
+def _get_format_pattern(format):
+    """
+    Get a regular expression matching timestamp strings of a format, with zero-padded fields.
+    :param str format: a format of constants.TIMESTAMP_STR_FORMATS, without a time zone.
+    :return: the compiled regular expression.
+    """
+    if format not in _format_patterns:
+        parts = re.split('(%[a-zA-Z])', format)
+        _format_patterns[format] = re.compile(''.join(_DIRECTIVE_PATTERNS[part] if part in _DIRECTIVE_PATTERNS else re.escape(part)
+                                                      for part in parts) + r'\Z')
+    return _format_patterns[format]
+
+
+def _local_utc_offset(seconds):
+    """
+    Get the difference between an epoch number and the epoch number of the same time read as local time by to_epoch.
+    :param int seconds: an epoch number in seconds.
+    :return int: the difference in seconds.
+    """
+    t = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=seconds)
+    return int(time.mktime(t.utctimetuple())) - seconds
 
 
 def to_epoch(t_str):
@@ -92,7 +293,7 @@ def qbinom(p, n):
     :param p: quantile level
     :return: k
     """
-
+    from scipy.stats import binom
     return binom.ppf(p, n, 0.5)
 
 
@@ -104,5 +305,25 @@ def pbinom(k, n):
     :param n:
     :return: cumulative probability
     """
-
+    from scipy.stats import binom
     return binom.cdf(k, n, 0.5)
+
+
+# Sign test thresholds and cdf tables, keyed by (scan window, confidence).
+_sign_test_tables = {}
+
+
+def get_sign_test_table(scan_window, confidence):
+    """
+    Get the threshold and the cdf table the sign test uses for a scan window and a confidence.
+    They are computed once for each (scan window, confidence) and then looked up.
+    :param int scan_window: number of data points in a scan window.
+    :param float confidence: confidence to use for determining anomaly.
+    :return tuple: the count of points above baseline a scan window needs to exceed to be an anomaly,
+        and an array of pbinom(count, scan_window) for every count from 0 to scan_window.
+    """
+    key = (scan_window, confidence)
+    if key not in _sign_test_tables:
+        _sign_test_tables[key] = (qbinom(1 - confidence, scan_window) - 1,
+                                  pbinom(numpy.arange(scan_window + 1), scan_window))
+    return _sign_test_tables[key]
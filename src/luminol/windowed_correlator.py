@@ -0,0 +1,283 @@
+# coding=utf-8
+"""
+© 2015 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+"""
+API for WindowedCorrelator Module
+This module correlates two time series within many time windows.
+"""
+
+import numpy
+
+from luminol import exceptions, utils
+from luminol.algorithms.correlator_algorithms.cross_correlator import CrossCorrelator, compute_lagged_sums, normalize_values
+from luminol.anomaly_detector import AnomalyDetector
+from luminol.constants import DEFAULT_WINDOWED_CORRELATION_MIN_VARIANCE, DEFAULT_WINDOWED_CORRELATION_PREFIX_SIZE
+from luminol.modules.correlation_result import CorrelationResult
+from luminol.modules.time_series import TimeSeries
+from luminol.score_cache import default_score_cache
+
+
+def _prefix_sums(values):
+    """
+    Compute prefix sums, so that the sum of values[start:end] is sums[end] - sums[start].
+    :param numpy.ndarray values: the values.
+    :return numpy.ndarray: an array one longer than values, starting with 0.
+    """
+    sums = numpy.zeros(len(values) + 1)
+    numpy.cumsum(values, out=sums[1:])
+    return sums
+
+
+class WindowedCorrelator(object):
+
+    def __init__(self, time_series_a, time_series_b, use_anomaly_score=False, algorithm_params=None, score_cache=None):
+        """
+        Initializer
+        Both time series are aligned once onto the union of their timestamps, and prefix sums of the aligned values
+        are computed so that the correlation within any time window costs O(shifts) instead of O(n * shifts).
+        Prefix sums of lagged products take one array per shift step, so windows which allow more shift steps than
+        DEFAULT_WINDOWED_CORRELATION_PREFIX_SIZE permits are correlated on their values instead.
+        Correlator crops both time series to a window before aligning them, so a time series without a data point at
+        the last timestamps of a window takes its last value within the window there. Such windows are correlated on
+        copies of their aligned values, as Correlator does, and only windows ending on a data point of both time series
+        use the prefix sums.
+        Prefix sums carry rounding errors relative to the sums over all the values, so windows varying far less than
+        all the values, such as the windows before and after a large level shift, are correlated on their values too.
+        :param time_series_a: a TimeSeries, a dictionary or a path to a csv file(str).
+        :param time_series_b: a TimeSeries, a dictionary or a path to a csv file(str).
+        :param bool use_anomaly_score: if asserted, correlate the anomaly scores of the time series.
+        :param dict algorithm_params: additional params for the cross_correlator algorithm.
+        :param ScoreCache score_cache: cache of anomaly scores used with use_anomaly_score, the shared default cache if not passed.
+        """
+        if algorithm_params is not None and not isinstance(algorithm_params, dict):
+            raise exceptions.InvalidDataFormat('luminol.WindowedCorrelator: algorithm_params passed is not a dictionary.')
+        self.algorithm = CrossCorrelator(None, None, **(algorithm_params or {}))
+        time_series_a = self._load(time_series_a)
+        time_series_b = self._load(time_series_b)
+        if use_anomaly_score:
+            score_cache = score_cache if score_cache is not None else default_score_cache
+            time_series_a = AnomalyDetector(time_series_a, score_only=True, score_cache=score_cache).get_all_scores()
+            time_series_b = AnomalyDetector(time_series_b, score_only=True, score_cache=score_cache).get_all_scores()
+        if len(time_series_a) < 2 or len(time_series_b) < 2:
+            raise exceptions.NotEnoughDataPoints('luminol.WindowedCorrelator: Too few data points!')
+        self.series_timestamps = (time_series_a.timestamps_array, time_series_b.timestamps_array)
+        a, b = time_series_a.align(time_series_b)
+        self.timestamps = a.timestamps_array
+        self.aligned_values = (a.values_array.copy(), b.values_array.copy())
+        self._prepare_sums(a.values_array, b.values_array)
+
+    @staticmethod
+    def _load(time_series):
+        """
+        Load time series into a TimeSeries object.
+        :param timeseries: a TimeSeries, a dictionary or a path to a csv file(str).
+        :return TimeSeries: a TimeSeries object.
+        """
+        if isinstance(time_series, TimeSeries):
+            return time_series
+        if isinstance(time_series, dict):
+            return TimeSeries(time_series)
+        return TimeSeries.from_arrays(*utils.read_csv_arrays(time_series))
+
+    @staticmethod
+    def _standardize(values):
+        """
+        Center values on their mean and scale them by their standard deviation, which keeps the prefix sums small
+        without changing any correlation coefficient.
+        :param numpy.ndarray values: aligned values, changed in place.
+        :return numpy.ndarray: the standardized values.
+        """
+        values -= values.mean()
+        stdev = values.std()
+        if stdev:
+            values /= stdev
+        return values
+
+    def _prepare_sums(self, a_values, b_values):
+        """
+        Compute the prefix sums of the values, of their squares, and of the signs used by normalization.
+        Prefix sums of the lagged products are computed the first time a shift needs them.
+        :param numpy.ndarray a_values: aligned values of time series a.
+        :param numpy.ndarray b_values: aligned values of time series b.
+        """
+        # Normalizing by a negative maximum flips the sign of the coefficient.
+        self.a_non_negative = _prefix_sums(a_values >= 0)
+        self.b_non_negative = _prefix_sums(b_values >= 0)
+        self.a_values = self._standardize(a_values)
+        self.b_values = self._standardize(b_values)
+        self.a_sums = _prefix_sums(self.a_values)
+        self.b_sums = _prefix_sums(self.b_values)
+        self.a_square_sums = _prefix_sums(self.a_values * self.a_values)
+        self.b_square_sums = _prefix_sums(self.b_values * self.b_values)
+        self.product_sums = {}
+
+    def _get_product_sums(self, delay):
+        """
+        Get prefix sums of a[i] * b[i + delay], indexed by min(i, i + delay).
+        :param int delay: the delay in steps.
+        :return numpy.ndarray: the prefix sums.
+        """
+        if delay not in self.product_sums:
+            n = len(self.a_values)
+            self.product_sums[delay] = _prefix_sums(self.a_values[max(0, -delay): n - max(0, delay)] *
+                                                    self.b_values[max(0, delay): n - max(0, -delay)])
+        return self.product_sums[delay]
+
+    def _find_window(self, time_period):
+        """
+        Find the positions of a time window in the aligned timestamps.
+        Both time series need two data points within the window, as Correlator does.
+        :param time_period: a tuple (start, end), or None for all the timestamps.
+        :return tuple: start and end positions, and the positions of the last data point of each time series within the window.
+        """
+        if not time_period:
+            return 0, len(self.timestamps), (len(self.timestamps) - 1,) * 2
+        start_p, end_p = time_period
+        last_positions = []
+        for timestamps in self.series_timestamps:
+            end = numpy.searchsorted(timestamps, end_p, side='right')
+            if end - numpy.searchsorted(timestamps, start_p, side='left') < 2:
+                raise exceptions.NotEnoughDataPoints('luminol.WindowedCorrelator: Too few data points!')
+            last_positions.append(int(numpy.searchsorted(self.timestamps, timestamps[end - 1])))
+        start = int(numpy.searchsorted(self.timestamps, start_p, side='left'))
+        end = int(numpy.searchsorted(self.timestamps, end_p, side='right'))
+        return start, end, tuple(last_positions)
+
+    def _get_cropped_values(self, start, end, last_positions):
+        """
+        Get the normalized values of both time series within a time window, as if they were cropped before being aligned.
+        Positions after the last data point of a time series within the window take the value of that data point.
+        :param int start: start position of the window in the aligned timestamps.
+        :param int end: end position of the window in the aligned timestamps.
+        :param tuple last_positions: the positions of the last data point of each time series within the window.
+        :return list: the values of each time series within the window.
+        """
+        window_values = []
+        for aligned_values, last_position in zip(self.aligned_values, last_positions):
+            values = aligned_values[start:end].copy()
+            values[last_position + 1 - start:] = aligned_values[last_position]
+            window_values.append(normalize_values(values))
+        return window_values
+
+    def _get_moments(self, start, end):
+        """
+        Get the means and variances of the standardized values within a time window from the prefix sums.
+        :param int start: start position of the window in the aligned timestamps.
+        :param int end: end position of the window in the aligned timestamps.
+        :return tuple: the means and the variances of the values of both time series.
+        """
+        n = end - start
+        a_mean = (self.a_sums[end] - self.a_sums[start]) / n
+        b_mean = (self.b_sums[end] - self.b_sums[start]) / n
+        a_variance = (self.a_square_sums[end] - self.a_square_sums[start]) / n - a_mean * a_mean
+        b_variance = (self.b_square_sums[end] - self.b_square_sums[start]) / n - b_mean * b_mean
+        return a_mean, b_mean, a_variance, b_variance
+
+    def _use_values(self, start, end, last_positions):
+        """
+        Check whether a time window has to be correlated on its values instead of the prefix sums.
+        The rounding errors of differences of prefix sums grow with the number of values, while the sums within a window
+        grow with its variance and length, so the prefix sums are only used when the latter are large enough.
+        :param int start: start position of the window in the aligned timestamps.
+        :param int end: end position of the window in the aligned timestamps.
+        :param tuple last_positions: the positions of the last data point of each time series within the window.
+        :return bool: True if the window has to be correlated on its values.
+        """
+        if last_positions != (end - 1, end - 1):
+            return True
+        _, _, a_variance, b_variance = self._get_moments(start, end)
+        return min(a_variance, b_variance) * (end - start) < DEFAULT_WINDOWED_CORRELATION_MIN_VARIANCE * len(self.a_values)
+
+    def get_correlation_result(self, time_period=None):
+        """
+        Correlate the time series within a time window, as the cross_correlator algorithm does.
+        :param time_period: a tuple (start, end) representing a data period for considering correlation.
+        :return CorrelationResult: a CorrelationResult object.
+        """
+        start, end, last_positions = self._find_window(time_period)
+        timestamps = self.timestamps
+        algorithm = self.algorithm
+        if self._use_values(start, end, last_positions):
+            a_values, b_values = self._get_cropped_values(start, end, last_positions)
+            shifts, coefficients, shifted_coefficients = algorithm._correlate_aligned(timestamps[start:end], a_values, b_values)
+            return CorrelationResult(shifts.item(), coefficients.item(), shifted_coefficients.item())
+        allowed_shift_step = algorithm._find_allowed_shift(timestamps[start:end])
+        if allowed_shift_step:
+            delays = numpy.arange(-allowed_shift_step, allowed_shift_step)
+        else:
+            delays = numpy.arange(0, 1)
+        return self._correlate_window(start, end, delays)
+
+    def get_unshifted_coefficient(self, time_period=None):
+        """
+        Get the correlation coefficient within a time window without shifting the time series, which costs O(1).
+        It is a cheap estimate of the coefficient of get_correlation_result, used to rank many time series.
+        :param time_period: a tuple (start, end) representing a data period for considering correlation.
+        :return float: the correlation coefficient.
+        """
+        start, end, last_positions = self._find_window(time_period)
+        if self._use_values(start, end, last_positions):
+            a_values, b_values = self._get_cropped_values(start, end, last_positions)
+            denom = a_values.std() * b_values.std() * (end - start)
+            if not denom:
+                return 0.0
+            return float(numpy.dot(a_values - a_values.mean(), b_values - b_values.mean()) / denom)
+        return self._correlate_window(start, end, numpy.arange(0, 1)).coefficient
+
+    def _correlate_window(self, start, end, delays):
+        """
+        Correlate the time series within a time window for all the delays.
+        :param int start: start position of the window in the aligned timestamps.
+        :param int end: end position of the window in the aligned timestamps.
+        :param numpy.ndarray delays: the delays in steps, each smaller than the window length.
+        :return CorrelationResult: a CorrelationResult object.
+        """
+        n = end - start
+        timestamps = self.timestamps
+        algorithm = self.algorithm
+        lags = numpy.abs(delays)
+        delays_in_seconds = timestamps[start + lags] - timestamps[start]
+        delays_in_seconds[delays < 0] *= -1
+
+        # Sum over the overlapping positions i of a and i + delay of b.
+        a_mean, b_mean, a_variance, b_variance = self._get_moments(start, end)
+        a_starts = start + numpy.maximum(0, -delays)
+        b_starts = start + numpy.maximum(0, delays)
+        a_lagged_sums = self.a_sums[a_starts + n - lags] - self.a_sums[a_starts]
+        b_lagged_sums = self.b_sums[b_starts + n - lags] - self.b_sums[b_starts]
+        if len(delays) * len(self.a_values) <= DEFAULT_WINDOWED_CORRELATION_PREFIX_SIZE:
+            product_sums = numpy.array([self._get_product_sums(delay)[end - lag] - self._get_product_sums(delay)[start]
+                                        for delay, lag in zip(delays.tolist(), lags.tolist())])
+        else:
+            product_sums = compute_lagged_sums(self.a_values[start:end], self.b_values[start:end], delays, algorithm.method)
+        sums = product_sums - b_mean * a_lagged_sums - a_mean * b_lagged_sums + (n - lags) * a_mean * b_mean
+
+        correlations = sums / (numpy.sqrt(a_variance * b_variance) * n)
+        if (self.a_non_negative[end] == self.a_non_negative[start]) != (self.b_non_negative[end] == self.b_non_negative[start]):
+            correlations = -correlations
+
+        if algorithm.max_shift_milliseconds:
+            shifted_correlations = correlations * (1 + delays_in_seconds / float(algorithm.max_shift_milliseconds) * algorithm.shift_impact)
+        else:
+            shifted_correlations = correlations
+        max_position = numpy.argmax(correlations)
+        return CorrelationResult(delays_in_seconds[max_position].item(), correlations[max_position].item(),
+                                 shifted_correlations.max().item())
+
+    def is_correlated(self, time_period=None, threshold=0):
+        """
+        Compare with a threshold to determine whether the time series correlate to each other within a time window.
+        :param time_period: a tuple (start, end) representing a data period for considering correlation.
+        :param float threshold: the minimal coefficient.
+        :return: a CorrelationResult object if the time series correlate otherwise false.
+        """
+        correlation_result = self.get_correlation_result(time_period)
+        return correlation_result if correlation_result.coefficient >= threshold else False